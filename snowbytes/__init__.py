@@ -2,12 +2,29 @@ import logging.config
 
 # __version__ = open("version.md", encoding="utf-8").read().split(" ")[2]
 
-from .blueprint import Blueprint
-from .resources import *  # noqa: F403
+from typing import TYPE_CHECKING
+
+from . import resources
+
+if TYPE_CHECKING:
+    from .blueprint import Blueprint
+    from .resources import *  # noqa: F403
 
 logger = logging.getLogger("snowbytes")
 
 
+def __getattr__(name: str):
+    # Blueprint and the resource classes are imported on first use, which keeps `import snowbytes` and CLI
+    # startup fast
+    if name == "Blueprint":
+        from .blueprint import Blueprint
+
+        return Blueprint
+    if name in resources.__all__:
+        return getattr(resources, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     "Blueprint",
 ]
@@ -2,9 +2,10 @@
 
 import yaml
 
-from functools import cache
+from fnmatch import fnmatchcase
+from functools import cached_property
 
-from snowbytes.data_provider import list_schemas
+from snowbytes.data_provider import list_schemas, list_tables, list_views
 from snowbytes.enums import ResourceType
 from snowbytes.identifiers import FQN
 from snowbytes.privs import DatabasePriv, TablePriv, SchemaPriv, ViewPriv, WarehousePriv
@@ -80,9 +81,89 @@ def _parse_permifrost_identifier(identifier: str, is_db_scoped: bool = False):
     return FQN(database=parts[0], schema=parts[1], name=parts[2])
 
 
-@cache
-def _list_schemas(session, database):
-    return list_schemas(session, database)
+def _is_glob(pattern: str) -> bool:
+    return any(char in pattern for char in "*?[")
+
+
+def _glob_key(name) -> str:
+    # Permifrost specs are written without quoting, so match names case-insensitively
+    return str(name).strip('"').upper()
+
+
+def _match(name, pattern: str) -> bool:
+    return fnmatchcase(_glob_key(name), pattern.upper())
+
+
+class CatalogSnapshot:
+    """
+    The schemas, tables and views in an account, used to expand Permifrost wildcards.
+
+    Each kind of object is listed with a single SHOW ... IN ACCOUNT the first time a wildcard needs it,
+    and the snapshot is shared across every role in a spec. The account-wide schema listing leaves out
+    shared and imported databases, so schemas of a database missing from it are listed with
+    SHOW SCHEMAS IN DATABASE instead.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self._database_schemas: dict[str, list[FQN]] = {}
+
+    @cached_property
+    def schemas(self) -> dict[str, list[FQN]]:
+        return self._index(list_schemas(self.session))
+
+    @cached_property
+    def tables(self) -> dict[str, list[FQN]]:
+        return self._index(list_tables(self.session))
+
+    @cached_property
+    def views(self) -> dict[str, list[FQN]]:
+        return self._index(list_views(self.session))
+
+    @staticmethod
+    def _index(fqns: list[FQN]) -> dict[str, list[FQN]]:
+        by_database: dict[str, list[FQN]] = {}
+        for fqn in fqns:
+            by_database.setdefault(_glob_key(fqn.database), []).append(fqn)
+        return by_database
+
+    @staticmethod
+    def _in_databases(index: dict[str, list[FQN]], database_pattern: str) -> list[FQN]:
+        if not _is_glob(database_pattern):
+            return index.get(database_pattern.upper(), [])
+        return [
+            fqn for database, fqns in index.items() if fnmatchcase(database, database_pattern.upper()) for fqn in fqns
+        ]
+
+    def _schemas_in(self, database_pattern: str) -> list[FQN]:
+        if _is_glob(database_pattern) or database_pattern.upper() in self.schemas:
+            return self._in_databases(self.schemas, database_pattern)
+        database = database_pattern.upper()
+        if database not in self._database_schemas:
+            self._database_schemas[database] = list_schemas(self.session, database_pattern)
+        return self._database_schemas[database]
+
+    def match_schemas(self, database_pattern: str, schema_pattern: str) -> list[FQN]:
+        return [fqn for fqn in self._schemas_in(database_pattern) if _match(fqn.name, schema_pattern)]
+
+    def match_objects(self, kind: str, database_pattern: str, schema_pattern: str, name_pattern: str) -> list[FQN]:
+        index = self.tables if kind == "tables" else self.views
+        return [
+            fqn
+            for fqn in self._in_databases(index, database_pattern)
+            if _match(fqn.schema, schema_pattern) and _match(fqn.name, name_pattern)
+        ]
+
+
+def _dedupe_resources(resources: list) -> list:
+    """
+    Roles in a spec often share databases and schemas, and read and write privileges overlap, so the
+    same pointer or grant is emitted many times. Keep the first of each.
+    """
+    deduped = {}
+    for resource in resources:
+        deduped.setdefault((resource.resource_type, str(resource.fqn)), resource)
+    return list(deduped.values())
 
 
 def read_permifrost_config(session, file_path):
@@ -107,16 +188,50 @@ def read_permifrost_config(session, file_path):
     warehouses = config.pop("warehouses", [])  # noqa: F841
     integrations = config.pop("integrations", [])  # noqa: F841
 
-    return [
-        # *databases,
-        *_get_role_resources(session, roles),
-        *_get_user_resources(users),
-        # warehouses,
-        # integrations,
-    ]
-
-
-def _get_role_resources(session, roles: list):
+    return _dedupe_resources(
+        [
+            # *databases,
+            *_get_role_resources(CatalogSnapshot(session), roles),
+            *_get_user_resources(users),
+            # warehouses,
+            # integrations,
+        ]
+    )
+
+
+# Grant arguments for tables and views, which Permifrost lists together under privileges.tables
+OBJECT_GRANT_KWARGS = {
+    "tables": {
+        "resource_type": ResourceType.TABLE,
+        "on": "on_table",
+        "all_in": "on_all_tables_in",
+        "future_in": "on_future_tables_in",
+        "all_in_schema": "on_all_tables_in_schema",
+        "future_in_schema": "on_future_tables_in_schema",
+        "all_in_database": "on_all_tables_in_database",
+        "future_in_database": "on_future_tables_in_database",
+    },
+    "views": {
+        "resource_type": ResourceType.VIEW,
+        "on": "on_view",
+        "all_in": "on_all_views_in",
+        "future_in": "on_future_views_in",
+        "all_in_schema": "on_all_views_in_schema",
+        "future_in_schema": "on_future_views_in_schema",
+        "all_in_database": "on_all_views_in_database",
+        "future_in_database": "on_future_views_in_database",
+    },
+}
+
+
+def _schema_pointer(database: str, schema: str) -> tuple[ResourcePointer, ResourcePointer]:
+    db = ResourcePointer(name=database, resource_type=ResourceType.DATABASE)
+    schema_pointer = ResourcePointer(name=schema, resource_type=ResourceType.SCHEMA)
+    db.add(schema_pointer)
+    return db, schema_pointer
+
+
+def _get_role_resources(catalog: CatalogSnapshot, roles: list):
     resources = []
     for permifrost_role in roles:
         role_name, config = permifrost_role.popitem()
@@ -159,25 +274,20 @@ def _get_role_resources(session, roles: list):
         schema_write = config.get("privileges", {}).get("schemas", {}).get("write", [])
 
         def _add_schema_grants(resources, schema_identifier, privs, role):
-            if schema_identifier.endswith(".*"):
-                database = _parse_permifrost_identifier(schema_identifier, is_db_scoped=True).database
-                for schema in _list_schemas(session, database):
-                    if schema.endswith("INFORMATION_SCHEMA"):
-                        continue
-                    for priv in privs:
-                        resources.append(Grant(priv=priv, on_schema=schema, to=role))
-                for priv in privs:
-                    resources.append(FutureGrant(priv=priv, on_future_schemas_in_database=database, to=role))
-            elif schema_identifier.endswith("*"):
-                # schema: "db.schema_*"
+            database, schema_pattern = schema_identifier.split(".")
+            if database.upper() == "SNOWFLAKE":
                 return
+            if _is_glob(database) or _is_glob(schema_pattern):
+                # schema: "db.*", "db.schema_*" or "*.schema"
+                for schema in catalog.match_schemas(database, schema_pattern):
+                    for priv in privs:
+                        resources.append(Grant(priv=priv, on_schema=str(schema), to=role))
+                if schema_pattern == "*" and not _is_glob(database):
+                    for priv in privs:
+                        resources.append(FutureGrant(priv=priv, on_future_schemas_in_database=database, to=role))
             else:
                 fqn = _parse_permifrost_identifier(schema_identifier, is_db_scoped=True)
-                if fqn.database.upper() == "SNOWFLAKE":
-                    return
-                db = ResourcePointer(name=fqn.database, resource_type=ResourceType.DATABASE)
-                schema = ResourcePointer(name=fqn.name, resource_type=ResourceType.SCHEMA)
-                db.add(schema)
+                db, schema = _schema_pointer(fqn.database, fqn.name)
                 resources.append(db)
                 resources.append(schema)
                 for priv in privs:
@@ -191,78 +301,52 @@ def _get_role_resources(session, roles: list):
         table_read = config.get("privileges", {}).get("tables", {}).get("read", [])
         table_write = config.get("privileges", {}).get("tables", {}).get("write", [])
 
-        def _add_table_grants(resources, table_identifier, privs, role):
-            if table_identifier.endswith(".*.*"):
-                database = _parse_permifrost_identifier(table_identifier).database
-                for schema in _list_schemas(session, database):
-                    if schema.endswith("INFORMATION_SCHEMA"):
-                        continue
-                    for priv in privs:
-                        resources.append(GrantOnAll(priv=priv, on_all_tables_in_schema=schema, to=role))
-                        resources.append(FutureGrant(priv=priv, on_future_tables_in_schema=schema, to=role))
-
-                for priv in privs:
-                    resources.append(GrantOnAll(priv=priv, on_all_tables_in_database=database, to=role))
-                    resources.append(FutureGrant(priv=priv, on_future_tables_in_database=database, to=role))
-            elif table_identifier.endswith(".*"):
-                fqn = _parse_permifrost_identifier(table_identifier)
-                if fqn.schema.endswith("*") or fqn.database.upper() == "SNOWFLAKE":
-                    return
-                db = ResourcePointer(name=fqn.database, resource_type=ResourceType.DATABASE)
-                schema = ResourcePointer(name=fqn.schema, resource_type=ResourceType.SCHEMA)
-                db.add(schema)
-                resources.append(db)
-                resources.append(schema)
-                for priv in privs:
-                    resources.append(GrantOnAll(priv=priv, on_all_tables_in=schema, to=role))
-                    resources.append(FutureGrant(priv=priv, on_future_tables_in=schema, to=role))
-            elif table_identifier.endswith("*"):
-                # table: "db.schema.table_*"
+        def _add_object_grants(resources, kind, identifier, privs, role):
+            kwargs = OBJECT_GRANT_KWARGS[kind]
+            database, schema_pattern, name_pattern = identifier.split(".")
+            if database.upper() == "SNOWFLAKE":
                 return
-            else:
-                resources.append(ResourcePointer(name=table_identifier, resource_type=ResourceType.TABLE))
-                for priv in privs:
-                    resources.append(Grant(priv=priv, on_table=table_identifier, to=role))
-
-        def _add_view_grants(resources, view_identifier, privs, role):
-            if view_identifier.endswith(".*.*"):
-                database = _parse_permifrost_identifier(view_identifier).database
-                for schema in _list_schemas(session, database):
-                    if schema.endswith("INFORMATION_SCHEMA"):
-                        continue
+            if name_pattern == "*" and schema_pattern == "*" and not _is_glob(database):
+                # table: "db.*.*"
+                for schema in catalog.match_schemas(database, "*"):
                     for priv in privs:
-                        resources.append(GrantOnAll(priv=priv, on_all_views_in_schema=schema, to=role))
-                        resources.append(FutureGrant(priv=priv, on_future_views_in_schema=schema, to=role))
-                for priv in privs:
-                    resources.append(GrantOnAll(priv=priv, on_all_views_in_database=database, to=role))
-                    resources.append(FutureGrant(priv=priv, on_future_views_in_database=database, to=role))
-            elif view_identifier.endswith(".*"):
-                fqn = _parse_permifrost_identifier(view_identifier)
-                if fqn.schema.endswith("*") or fqn.database.upper() == "SNOWFLAKE":
-                    return
-                db = ResourcePointer(name=fqn.database, resource_type=ResourceType.DATABASE)
-                schema = ResourcePointer(name=fqn.schema, resource_type=ResourceType.SCHEMA)
-                db.add(schema)
-                resources.append(db)
-                resources.append(schema)
+                        resources.append(GrantOnAll(priv=priv, **{kwargs["all_in_schema"]: str(schema)}, to=role))
+                        resources.append(FutureGrant(priv=priv, **{kwargs["future_in_schema"]: str(schema)}, to=role))
                 for priv in privs:
-                    resources.append(GrantOnAll(priv=priv, on_all_views_in=schema, to=role))
-                    resources.append(FutureGrant(priv=priv, on_future_views_in=schema, to=role))
-
-            elif view_identifier.endswith("*"):
+                    resources.append(GrantOnAll(priv=priv, **{kwargs["all_in_database"]: database}, to=role))
+                    resources.append(FutureGrant(priv=priv, **{kwargs["future_in_database"]: database}, to=role))
+            elif name_pattern == "*":
+                # table: "db.schema.*" or "db.schema_*.*"
+                if _is_glob(database) or _is_glob(schema_pattern):
+                    schemas = [
+                        (schema.database, schema.name) for schema in catalog.match_schemas(database, schema_pattern)
+                    ]
+                else:
+                    schemas = [(database, schema_pattern)]
+                for schema_database, schema_name in schemas:
+                    db, schema = _schema_pointer(schema_database, schema_name)
+                    resources.append(db)
+                    resources.append(schema)
+                    for priv in privs:
+                        resources.append(GrantOnAll(priv=priv, **{kwargs["all_in"]: schema}, to=role))
+                        resources.append(FutureGrant(priv=priv, **{kwargs["future_in"]: schema}, to=role))
+            elif _is_glob(identifier):
                 # table: "db.schema.table_*"
-                return
+                for fqn in catalog.match_objects(kind, database, schema_pattern, name_pattern):
+                    resources.append(ResourcePointer(name=str(fqn), resource_type=kwargs["resource_type"]))
+                    for priv in privs:
+                        resources.append(Grant(priv=priv, **{kwargs["on"]: str(fqn)}, to=role))
             else:
-                resources.append(ResourcePointer(name=view_identifier, resource_type=ResourceType.VIEW))
+                resources.append(ResourcePointer(name=identifier, resource_type=kwargs["resource_type"]))
                 for priv in privs:
-                    resources.append(Grant(priv=priv, on_view=view_identifier, to=role))
+                    resources.append(Grant(priv=priv, **{kwargs["on"]: identifier}, to=role))
 
         for table in table_read:
-            _add_table_grants(resources, table, TABLE_READ_PRIVS, role)
-            _add_view_grants(resources, table, VIEW_READ_PRIVS, role)
+            _add_object_grants(resources, "tables", table, TABLE_READ_PRIVS, role)
+            _add_object_grants(resources, "views", table, VIEW_READ_PRIVS, role)
         for table in table_write:
-            _add_table_grants(resources, table, TABLE_WRITE_PRIVS, role)
-            _add_view_grants(resources, table, VIEW_WRITE_PRIVS, role)
+            _add_object_grants(resources, "tables", table, TABLE_WRITE_PRIVS, role)
+            _add_object_grants(resources, "views", table, VIEW_WRITE_PRIVS, role)
 
         # TODO: owns
 
@@ -1,9 +1,12 @@
+import hashlib
 import json
 import logging
+import multiprocessing.util
+import os
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from queue import Queue
-from typing import Any, Generator, Iterable, Optional, Sequence, TypeVar, Union, cast
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Generator, Iterable, Optional, Sequence, Union, cast
 
 import snowflake.connector
 
@@ -24,10 +27,10 @@ from .exceptions import (
     MissingPrivilegeException,
     MissingResourceException,
     NonConformingPlanException,
-    NotADAGException,
     OrphanResourceException,
 )
-from .identifiers import URN, parse_identifier, parse_URN, resource_label_for_type
+from .graph import topological_sort
+from .identifiers import FQN, URN, parse_identifier, parse_URN, resource_label_for_type
 from .privs import (
     CREATE_PRIV_FOR_RESOURCE_TYPE,
     system_role_for_priv,
@@ -49,7 +52,9 @@ from .resources.role import Role
 from .resources.tag import Tag, TaggableResource
 from .scope import AccountScope, DatabaseScope, OrganizationScope, SchemaScope, TableScope
 
-T = TypeVar("T")
+if TYPE_CHECKING:
+    from .plan_cache import PlanCache
+
 ResourceRef = Union[tuple[ResourceType, str], str]
 
 
@@ -81,6 +86,7 @@ class CreateResource(ResourceChange):
             "urn": str(self.urn),
             "resource_cls": self.resource_cls.__name__,
             "after": self.after,
+            "after_hash": hash_resource_data(self.after),
         }
 
 
@@ -93,6 +99,7 @@ class DropResource(ResourceChange):
             "action": "DROP",
             "urn": str(self.urn),
             "before": self.before,
+            "before_hash": hash_resource_data(self.before),
         }
 
 
@@ -111,6 +118,8 @@ class UpdateResource(ResourceChange):
             "before": self.before,
             "after": self.after,
             "delta": self.delta,
+            "before_hash": hash_resource_data(self.before),
+            "after_hash": hash_resource_data(self.after),
         }
 
 
@@ -132,6 +141,15 @@ class TransferOwnership(ResourceChange):
 
 State = dict[URN, dict]
 Plan = list[ResourceChange]
+FetchResource = Callable[[Any, URN], Optional[dict]]
+
+
+def hash_resource_data(data: dict) -> str:
+    """
+    A stable digest of a resource's normalized data, for the before_hash and after_hash of a change in the
+    plan JSON. Downstream tools can compare these to detect drift without comparing full dicts.
+    """
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
 
 
 def plan_from_dict(plan_dict: dict) -> Plan:
@@ -406,10 +424,14 @@ def _split_by_scope(
 
 
 def _walk(resource: Resource) -> Generator[Resource, None, None]:
-    yield resource
-    if isinstance(resource, ResourceContainer):
-        for item in resource.items():
-            yield from _walk(item)
+    # Depth-first, pre-order. Uses an explicit stack instead of nested generators so that each
+    # resource is yielded once rather than being passed up through every level of the tree.
+    stack = [resource]
+    while stack:
+        resource = stack.pop()
+        yield resource
+        if isinstance(resource, ResourceContainer):
+            stack.extend(reversed(resource.items()))
 
 
 def _raise_if_plan_would_drop_session_user(session_ctx: SessionContext, plan: Plan):
@@ -541,6 +563,7 @@ class Blueprint:
         self._finalized: bool = False
         self._staged: list[Resource] = []
         self._root: ResourcePointer = ResourcePointer(name="MISSING", resource_type=ResourceType.ACCOUNT)
+        self._resources: list[Resource] = []
         self.add(resources or [])
 
     @classmethod
@@ -549,6 +572,7 @@ class Blueprint:
         blueprint._config = config
         blueprint._staged = []
         blueprint._root = ResourcePointer(name="MISSING", resource_type=ResourceType.ACCOUNT)
+        blueprint._resources = []
         blueprint._finalized = False
         blueprint.add(config.resources or [])
         return blueprint
@@ -594,81 +618,53 @@ class Blueprint:
             raise NonConformingPlanException("Non-conforming actions found in plan:\n" + exception_block)
 
     def _plan(self, remote_state: State, manifest: Manifest) -> Plan:
-        additive_changes: list[ResourceChange] = []
-        destructive_changes: list[ResourceChange] = []
-
-        for resource_change in diff(remote_state, manifest):
-            if isinstance(resource_change, (CreateResource, UpdateResource, TransferOwnership)):
-                additive_changes.append(resource_change)
-            elif isinstance(resource_change, DropResource):
-                destructive_changes.append(resource_change)
-
-        # Generate a list of all URNs
-        resource_set = set(manifest.urns + list(remote_state.keys()))
-        for ref in manifest.refs:
-            resource_set.add(ref[0])
-            resource_set.add(ref[1])
-        # Calculate a topological sort order for the URNs
-        sort_order = topological_sort(resource_set, set(manifest.refs))
-        plan = sorted(additive_changes, key=lambda change: sort_order[change.urn]) + _sort_destructive_changes(
-            destructive_changes, sort_order
-        )
-        return plan
+        return _order_changes(diff(remote_state, manifest), remote_state, manifest)
 
-    def fetch_remote_state(self, session, manifest: Manifest) -> State:
-        state: State = {}
+    def fetch_remote_state(self, session, manifest: Manifest, fetch: Optional[FetchResource] = None) -> State:
+        """
+        Fetch the remote state of every resource in the manifest, and of every resource a sync would drop.
+        Resources are fetched with data_provider.fetch_resource, or with fetch if given, eg. to serve them
+        from a cache.
+        """
         session_ctx = data_provider.fetch_session(session)
 
         data_provider.use_secondary_roles(session, all=True)
 
+        state = self._fetch_sync_state(session, session_ctx, fetch)
+        _fetch_manifest_state(session, manifest, state, session_ctx, fetch)
+        _check_refs_exist(
+            session, [(parent, reference) for parent, reference in manifest.refs if reference not in manifest], fetch
+        )
+        return state
+
+    def _fetch_sync_state(self, session, session_ctx: SessionContext, fetch: Optional[FetchResource] = None) -> State:
+        fetch = fetch or data_provider.fetch_resource
+        state: State = {}
         if self._config.run_mode == RunMode.SYNC:
             if self._config.allowlist:
                 for resource_type in self._config.allowlist:
-                    for fqn in data_provider.list_resource(session, resource_label_for_type(resource_type)):
+                    resource_label = resource_label_for_type(resource_type)
+                    # Grant-like listings already contain every field, so they don't need a fetch per resource
+                    listing: Sequence[tuple[FQN, Optional[dict]]]
+                    if data_provider.has_hydrated_list(resource_label):
+                        listing = data_provider.list_hydrated_resource(session, resource_label)
+                    else:
+                        listing = [(fqn, None) for fqn in data_provider.list_resource(session, resource_label)]
+                    for fqn, data in listing:
                         # FIXME
                         if self._config.scope == BlueprintScope.DATABASE and fqn.database != self._config.database:
                             continue
                         elif self._config.scope == BlueprintScope.SCHEMA and fqn.schema != self._config.schema:
                             continue
                         urn = URN(resource_type=resource_type, fqn=fqn, account_locator=session_ctx["account_locator"])
-                        data = data_provider.fetch_resource(session, urn)
+                        if data is None:
+                            data = fetch(session, urn)
                         if data is None:
                             raise MissingResourceException(f"Resource could not be found: {urn}")
                         resource_cls = Resource.resolve_resource_cls(urn.resource_type, data)
                         state[urn] = resource_cls.spec(**data).to_dict(session_ctx["account_edition"])
             else:
                 raise RuntimeError("Sync mode requires an allowlist")
-
-        for urn, manifest_item in manifest.items():
-            data = data_provider.fetch_resource(session, urn)
-            if data is not None:
-                if isinstance(manifest_item, ResourcePointer):
-                    resource_cls = Resource.resolve_resource_cls(urn.resource_type, data)
-                else:
-                    resource_cls = manifest_item.resource_cls
-
-                state[urn] = resource_cls.spec(**data).to_dict(session_ctx["account_edition"])
-
-        # check for existence of resource refs
-        for parent, reference in manifest.refs:
-            if reference in manifest:
-                continue
-
-            is_public_schema = reference.resource_type == ResourceType.SCHEMA and reference.fqn.name == ResourceName(
-                "PUBLIC"
-            )
-
-            try:
-                data = data_provider.fetch_resource(session, reference)
-            except Exception:
-                data = None
-
-            if data is None and not is_public_schema:
-                # logger.error(manifest.to_dict(session_ctx))
-                raise MissingResourceException(
-                    f"Resource {reference} required by {parent} not found or failed to fetch"
-                )
-
         return state
 
     def _resolve_vars(self):
@@ -676,7 +672,7 @@ class Blueprint:
             resource._resolve_vars(self._config.vars)
 
     def _resolve_role_refs(self):
-        for resource in _walk(self._root):
+        for resource in self._resources:
             if isinstance(resource, ResourcePointer):
                 continue
             resource._resolve_role_refs()
@@ -797,12 +793,13 @@ class Blueprint:
         To emulate this behavior, Blueprint will attempt to look up any referenced tags by name
         """
         taggables: list[TaggableResource] = []
-        tags: list[Tag] = []
-        for resource in _walk(self._root):
+        tags_by_name: dict[ResourceName, Tag] = {}
+        for resource in self._resources:
             if isinstance(resource, TaggableResource):
                 taggables.append(resource)
             elif isinstance(resource, Tag):
-                tags.append(resource)
+                # The first tag found with a given name wins
+                tags_by_name.setdefault(resource.name, resource)
 
         for resource in taggables:
             new_tags = {}
@@ -813,10 +810,9 @@ class Blueprint:
                 if "database" in identifier or "schema" in identifier:
                     new_tags[tag_name] = tag_value
                 else:
-                    for tag in tags:
-                        if tag.name == tag_name:
-                            new_tags[str(tag.fqn)] = tag_value
-                            break
+                    tag = tags_by_name.get(ResourceName(tag_name))
+                    if tag is not None:
+                        new_tags[str(tag.fqn)] = tag_value
                     else:
                         # We couldn't resolve the tag, so just use the tag name as is
                         new_tags[tag_name] = tag_value
@@ -824,17 +820,20 @@ class Blueprint:
             tag_ref = resource.create_tag_reference()
             if tag_ref:
                 self._root.add(tag_ref)
+                self._resources.append(tag_ref)
 
     def _create_ownership_refs(self, session_ctx: SessionContext) -> None:
-        role_grants: list[RoleGrant] = _get_role_grants(self._root)
+        role_grants_by_role: dict[ResourceName, list[RoleGrant]] = {}
+        for role_grant in _get_role_grants(self._root):
+            role_grants_by_role.setdefault(role_grant.role.name, []).append(role_grant)
 
-        for resource in _walk(self._root):
+        for resource in self._resources:
             if isinstance(resource, ResourcePointer):
                 continue
             elif isinstance(resource, RoleGrant):
                 # Support ordering for role grants in a role tree
-                for role_grant in role_grants:
-                    if isinstance(resource.to, Role) and resource.to.name == role_grant.role.name:
+                if isinstance(resource.to, Role):
+                    for role_grant in role_grants_by_role.get(resource.to.name, []):
                         resource.requires(role_grant)
             elif hasattr(resource._data, "owner"):
                 owner = getattr(resource._data, "owner")
@@ -855,11 +854,8 @@ class Blueprint:
                 # If the owner role isn't available in the session, try to find a role grant that can be used to
                 # satisfy the requirement.
                 if owner.name not in session_ctx["available_roles"]:
-                    for role_grant in role_grants:
-                        # Only look for role grants that match the owner role
-                        if role_grant.role.name != owner.name:
-                            continue
-
+                    # Only look for role grants that match the owner role
+                    for role_grant in role_grants_by_role.get(owner.name, []):
                         # Only look for role-to-role grants
                         if role_grant._data.to_role is None:
                             continue
@@ -873,7 +869,7 @@ class Blueprint:
                     #     )
 
     def _create_grandparent_refs(self) -> None:
-        for resource in _walk(self._root):
+        for resource in self._resources:
             if isinstance(resource.scope, SchemaScope):
                 resource.requires(resource.container.container)
 
@@ -882,7 +878,7 @@ class Blueprint:
         stage_future_grants: dict[ResourceName, list[FutureGrant]] = {}
         stage_grant_on_all: dict[ResourceName, list[GrantOnAll]] = {}
 
-        for resource in _walk(self._root):
+        for resource in self._resources:
             if isinstance(resource, Grant):
                 if resource._data.on_type == ResourceType.STAGE:
                     if resource._data.on not in stage_grants:
@@ -918,7 +914,7 @@ class Blueprint:
         _apply_refs(stage_grant_on_all)
 
     def _finalize_resources(self) -> None:
-        for resource in _walk(self._root):
+        for resource in self._resources:
             resource._finalized = True
 
     def _finalize(self, session_ctx: SessionContext) -> None:
@@ -927,6 +923,9 @@ class Blueprint:
         self._finalized = True
         self._resolve_vars()
         self._build_resource_graph(session_ctx)
+        # The resource tree is fixed after this point, except for tag references which are appended
+        # as they are created. Flatten it once so the finalization passes don't each re-walk the tree.
+        self._resources = list(_walk(self._root))
         self._resolve_role_refs()
         self._create_tag_references()
         self._create_ownership_refs(session_ctx)
@@ -937,7 +936,7 @@ class Blueprint:
     def generate_manifest(self, session_ctx: SessionContext) -> Manifest:
         manifest = Manifest(account_locator=session_ctx["account_locator"])
         self._finalize(session_ctx)
-        for resource in _walk(self._root):
+        for resource in self._resources:
             if isinstance(resource, Resource):
                 manifest.add(resource, session_ctx["account_edition"])
             else:
@@ -945,13 +944,36 @@ class Blueprint:
 
         return manifest
 
-    def plan(self, session) -> Plan:
+    def _lookup_plan(
+        self, plan_cache: Optional["PlanCache"], session, session_ctx: SessionContext, manifest: Manifest
+    ) -> tuple[Optional[str], Optional[Plan]]:
+        """Return the plan cache key for this manifest and account, and the plan stored under it if any"""
+        if plan_cache is None:
+            return None, None
+        cache_key = plan_cache.key(session, session_ctx, manifest, self._config)
+        if cache_key is None:
+            return None, None
+        cached_plan = plan_cache.get(cache_key)
+        if cached_plan is not None:
+            logger.info("Config and account are unchanged, reusing the cached plan")
+        return cache_key, cached_plan
+
+    def plan(self, session, plan_cache: Optional["PlanCache"] = None) -> Plan:
+        """
+        Compare the blueprint to the account. With a plan_cache, a stored plan is returned instead when
+        neither the manifest nor the account's fingerprint has changed since it was made.
+        """
         reset_cache()
         logger.debug("Using blueprint vars:")
         for key in self._config.vars.keys():
             logger.debug(f"  {key}")
         session_ctx = data_provider.fetch_session(session)
         manifest = self.generate_manifest(session_ctx)
+
+        cache_key, cached_plan = self._lookup_plan(plan_cache, session, session_ctx, manifest)
+        if cached_plan is not None:
+            return cached_plan
+
         remote_state = self.fetch_remote_state(session, manifest)
         try:
             finished_plan = self._plan(remote_state, manifest)
@@ -963,6 +985,65 @@ class Blueprint:
 
             raise e
         self._raise_for_nonconforming_plan(session_ctx, finished_plan)
+        if plan_cache is not None and cache_key is not None:
+            plan_cache.set(cache_key, finished_plan)
+        return finished_plan
+
+    def plan_sharded(
+        self,
+        session,
+        workers: Optional[int] = None,
+        connection_factory: Optional[Callable[[], Any]] = None,
+        plan_cache: Optional["PlanCache"] = None,
+    ) -> Plan:
+        """
+        Plan like `plan`, with the remote state fetched and diffed in shards: one for account-level resources
+        and one for each database and everything in it. Shards run in a pool of worker processes, each with
+        its own connection from connection_factory, which defaults to connect(). The partial plans are ordered
+        together over the whole manifest, so the result is the same plan that `plan` returns, and plans are
+        cached in plan_cache the same way.
+        """
+        reset_cache()
+        session_ctx = data_provider.fetch_session(session)
+        manifest = self.generate_manifest(session_ctx)
+
+        cache_key, cached_plan = self._lookup_plan(plan_cache, session, session_ctx, manifest)
+        if cached_plan is not None:
+            return cached_plan
+
+        data_provider.use_secondary_roles(session, all=True)
+        sync_state = self._fetch_sync_state(session, session_ctx)
+        shards = _shard_manifest(manifest, sync_state)
+
+        workers = min(workers or os.cpu_count() or 1, len(shards))
+        if workers <= 1:
+            results = [_plan_shard(session, shard, session_ctx) for shard in shards]
+        else:
+            if connection_factory is None:
+                from .operations.connector import connect
+
+                connection_factory = connect
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_shard_worker, initargs=(connection_factory,)
+            ) as executor:
+                # Start the largest shards first, so that a big database doesn't finish last on its own
+                by_size = sorted(range(len(shards)), key=lambda idx: -len(shards[idx].items))
+                futures = {idx: executor.submit(_plan_shard_in_worker, shards[idx], session_ctx) for idx in by_size}
+                results = [futures[idx].result() for idx in range(len(shards))]
+
+        # Shards don't overlap. Put their state together in the order fetch_remote_state would have built it,
+        # which the topological sort depends on to break ties.
+        shard_state: State = {}
+        for state, _ in results:
+            shard_state.update(state)
+        remote_state = {urn: shard_state[urn] for urn in sync_state}
+        remote_state.update((urn, shard_state[urn]) for urn in manifest.urns if urn in shard_state)
+
+        changes = [change for _, shard_changes in results for change in shard_changes]
+        finished_plan = _order_changes(changes, remote_state, manifest)
+        self._raise_for_nonconforming_plan(session_ctx, finished_plan)
+        if plan_cache is not None and cache_key is not None:
+            plan_cache.set(cache_key, finished_plan)
         return finished_plan
 
     def apply(self, session, plan: Optional[Plan] = None):
@@ -1242,48 +1323,155 @@ def compile_plan_to_sql(session_ctx: SessionContext, plan: Plan):
     return sql_commands
 
 
-def topological_sort(resource_set: set[T], references: set[tuple[T, T]]) -> dict[T, int]:
-    # Kahn's algorithm
+def _fetch_manifest_state(
+    session, manifest: Manifest, state: State, session_ctx: SessionContext, fetch: Optional[FetchResource] = None
+) -> None:
+    fetch = fetch or data_provider.fetch_resource
+    for urn, manifest_item in manifest.items():
+        data = fetch(session, urn)
+        if data is not None:
+            if isinstance(manifest_item, ResourcePointer):
+                resource_cls = Resource.resolve_resource_cls(urn.resource_type, data)
+            else:
+                resource_cls = manifest_item.resource_cls
+
+            state[urn] = resource_cls.spec(**data).to_dict(session_ctx["account_edition"])
+
+
+def _check_refs_exist(session, refs: Iterable[tuple[URN, URN]], fetch: Optional[FetchResource] = None) -> None:
+    """
+    Raise if any resource referenced from the manifest, but not part of it, is missing
+    """
+    fetch = fetch or data_provider.fetch_resource
+    for parent, reference in refs:
+        is_public_schema = reference.resource_type == ResourceType.SCHEMA and reference.fqn.name == ResourceName(
+            "PUBLIC"
+        )
+
+        try:
+            data = fetch(session, reference)
+        except Exception:
+            data = None
+
+        if data is None and not is_public_schema:
+            # logger.error(manifest.to_dict(session_ctx))
+            raise MissingResourceException(f"Resource {reference} required by {parent} not found or failed to fetch")
+
+
+@dataclass
+class _Shard:
+    """
+    A part of the manifest that can be fetched and diffed on its own: either all account-level resources
+    (database is None), or a database and everything in it.
+    """
+
+    database: Optional[ResourceName]
+    # Resource pointers are sent as None, rather than pickling them along with the resource graph they point into
+    items: list[tuple[URN, Optional[ManifestResource]]] = field(default_factory=list)
+    # References to resources outside of the manifest, which have to exist
+    refs: list[tuple[URN, URN]] = field(default_factory=list)
+    # Remote state already listed by a SYNC run
+    state: State = field(default_factory=dict)
+
 
-    # Compute in-degree (# of inbound edges) for each node
-    in_degrees: dict[T, int] = {}
-    outgoing_edges: dict[T, set[T]] = {}
+def _shard_database(urn: URN) -> Optional[ResourceName]:
+    if urn.resource_type == ResourceType.DATABASE:
+        return urn.fqn.name
+    if isinstance(RESOURCE_SCOPES[urn.resource_type], (AccountScope, OrganizationScope)):
+        return None
+    return urn.fqn.database
 
-    for node in resource_set:
-        in_degrees[node] = 0
-        outgoing_edges[node] = set()
 
-    for node, ref in references:
-        in_degrees[ref] += 1
-        outgoing_edges[node].add(ref)
+def _shard_manifest(manifest: Manifest, sync_state: State) -> list[_Shard]:
+    """
+    Split the manifest by scope. Diffing a resource only looks at its own state and at its container, which
+    is always in the same shard, so shards are independent. Reference edges between shards only matter for
+    ordering the plan, which happens over the whole manifest once all shards are done.
+    """
+    shards: dict[Optional[ResourceName], _Shard] = {None: _Shard(database=None)}
+    for urn, item in manifest.items():
+        database = _shard_database(urn)
+        if database not in shards:
+            shards[database] = _Shard(database=database)
+        shard = shards[database]
+        shard.items.append((urn, item if isinstance(item, ManifestResource) else None))
+        if urn in sync_state:
+            shard.state[urn] = sync_state[urn]
+
+    # Listed resources that aren't in the manifest are dropped, which doesn't depend on any other resource
+    for urn, data in sync_state.items():
+        if urn not in manifest:
+            shards[None].state[urn] = data
+
+    for parent, reference in manifest.refs:
+        if reference not in manifest:
+            shards[_shard_database(parent)].refs.append((parent, reference))
+
+    return list(shards.values())
+
+
+def _plan_shard(session, shard: _Shard, session_ctx: SessionContext) -> tuple[State, list[ResourceChange]]:
+    manifest = Manifest(account_locator=session_ctx["account_locator"])
+    for urn, item in shard.items:
+        manifest._resources[urn] = (
+            item if item is not None else ResourcePointer(name=urn.fqn.name, resource_type=urn.resource_type)
+        )
+    state = dict(shard.state)
+    _fetch_manifest_state(session, manifest, state, session_ctx)
+    _check_refs_exist(session, shard.refs)
+    return state, list(diff(state, manifest))
 
-    # Put all nodes with 0 in-degree in a queue
-    queue: Queue = Queue()
-    for node, in_degree in in_degrees.items():
-        if in_degree == 0:
-            queue.put(node)
 
-    # Create an empty node list
-    nodes = []
+# Each worker process opens one connection and plans every shard it is given with it
+_SHARD_SESSION = None
 
-    while not queue.empty():
-        node = queue.get()
-        nodes.append(node)
 
-        # For each of node's outgoing edges
-        empty_neighbors = set()
-        for edge in outgoing_edges[node]:
-            in_degrees[edge] -= 1
-            if in_degrees[edge] == 0:
-                queue.put(edge)
-                empty_neighbors.add(edge)
+def _init_shard_worker(connection_factory: Callable[[], Any]):
+    global _SHARD_SESSION
+    _SHARD_SESSION = connection_factory()
+    multiprocessing.util.Finalize(None, _SHARD_SESSION.close, exitpriority=10)
+    data_provider.use_secondary_roles(_SHARD_SESSION, all=True)
 
-        # Remove edges to empty neighbors
-        outgoing_edges[node].difference_update(empty_neighbors)
-    nodes.reverse()
-    if len(nodes) != len(resource_set):
-        raise NotADAGException("Graph is not a DAG")
-    return {value: index for index, value in enumerate(nodes)}
+
+def _plan_shard_in_worker(shard: _Shard, session_ctx: SessionContext) -> tuple[State, list[ResourceChange]]:
+    return _plan_shard(_SHARD_SESSION, shard, session_ctx)
+
+
+def _order_changes(changes: Iterable[ResourceChange], remote_state: State, manifest: Manifest) -> Plan:
+    additive_changes: list[ResourceChange] = []
+    destructive_changes: list[ResourceChange] = []
+
+    for resource_change in changes:
+        if isinstance(resource_change, (CreateResource, UpdateResource, TransferOwnership)):
+            additive_changes.append(resource_change)
+        elif isinstance(resource_change, DropResource):
+            destructive_changes.append(resource_change)
+
+    # Generate a list of all URNs
+    resource_set = set(manifest.urns + list(remote_state.keys()))
+    for ref in manifest.refs:
+        resource_set.add(ref[0])
+        resource_set.add(ref[1])
+    # Calculate a topological sort order for the URNs
+    sort_order = topological_sort(resource_set, set(manifest.refs))
+    plan = sorted(additive_changes, key=lambda change: sort_order[change.urn]) + _sort_destructive_changes(
+        destructive_changes, sort_order
+    )
+    return plan
+
+
+def _diff_resource_data(lhs: dict, rhs: dict) -> dict:
+
+    if not isinstance(lhs, dict) or not isinstance(rhs, dict):
+        raise TypeError("diff_resources requires two dictionaries")
+
+    delta = {}
+    for field_name in lhs.keys():
+        lhs_value = lhs[field_name]
+        rhs_value = rhs[field_name]
+        if lhs_value != rhs_value:
+            delta[field_name] = rhs_value
+    return delta
 
 
 def diff(remote_state: State, manifest: Manifest):
@@ -1312,19 +1500,6 @@ def diff(remote_state: State, manifest: Manifest):
 
         return (container_urn, container_owner)
 
-    def _diff_resource_data(lhs: dict, rhs: dict) -> dict:
-
-        if not isinstance(lhs, dict) or not isinstance(rhs, dict):
-            raise TypeError("diff_resources requires two dictionaries")
-
-        delta = {}
-        for field_name in lhs.keys():
-            lhs_value = lhs[field_name]
-            rhs_value = rhs[field_name]
-            if lhs_value != rhs_value:
-                delta[field_name] = rhs_value
-        return delta
-
     state_urns = set(remote_state.keys())
     manifest_urns = set(manifest.urns)
 
@@ -1360,6 +1535,10 @@ def diff(remote_state: State, manifest: Manifest):
         if isinstance(manifest_item, ResourcePointer):
             continue
 
+        # Most resources are unchanged between runs, skip those without comparing field by field
+        if remote_state[urn] == manifest_item.data:
+            continue
+
         delta = _diff_resource_data(remote_state[urn], manifest_item.data)
         owner_attr = delta.pop("owner", None)
 
@@ -1,21 +1,14 @@
 import json
+import sys
 from typing import Any
 
 import click
 import yaml
 
-from snowbytes.blueprint import dump_plan
 from snowbytes.enums import RunMode, BlueprintScope
-from snowbytes.gitops import (
-    collect_configs_from_path,
-    collect_vars_from_environment,
-    merge_configs,
-    merge_vars,
-    parse_resources,
-)
-from snowbytes.operations.blueprint import blueprint_apply, blueprint_apply_plan, blueprint_plan
-from snowbytes.operations.connector import connect, get_env_vars
-from snowbytes.operations.export import export_resources
+
+# Commands import the rest of snowbytes when they run. Importing blueprints, resources and the Snowflake
+# connector takes most of a second, which `snowbytes --help` shouldn't have to pay for.
 
 
 class RunModeParamType(click.ParamType):
@@ -46,6 +39,8 @@ class CommaSeparatedListParamType(click.ParamType):
     name = "comma_separated_list"
 
     def convert(self, value, param, ctx):
+        from snowbytes.gitops import parse_resources
+
         return parse_resources(value)
 
 
@@ -55,6 +50,17 @@ def load_plan(plan_file):
     return plan
 
 
+def run_profiles(yaml_config, cli_config, profiles_path, out_dir, account_workers, apply):
+    from snowbytes.operations.multi_account import format_summary, load_profiles, run_accounts
+
+    profiles = load_profiles(profiles_path)
+    results = run_accounts(yaml_config, cli_config, profiles, out_dir=out_dir, apply=apply, workers=account_workers)
+    click.echo(format_summary(results))
+    failed = [result.profile for result in results if not result.ok]
+    if failed:
+        raise click.ClickException(f"{len(failed)} of {len(results)} accounts failed: {', '.join(failed)}")
+
+
 @click.group()
 def snowbytes_cli():
     """snowbytes helps you manage your Snowflake environment."""
@@ -130,6 +136,45 @@ def schema_option():
     )
 
 
+def profiles_option():
+    return click.option(
+        "--profiles",
+        "profiles_path",
+        type=click.Path(exists=True, dir_okay=False),
+        help="Path to a YAML file of connection profiles. The config is run on every account in it.",
+        metavar="<file>",
+    )
+
+
+def out_dir_option():
+    return click.option(
+        "--out-dir",
+        type=str,
+        help="Directory to write a plan file per account and a summary to, used with --profiles",
+        metavar="<dir>",
+    )
+
+
+def account_workers_option():
+    return click.option(
+        "--account-workers",
+        type=click.IntRange(min=1),
+        default=4,
+        show_default=True,
+        help="Number of accounts to run at once, each in its own process, used with --profiles",
+    )
+
+
+def cache_dir_option():
+    return click.option(
+        "--cache-dir",
+        type=str,
+        envvar="SNOWBYTES_CACHE_DIR",
+        help="Directory to cache parsed config files and resources in, so unchanged configs aren't reprocessed",
+        metavar="<dir>",
+    )
+
+
 @snowbytes_cli.command("plan", no_args_is_help=True)
 @config_path_option()
 @click.option("--json", "json_output", is_flag=True, help="Output plan in machine-readable JSON format")
@@ -140,16 +185,70 @@ def schema_option():
 @scope_option()
 @database_option()
 @schema_option()
-def plan(config_path, json_output, output_file, vars: dict, allowlist, run_mode, scope, database, schema):
-    """Compare a resource config to the current state of Snowflake"""
+@cache_dir_option()
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of processes to fetch and diff databases in, each with its own Snowflake connection",
+)
+@click.option(
+    "--no-plan-cache",
+    is_flag=True,
+    help=(
+        "Always fetch the remote state. Otherwise plans of configs with only roles, tags and grants are cached in "
+        "--cache-dir, and reused while the config and account state are unchanged"
+    ),
+)
+@profiles_option()
+@out_dir_option()
+@account_workers_option()
+def plan(
+    config_path,
+    json_output,
+    output_file,
+    vars: dict,
+    allowlist,
+    run_mode,
+    scope,
+    database,
+    schema,
+    cache_dir,
+    workers,
+    no_plan_cache,
+    profiles_path,
+    out_dir,
+    account_workers,
+):
+    """
+    Compare a resource config to the current state of Snowflake
+
+    \b
+    # Plan the same config on every account in a profiles file
+    snowbytes plan --config=baseline.yml --profiles=accounts.yml --out-dir=plans
+    """
+    from snowbytes.blueprint import dump_plan
+    from snowbytes.config_cache import ConfigCache
+    from snowbytes.gitops import (
+        collect_configs_from_path,
+        collect_vars_from_environment,
+        merge_all_configs,
+        merge_vars,
+    )
+    from snowbytes.operations.blueprint import blueprint_plan
 
     if not config_path:
         raise click.UsageError("--config is required")
+    if profiles_path:
+        if not out_dir:
+            raise click.UsageError("--out-dir is required with --profiles")
+        if json_output or output_file or workers > 1:
+            raise click.UsageError("--json, --out and --workers can't be used with --profiles")
 
-    yaml_config: dict[str, Any] = {}
-    configs = collect_configs_from_path(config_path)
-    for config in configs:
-        yaml_config = merge_configs(yaml_config, config[1])
+    cache = ConfigCache(cache_dir) if cache_dir else None
+    configs = collect_configs_from_path(config_path, cache=cache)
+    yaml_config: dict[str, Any] = merge_all_configs(config for _, config in configs)
 
     cli_config: dict[str, Any] = {}
     if vars:
@@ -169,7 +268,17 @@ def plan(config_path, json_output, output_file, vars: dict, allowlist, run_mode,
     if env_vars:
         cli_config["vars"] = merge_vars(cli_config.get("vars", {}), env_vars)
 
-    plan_obj = blueprint_plan(yaml_config, cli_config)
+    if profiles_path:
+        if cache:
+            cache.save()
+        run_profiles(yaml_config, cli_config, profiles_path, out_dir, account_workers, apply=False)
+        return
+
+    try:
+        plan_obj = blueprint_plan(yaml_config, cli_config, cache, workers=workers, use_plan_cache=not no_plan_cache)
+    finally:
+        if cache:
+            cache.save()
     if output_file:
         with open(output_file, "w") as f:
             f.write(dump_plan(plan_obj, format="json"))
@@ -192,13 +301,41 @@ def plan(config_path, json_output, output_file, vars: dict, allowlist, run_mode,
 @database_option()
 @schema_option()
 @click.option("--dry-run", is_flag=True, help="When dry run is true, Snowbytes will not make any changes to Snowflake")
-def apply(config_path, plan_file, vars, allowlist, run_mode, scope, database, schema, dry_run):
-    """Apply a resource config to a Snowflake account"""
+@cache_dir_option()
+@profiles_option()
+@out_dir_option()
+@account_workers_option()
+def apply(
+    config_path,
+    plan_file,
+    vars,
+    allowlist,
+    run_mode,
+    scope,
+    database,
+    schema,
+    dry_run,
+    cache_dir,
+    profiles_path,
+    out_dir,
+    account_workers,
+):
+    """Apply a resource config to a Snowflake account, or to every account in a profiles file"""
+    from snowbytes.config_cache import ConfigCache
+    from snowbytes.gitops import (
+        collect_configs_from_path,
+        collect_vars_from_environment,
+        merge_all_configs,
+        merge_vars,
+    )
+    from snowbytes.operations.blueprint import blueprint_apply, blueprint_apply_plan
 
     if config_path and plan_file:
         raise click.UsageError("Cannot specify both --config and --plan.")
     if not config_path and not plan_file:
         raise click.UsageError("Either --config or --plan must be specified.")
+    if profiles_path and plan_file:
+        raise click.UsageError("--profiles needs --config, since every account gets its own plan.")
 
     cli_config: dict[str, Any] = {}
     if vars:
@@ -221,11 +358,19 @@ def apply(config_path, plan_file, vars, allowlist, run_mode, scope, database, sc
         cli_config["vars"] = merge_vars(cli_config.get("vars", {}), env_vars)
 
     if config_path:
-        yaml_config: dict[str, Any] = {}
-        configs = collect_configs_from_path(config_path)
-        for config in configs:
-            yaml_config = merge_configs(yaml_config, config[1])
-        blueprint_apply(yaml_config, cli_config)
+        cache = ConfigCache(cache_dir) if cache_dir else None
+        configs = collect_configs_from_path(config_path, cache=cache)
+        yaml_config: dict[str, Any] = merge_all_configs(config for _, config in configs)
+        if profiles_path:
+            if cache:
+                cache.save()
+            run_profiles(yaml_config, cli_config, profiles_path, out_dir, account_workers, apply=True)
+            return
+        try:
+            blueprint_apply(yaml_config, cli_config, cache)
+        finally:
+            if cache:
+                cache.save()
     elif plan_file:
         plan_obj = load_plan(plan_file)
         blueprint_apply_plan(plan_obj, cli_config)
@@ -250,12 +395,18 @@ def apply(config_path, plan_file, vars, allowlist, run_mode, scope, database, sc
     metavar="<resource_types>",
 )
 @click.option("--out", type=str, help="Write exported config to a file", metavar="<filename>")
-@click.option("--format", type=click.Choice(["json", "yml"]), default="yml", help="Output format")
-def export(resources, export_all, exclude_resources, out, format):
+@click.option("--format", type=click.Choice(["json", "ndjson", "yml"]), default="yml", help="Output format")
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of Snowflake connections to fetch resources with in parallel",
+)
+def export(resources, export_all, exclude_resources, out, format, workers):
     """
     Generate a resource config for existing Snowflake resources
 
-    This command allows you to export resources from Snowflake in either JSON or YAML format.
+    This command allows you to export resources from Snowflake in JSON, newline-delimited JSON or YAML format.
     You can specify the type of resource to export and the output filename for the exported data.
 
     Resource types are specified with snake case (eg. Warehouse => warehouse, NetworkRule => network_rule, etc.).
@@ -274,26 +425,58 @@ def export(resources, export_all, exclude_resources, out, format):
     \b
     # Export all resources except for users and roles
     snowbytes export --all --exclude=user,role --out=snowbytes.yml
+
+    \b
+    # Export all resources over 8 connections
+    snowbytes export --all --workers=8 --out=snowbytes.yml
     """
+    from snowbytes.operations.export import iter_export_resources, write_export
 
     if resources and export_all:
         raise click.UsageError("You can't specify both --resource and --all options at the same time.")
 
-    resource_config: dict[str, Any] = {}
     if resources:
-        resource_config = export_resources(include=resources)
+        blocks = iter_export_resources(include=resources, workers=workers)
     elif export_all:
-        resource_config = export_resources(exclude=exclude_resources)
+        blocks = iter_export_resources(exclude=exclude_resources, workers=workers)
     else:
         raise
 
-    output = None
+    # Resources are written as they are fetched, so large accounts don't have to fit in memory
+    if out:
+        with open(out, "w") as f:
+            write_export(blocks, f, format)
+    else:
+        write_export(blocks, sys.stdout, format)
+
+
+@snowbytes_cli.command("ingest", context_settings={"show_default": True}, no_args_is_help=True)
+@click.argument("sql_files", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--out", type=str, help="Write the resource config to a file", metavar="<filename>")
+@click.option("--format", type=click.Choice(["json", "yml"]), default="yml", help="Output format")
+@click.option("--workers", type=int, help="Number of processes to parse statements with. Defaults to the CPU count.")
+def ingest(sql_files, out, format, workers):
+    """
+    Generate a resource config from SQL files of CREATE statements
+
+    Use this to onboard an existing account from the output of GET_DDL. Statements that can't be parsed
+    are reported and skipped.
+
+    Examples:
+
+    \b
+    # Convert a database DDL dump to a resource config
+    snowbytes ingest analytics_ddl.sql --out=analytics.yml
+    """
+    from snowbytes.operations.ingest import ingest_sql_files
+
+    result = ingest_sql_files(sql_files, workers=workers)
+    resource_config = result.to_config()
+
     if format == "json":
         output = json.dumps(resource_config, indent=2)
-    elif format == "yml":
-        output = yaml.dump(resource_config, sort_keys=False)
     else:
-        raise ValueError(f"Unsupported format: {format}")
+        output = yaml.dump(resource_config, sort_keys=False)
 
     if out:
         with open(out, "w") as f:
@@ -301,10 +484,53 @@ def export(resources, export_all, exclude_resources, out, format):
     else:
         print(output)
 
+    if result.failures:
+        click.echo(
+            f"Parsed {len(result.resources)} statements, failed to parse {len(result.failures)}",
+            err=True,
+        )
+
+
+@snowbytes_cli.command("serve", context_settings={"show_default": True})
+@click.option("--host", default="127.0.0.1", help="Address to listen on")
+@click.option("--port", default=8765, type=int, help="Port to listen on")
+@click.option(
+    "--refresh-interval",
+    default=300.0,
+    type=click.FloatRange(min=0),
+    help="Seconds between refreshes of cached account state, or 0 to only refresh on request",
+)
+def serve(host, port, refresh_interval):
+    """
+    Answer plan requests over HTTP, keeping the Snowflake connection and fetched state warm between them
+
+    \b
+    # Plan a config against the account the server is connected to
+    curl -X POST localhost:8765/plan -d '{"config": {"roles": [{"name": "ANALYST"}]}}'
+
+    \b
+    # Refresh cached state now, and check on the server
+    curl -X POST localhost:8765/refresh
+    curl localhost:8765/status
+    """
+    from snowbytes.server import PlanHTTPServer, PlanServer
+
+    with PlanServer(refresh_interval=refresh_interval or None) as plan_server:
+        http_server = PlanHTTPServer(plan_server, host, port)
+        click.echo(f"Serving plans for {plan_server.session_ctx['account']} on http://{host}:{port}")
+        try:
+            http_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            http_server.server_close()
+
 
 @snowbytes_cli.command("connect")
 def cli_connect():
     """Test the connection to Snowflake"""
+    from snowbytes.operations.connector import connect, get_env_vars
+
     env_vars = get_env_vars()
     if not env_vars:
         raise click.UsageError("No environment variables found. Please set the environment variables and try again.")
@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger("snowbytes")
+
+PICKLE_PROTOCOL = 4
+
+
+def _code_fingerprint() -> str:
+    """
+    Identifies the code that produced a cache entry. Pickled resources are only valid for the exact
+    snowbytes source that built them, so this covers the package version, the Python version, and the
+    size and modification time of every module in the package.
+    """
+    try:
+        snowbytes_version = version("snowbytes")
+    except PackageNotFoundError:
+        snowbytes_version = "unknown"
+    digest = hashlib.sha256(f"{snowbytes_version}:{sys.version_info[:2]}:{PICKLE_PROTOCOL}".encode())
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for root, dirs, files in os.walk(package_dir):
+        dirs.sort()
+        for file in sorted(files):
+            if file.endswith(".py"):
+                stat = os.stat(os.path.join(root, file))
+                rel_path = os.path.relpath(os.path.join(root, file), package_dir)
+                digest.update(f"{rel_path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+def content_digest(*parts: Any) -> str:
+    """
+    Digest of arbitrary picklable values. Equal digests always mean equal values. Equal values
+    usually, but not always, produce equal digests, which only costs a cache miss.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, bytes):
+            digest.update(part)
+        else:
+            digest.update(pickle.dumps(part, protocol=PICKLE_PROTOCOL))
+    return digest.hexdigest()
+
+
+class ConfigCache:
+    """
+    On-disk cache of parsed config files and of the resources built from config entries.
+
+    Entries are keyed by content digests: config files by the digest of their bytes, resources by the
+    digest of the config entry they were built from, plus the value of any var the entry reads. The
+    whole cache is scoped to the current snowbytes code, so upgrading or editing snowbytes starts a fresh
+    cache. Values are stored pickled and unpickled on every hit, so callers always get fresh objects that
+    they are free to modify.
+
+    Call save() to write the cache back to disk. Only entries that were used since the cache was loaded
+    are kept, so the cache doesn't grow without bound as configs change.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, f"config-cache-{_code_fingerprint()}.pickle")
+        self._entries: dict[str, bytes] = self._load()
+        self._used: set[str] = set()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> dict[str, bytes]:
+        try:
+            with open(self.path, "rb") as f:
+                entries = pickle.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception:
+            logger.warning(f"Ignoring unreadable config cache: {self.path}")
+            return {}
+        if not isinstance(entries, dict):
+            logger.warning(f"Ignoring unreadable config cache: {self.path}")
+            return {}
+        return entries
+
+    def get(self, key: str, build: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, or call build() and cache its result.
+        """
+        self._used.add(key)
+        if key in self._entries:
+            self.hits += 1
+            return pickle.loads(self._entries[key])
+        self.misses += 1
+        value = build()
+        self.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any):
+        self._used.add(key)
+        self._entries[key] = pickle.dumps(value, protocol=PICKLE_PROTOCOL)
+        self._dirty = True
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def save(self, path: Optional[str] = None):
+        path = path or self.path
+        entries = {key: value for key, value in self._entries.items() if key in self._used}
+        if not self._dirty and len(entries) == len(self._entries):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so that concurrent runs never read a partial cache
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entries, f, protocol=PICKLE_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._entries = entries
+        self._dirty = False
@@ -2,8 +2,9 @@ import datetime
 import json
 import logging
 import sys
-from functools import cache
-from typing import Any, Optional, TypedDict, Union
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache, partial
+from typing import Any, Callable, Iterable, Optional, TypedDict, TypeVar, Union
 
 import pytz
 from inflection import pluralize
@@ -22,6 +23,7 @@ from .client import (
     OBJECT_DOES_NOT_EXIST_ERR,
     UNSUPPORTED_FEATURE,
     execute,
+    reset_cache,
 )
 from .enums import AccountEdition, ResourceType, WarehouseSize
 from .identifiers import FQN, URN, parse_FQN, resource_type_for_label
@@ -43,6 +45,12 @@ __this__ = sys.modules[__name__]
 
 logger = logging.getLogger("snowbytes")
 
+# Listings that run one SHOW statement per role or per database run up to this many at once. Each statement
+# gets its own cursor on the session, and the connector allows cursors to be used from separate threads.
+SHOW_FAN_OUT_WORKERS = 8
+
+T = TypeVar("T")
+
 
 class SessionContext(TypedDict):
     account_edition: AccountEdition
@@ -590,6 +598,70 @@ def _show_future_grants_to_role(
     return grants
 
 
+def _fan_out_show(
+    session: SnowflakeConnection,
+    items: list[T],
+    show: Callable[[SnowflakeConnection, T], list[dict[str, Any]]],
+) -> list[tuple[T, list[dict[str, Any]]]]:
+    """
+    Run a SHOW statement for each item, concurrently, and return (item, rows) pairs in the order of items.
+    Items whose object was dropped while listing (DOES_NOT_EXIST_ERR) are left out. Any other error is
+    raised once the items before it have finished, and items that haven't started yet are cancelled.
+    """
+
+    def _show(item: T) -> Optional[list[dict[str, Any]]]:
+        try:
+            return show(session, item)
+        except ProgrammingError as err:
+            if err.errno == DOES_NOT_EXIST_ERR:
+                return None
+            raise
+
+    results: Iterable[Optional[list[dict[str, Any]]]]
+    if SHOW_FAN_OUT_WORKERS <= 1 or len(items) <= 1:
+        results = map(_show, items)
+        return [(item, rows) for item, rows in zip(items, results) if rows is not None]
+
+    executor = ThreadPoolExecutor(max_workers=SHOW_FAN_OUT_WORKERS, thread_name_prefix="snowbytes-show")
+    try:
+        futures = [executor.submit(_show, item) for item in items]
+        results = [future.result() for future in futures]
+    finally:
+        executor.shutdown(cancel_futures=True)
+    return [(item, rows) for item, rows in zip(items, results) if rows is not None]
+
+
+def _list_role_names(session: SnowflakeConnection) -> list[ResourceName]:
+    roles = []
+    for role in execute(session, "SHOW ROLES"):
+        role_name = resource_name_from_snowflake_metadata(role["name"])
+        if role_name in SYSTEM_ROLES:
+            continue
+        roles.append(role_name)
+    return roles
+
+
+def _show_database_roles(session: SnowflakeConnection, database_name: ResourceName) -> list[dict[str, Any]]:
+    # A rare case where we need to always quote the identifier. Snowflake chokes if the database name
+    # is DATABASE, but this will work if quoted
+    if database_name == "DATABASE":
+        database_name._quoted = True
+    return execute(session, f"SHOW DATABASE ROLES IN DATABASE {database_name}")
+
+
+def _show_grants_of_role(
+    session: SnowflakeConnection, role: ResourceName, cacheable: bool = False
+) -> list[dict[str, Any]]:
+    return execute(session, f"SHOW GRANTS OF ROLE {role}", cacheable=cacheable)
+
+
+def _show_grants_of_database_role(
+    session: SnowflakeConnection, database_role: tuple[ResourceName, str], cacheable: bool = False
+) -> list[dict[str, Any]]:
+    database_name, role_name = database_role
+    return execute(session, f"SHOW GRANTS OF DATABASE ROLE {database_name}.{role_name}", cacheable=cacheable)
+
+
 def use_secondary_roles(session: SnowflakeConnection, all: bool = False):
     """
     Set the secondary roles for the current session.
@@ -673,6 +745,19 @@ def fetch_session(session: SnowflakeConnection) -> SessionContext:
     }
 
 
+def reset_session_caches():
+    """
+    Forget the session context, query results, grant indexes and parsed DDL cached by earlier calls. They are
+    keyed by session, role or list identity rather than by account, so a process that moves on to another
+    account must reset them first.
+    """
+    reset_cache()
+    fetch_session.cache_clear()
+    _INDEX.clear()
+    _parse_dynamic_table_text.cache_clear()
+    parse_view_ddl.cache_clear()
+
+
 def fetch_role_privileges(
     session: SnowflakeConnection, roles: list[ResourceName], cacheable: bool = True
 ) -> dict[ResourceName, list[GrantedPrivilege]]:
@@ -950,8 +1035,10 @@ def fetch_database_role_grant(session: SnowflakeConnection, fqn: FQN):
     if len(role_grants) > 1:
         raise Exception(f"Found multiple database role grants matching {fqn}")
 
-    data = show_result[0]
+    return _database_role_grant_data(role_grants[0])
 
+
+def _database_role_grant_data(data: dict) -> dict:
     to_role = None
     to_database_role = None
     if data["granted_to"] == "ROLE":
@@ -1240,8 +1327,10 @@ def fetch_future_grant(session: SnowflakeConnection, fqn: FQN):
     elif len(grants) > 1:
         raise Exception(f"Found multiple future grants matching {fqn}")
 
-    data = grants[0]
+    return _future_grant_data(grants[0], collection, to)
+
 
+def _future_grant_data(data: dict, collection: dict, to: str) -> dict:
     return {
         "priv": data["privilege"],
         "on_type": str(resource_type_for_label(data["grant_on"])),
@@ -1298,9 +1387,13 @@ def fetch_grant(session: SnowflakeConnection, fqn: FQN):
     #     # handled in the future.
     #     raise Exception(f"Found multiple grants matching {fqn}")
 
+    return _grant_data(data, priv, privs, to)
+
+
+def _grant_data(data: dict, priv: str, privs: list[str], to: str) -> dict:
     return {
         "priv": priv,
-        "on": "ACCOUNT" if on_type == "ACCOUNT" else data["name"],
+        "on": "ACCOUNT" if data["granted_on"] == "ACCOUNT" else data["name"],
         "on_type": data["granted_on"].replace("_", " "),
         "to": to,
         "to_type": resource_type_for_label(data["granted_to"]),
@@ -1658,24 +1751,28 @@ def fetch_role_grant(session: SnowflakeConnection, fqn: FQN):
             resource_name_from_snowflake_metadata(data["granted_to"]) == subject
             and resource_name_from_snowflake_metadata(data["grantee_name"]) == name
         ):
-            if data["granted_to"] == "ROLE":
-                return {
-                    "role": fqn.name,
-                    "to_role": _quote_snowflake_identifier(data["grantee_name"]),
-                    # "owner": data["granted_by"],
-                }
-            elif data["granted_to"] == "USER":
-                return {
-                    "role": fqn.name,
-                    "to_user": _quote_snowflake_identifier(data["grantee_name"]),
-                    # "owner": data["granted_by"],
-                }
-            else:
-                raise Exception(f"Unexpected role grant for role {fqn.name}")
+            return _role_grant_data(data, fqn.name)
 
     return None
 
 
+def _role_grant_data(data: dict, role: ResourceName) -> dict:
+    if data["granted_to"] == "ROLE":
+        return {
+            "role": role,
+            "to_role": _quote_snowflake_identifier(data["grantee_name"]),
+            # "owner": data["granted_by"],
+        }
+    elif data["granted_to"] == "USER":
+        return {
+            "role": role,
+            "to_user": _quote_snowflake_identifier(data["grantee_name"]),
+            # "owner": data["granted_by"],
+        }
+    else:
+        raise Exception(f"Unexpected role grant for role {role}")
+
+
 def fetch_scanner_package(session: SnowflakeConnection, fqn: FQN):
     scanner_packages = execute(
         session,
@@ -2405,6 +2502,18 @@ def list_resource(session: SnowflakeConnection, resource_label: str) -> list[FQN
     return getattr(__this__, f"list_{pluralize(resource_label)}")(session)
 
 
+def has_hydrated_list(resource_label: str) -> bool:
+    return hasattr(__this__, f"list_hydrated_{pluralize(resource_label)}")
+
+
+def list_hydrated_resource(session: SnowflakeConnection, resource_label: str) -> list[tuple[FQN, dict]]:
+    """
+    List resources together with the data fetch_resource would return for each of them. Only available for
+    resource types where has_hydrated_list is true, whose SHOW listings already contain every field.
+    """
+    return getattr(__this__, f"list_hydrated_{pluralize(resource_label)}")(session)
+
+
 def list_account_scoped_resource(session: SnowflakeConnection, resource) -> list[FQN]:
     show_result = execute(session, f"SHOW {resource}")
     resources = []
@@ -2495,17 +2604,7 @@ def list_database_roles(session: SnowflakeConnection, database=None) -> list[FQN
         databases = _list_databases(session)
 
     roles = []
-    for database_name in databases:
-        try:
-            # A rare case where we need to always quote the identifier. Snowflake chokes if the database name
-            # is DATABASE, but this will work if quoted
-            if database_name == "DATABASE":
-                database_name._quoted = True
-            database_roles = execute(session, f"SHOW DATABASE ROLES IN DATABASE {database_name}")
-        except ProgrammingError as err:
-            if err.errno == DOES_NOT_EXIST_ERR:
-                continue
-            raise
+    for database_name, database_roles in _fan_out_show(session, databases, _show_database_roles):
         for role in database_roles:
             roles.append(
                 FQN(
@@ -2517,36 +2616,43 @@ def list_database_roles(session: SnowflakeConnection, database=None) -> list[FQN
 
 
 def list_database_role_grants(session: SnowflakeConnection, database=None) -> list[FQN]:
+    return [fqn for fqn, _ in _list_database_role_grant_rows(session, database)]
+
+
+def list_hydrated_database_role_grants(session: SnowflakeConnection, database=None) -> list[tuple[FQN, dict]]:
+    return [
+        (fqn, _database_role_grant_data(data))
+        for fqn, data in _list_database_role_grant_rows(session, database, cacheable=True)
+    ]
+
+
+def _list_database_role_grant_rows(
+    session: SnowflakeConnection, database=None, cacheable: bool = False
+) -> list[tuple[FQN, dict]]:
     databases: list[ResourceName]
     if database:
         databases = [ResourceName(database)]
     else:
         databases = _list_databases(session)
 
+    database_roles = [
+        (database_name, role["name"])
+        for database_name, roles in _fan_out_show(session, databases, _show_database_roles)
+        for role in roles
+    ]
+    show_grants = partial(_show_grants_of_database_role, cacheable=cacheable)
+
     role_grants = []
-    for database_name in databases:
-        try:
-            # A rare case where we need to always quote the identifier. Snowflake chokes if the database name
-            # is DATABASE, but this will work if quoted
-            if database_name == "DATABASE":
-                database_name._quoted = True
-            database_roles = execute(session, f"SHOW DATABASE ROLES IN DATABASE {database_name}")
-        except ProgrammingError as err:
-            if err.errno == DOES_NOT_EXIST_ERR:
-                continue
-            raise
-        for role in database_roles:
-            show_result = execute(session, f"SHOW GRANTS OF DATABASE ROLE {database_name}.{role['name']}")
-            for data in show_result:
-                subject = "role" if data["granted_to"] == "ROLE" else "database_role"
-                database, name = data["role"].split(".")
-                role_grants.append(
-                    FQN(
-                        name=resource_name_from_snowflake_metadata(name),
-                        database=resource_name_from_snowflake_metadata(database),
-                        params={subject: data["grantee_name"]},
-                    )
-                )
+    for _, show_result in _fan_out_show(session, database_roles, show_grants):
+        for data in show_result:
+            subject = "role" if data["granted_to"] == "ROLE" else "database_role"
+            database, name = data["role"].split(".")
+            fqn = FQN(
+                name=resource_name_from_snowflake_metadata(name),
+                database=resource_name_from_snowflake_metadata(database),
+                params={subject: data["grantee_name"]},
+            )
+            role_grants.append((fqn, data))
     return role_grants
 
 
@@ -2559,27 +2665,36 @@ def list_external_volumes(session: SnowflakeConnection) -> list[FQN]:
 
 
 def list_future_grants(session: SnowflakeConnection) -> list[FQN]:
-    roles = execute(session, "SHOW ROLES")
+    return [fqn for fqn, _, _ in _list_future_grant_rows(session)]
+
+
+def list_hydrated_future_grants(session: SnowflakeConnection) -> list[tuple[FQN, dict]]:
+    return [
+        (fqn, _future_grant_data(data, parse_collection_string(data["name"]), str(role_name)))
+        for fqn, data, role_name in _list_future_grant_rows(session, cacheable=True)
+    ]
+
+
+def _list_future_grant_rows(
+    session: SnowflakeConnection, cacheable: bool = False
+) -> list[tuple[FQN, dict, ResourceName]]:
+    roles = _list_role_names(session)
     grants = []
-    for role in roles:
-        role_name = resource_name_from_snowflake_metadata(role["name"])
-        if role_name in SYSTEM_ROLES:
-            continue
-        grant_data = _show_future_grants_to_role(session, role_name)
+    show_grants = partial(_show_future_grants_to_role, cacheable=cacheable)
+    for role_name, grant_data in _fan_out_show(session, roles, show_grants):
         for data in grant_data:
             in_type = "database" if data["grant_on"] == "SCHEMA" else "schema"
             collection = data["name"]
             to = f"role/{role_name}"
-            grants.append(
-                FQN(
-                    name=ResourceName("FUTURE_GRANT"),
-                    params={
-                        "priv": data["privilege"],
-                        "on": f"{in_type}/{collection}",
-                        "to": to,
-                    },
-                )
+            fqn = FQN(
+                name=ResourceName("FUTURE_GRANT"),
+                params={
+                    "priv": data["privilege"],
+                    "on": f"{in_type}/{collection}",
+                    "to": to,
+                },
             )
+            grants.append((fqn, data, role_name))
     return grants
 
 
@@ -2597,13 +2712,23 @@ def list_functions(session: SnowflakeConnection) -> list[FQN]:
 
 
 def list_grants(session: SnowflakeConnection) -> list[FQN]:
-    roles = execute(session, "SHOW ROLES")
+    return [fqn for fqn, _, _ in _list_grant_rows(session)]
+
+
+def list_hydrated_grants(session: SnowflakeConnection) -> list[tuple[FQN, dict]]:
+    return [
+        (fqn, _grant_data(data, fqn.params["priv"], [fqn.params["priv"]], str(role_name)))
+        for fqn, data, role_name in _list_grant_rows(session, cacheable=True)
+    ]
+
+
+def _list_grant_rows(session: SnowflakeConnection, cacheable: bool = False) -> list[tuple[FQN, dict, ResourceName]]:
+    roles = _list_role_names(session)
     grants = []
-    for role in roles:
-        role_name = resource_name_from_snowflake_metadata(role["name"])
-        if role_name in SYSTEM_ROLES:
-            continue
-        grant_data = _show_grants_to_role(session, role_name, role_type=ResourceType.ROLE, cacheable=False)
+    show_grants = partial(_show_grants_to_role, role_type=ResourceType.ROLE, cacheable=cacheable)
+    for role_name, grant_data in _fan_out_show(session, roles, show_grants):
+        # Like fetch_grant, describe each grant with the first row that matches it
+        first_rows: dict[tuple[str, str, str], dict] = {}
         for data in grant_data:
             if data["granted_on"] == "ROLE":
                 continue
@@ -2621,16 +2746,16 @@ def list_grants(session: SnowflakeConnection) -> list[FQN]:
                 name = "ACCOUNT"
             on = f"{data['granted_on'].lower()}/{name}"
             to = f"role/{role_name}"
-            grants.append(
-                FQN(
-                    name=ResourceName("GRANT"),
-                    params={
-                        "priv": data["privilege"],
-                        "on": on,
-                        "to": to,
-                    },
-                )
+            fqn = FQN(
+                name=ResourceName("GRANT"),
+                params={
+                    "priv": data["privilege"],
+                    "on": on,
+                    "to": to,
+                },
             )
+            first_row = first_rows.setdefault((data["granted_on"], data["privilege"], name), data)
+            grants.append((fqn, first_row, role_name))
     return grants
 
 
@@ -2672,21 +2797,21 @@ def list_roles(session: SnowflakeConnection) -> list[FQN]:
 
 
 def list_role_grants(session: SnowflakeConnection) -> list[FQN]:
-    roles = execute(session, "SHOW ROLES")
+    return [fqn for fqn, _ in _list_role_grant_rows(session)]
+
+
+def list_hydrated_role_grants(session: SnowflakeConnection) -> list[tuple[FQN, dict]]:
+    return [(fqn, _role_grant_data(data, fqn.name)) for fqn, data in _list_role_grant_rows(session, cacheable=True)]
+
+
+def _list_role_grant_rows(session: SnowflakeConnection, cacheable: bool = False) -> list[tuple[FQN, dict]]:
+    roles = _list_role_names(session)
     grants = []
-    for role in roles:
-        role_name = resource_name_from_snowflake_metadata(role["name"])
-        if role_name in SYSTEM_ROLES:
-            continue
-        try:
-            show_result = execute(session, f"SHOW GRANTS OF ROLE {role_name}")
-        except ProgrammingError as err:
-            if err.errno == DOES_NOT_EXIST_ERR:
-                continue
-            raise
+    show_grants = partial(_show_grants_of_role, cacheable=cacheable)
+    for role_name, show_result in _fan_out_show(session, roles, show_grants):
         for data in show_result:
             subject = "user" if data["granted_to"] == "USER" else "role"
-            grants.append(FQN(name=role_name, params={subject: data["grantee_name"]}))
+            grants.append((FQN(name=role_name, params={subject: data["grantee_name"]}), data))
     return grants
 
 
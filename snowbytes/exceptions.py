@@ -1,3 +1,6 @@
+from typing import Optional
+
+
 class MissingVarException(Exception):
     pass
 
@@ -51,4 +54,10 @@ class ResourceHasContainerException(Exception):
 
 
 class NotADAGException(Exception):
+    def __init__(self, message: str, cycle: Optional[list] = None):
+        super().__init__(message)
+        self.cycle = cycle or []
+
+
+class UnrecordedStatementException(Exception):
     pass
@@ -1,13 +1,16 @@
 import os
 import yaml
 import logging
-from typing import Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterable, Optional
 
 from inflection import pluralize
 from pathspec import PathSpec
 from pathspec.patterns.gitwildmatch import GitWildMatchPattern
 
 from .blueprint_config import BlueprintConfig, set_vars_defaults
+from .config_cache import ConfigCache, content_digest
 from .enums import BlueprintScope, ResourceType, RunMode
 from .identifiers import resource_label_for_type, resource_type_for_label
 from .resources import (
@@ -19,110 +22,145 @@ from .resources import (
     User,
 )
 from .resources.resource import ResourcePointer
-from .var import string_contains_var, process_for_each
+from .var import expand_for_each
 
 logger = logging.getLogger("snowbytes")
 
+# Use the libyaml-backed loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Below this many files, starting worker processes costs more than parsing serially
+PARALLEL_READ_MIN_FILES = 32
+
 ALIASES = {
     "grants_on_all": ResourceType.GRANT_ON_ALL,
     "account_parameters": ResourceType.ACCOUNT_PARAMETER,
 }
 
 
-def _resources_from_role_grants_config(role_grants_config: list) -> list:
+def _resources_from_role_grant(role_grant: dict) -> list:
+    if "to_role" in role_grant:
+        return [
+            RoleGrant(
+                role=role_grant["role"],
+                to_role=role_grant["to_role"],
+            )
+        ]
+    elif "to_user" in role_grant:
+        return [
+            RoleGrant(
+                role=role_grant["role"],
+                to_user=role_grant["to_user"],
+            )
+        ]
+    resources = []
+    for user in role_grant.get("users", []):
+        resources.append(
+            RoleGrant(
+                role=role_grant["role"],
+                to_user=user,
+            )
+        )
+    for to_role in role_grant.get("roles", []):
+        resources.append(
+            RoleGrant(
+                role=role_grant["role"],
+                to_role=to_role,
+            )
+        )
+    return resources
+
+
+def _resources_from_role_grants_config(role_grants_config: list, cache: Optional[ConfigCache] = None) -> list:
     if len(role_grants_config) == 0:
         return []
     resources = []
     for role_grant in role_grants_config:
+        resources.extend(
+            _cached_entry(cache, "role_grants", role_grant, partial(_resources_from_role_grant, role_grant))
+        )
+    if len(resources) == 0:
+        raise ValueError(f"No role grants found in config: {role_grants_config}")
+    return resources
 
-        if "to_role" in role_grant:
-            resources.append(
-                RoleGrant(
-                    role=role_grant["role"],
-                    to_role=role_grant["to_role"],
-                )
+
+def _resources_from_database_role_grant(database_role_grant: dict) -> list:
+    if "to_role" in database_role_grant:
+        return [
+            DatabaseRoleGrant(
+                database_role=database_role_grant["database_role"],
+                to_role=database_role_grant["to_role"],
             )
-        elif "to_user" in role_grant:
-            resources.append(
-                RoleGrant(
-                    role=role_grant["role"],
-                    to_user=role_grant["to_user"],
-                )
+        ]
+    resources = []
+    for role in database_role_grant.get("roles", []):
+        resources.append(
+            DatabaseRoleGrant(
+                database_role=database_role_grant["database_role"],
+                to_role=role,
             )
-        else:
-            for user in role_grant.get("users", []):
-                resources.append(
-                    RoleGrant(
-                        role=role_grant["role"],
-                        to_user=user,
-                    )
-                )
-            for to_role in role_grant.get("roles", []):
-                resources.append(
-                    RoleGrant(
-                        role=role_grant["role"],
-                        to_role=to_role,
-                    )
-                )
-    if len(resources) == 0:
-        raise ValueError(f"No role grants found in config: {role_grants_config}")
+        )
     return resources
 
 
-def _resources_from_database_role_grants_config(database_role_grants_config: list) -> list:
-    if len(database_role_grants_config) == 0:
-        return []
+def _resources_from_database_role_grants_config(
+    database_role_grants_config: list, cache: Optional[ConfigCache] = None
+) -> list:
     resources = []
     for database_role_grant in database_role_grants_config:
-        if "to_role" in database_role_grant:
-            resources.append(
-                DatabaseRoleGrant(
-                    database_role=database_role_grant["database_role"],
-                    to_role=database_role_grant["to_role"],
-                )
+        resources.extend(
+            _cached_entry(
+                cache,
+                "database_role_grants",
+                database_role_grant,
+                partial(_resources_from_database_role_grant, database_role_grant),
             )
-        else:
-            for role in database_role_grant.get("roles", []):
-                resources.append(
-                    DatabaseRoleGrant(
-                        database_role=database_role_grant["database_role"],
-                        to_role=role,
-                    )
-                )
+        )
     return resources
 
 
-def _resources_from_database_config(databases_config: list) -> list:
+def _resources_from_database(database: dict) -> list:
+    schemas = database.pop("schemas", [])
+    db = Database(**database)
+    resources: list[Resource] = [db]
+    for schema in schemas:
+        if "owner" not in schema:
+            schema["owner"] = db._data.owner
+        sch = Schema(**schema)
+        db.add(sch)
+        resources.append(sch)
+    return resources
+
+
+def _resources_from_database_config(databases_config: list, cache: Optional[ConfigCache] = None) -> list:
     resources = []
     for database in databases_config:
-        schemas = database.pop("schemas", [])
-        db = Database(**database)
-        resources.append(db)
-        for schema in schemas:
-            if "owner" not in schema:
-                schema["owner"] = db._data.owner
-            sch = Schema(**schema)
-            db.add(sch)
-            resources.append(sch)
+        resources.extend(_cached_entry(cache, "databases", database, partial(_resources_from_database, database)))
     return resources
 
 
-def _resources_from_users_config(users_config: list) -> list:
+def _resources_from_user(user) -> list:
+    if isinstance(user, dict):
+        roles = user.pop("roles", [])
+        snowbytes_user = User(**user)
+        resources: list[Resource] = [snowbytes_user]
+        for role in roles:
+            resources.append(
+                RoleGrant(
+                    role=role,
+                    to_user=snowbytes_user,
+                )
+            )
+        return resources
+    elif isinstance(user, str):
+        return [User.from_sql(user)]
+    return []
+
+
+def _resources_from_users_config(users_config: list, cache: Optional[ConfigCache] = None) -> list:
     resources = []
     for user in users_config:
-        if isinstance(user, dict):
-            roles = user.pop("roles", [])
-            snowbytes_user = User(**user)
-            resources.append(snowbytes_user)
-            for role in roles:
-                resources.append(
-                    RoleGrant(
-                        role=role,
-                        to_user=snowbytes_user,
-                    )
-                )
-        elif isinstance(user, str):
-            resources.append(User.from_sql(user))
+        resources.extend(_cached_entry(cache, "users", user, partial(_resources_from_user, user)))
     return resources
 
 
@@ -131,7 +169,55 @@ def process_requires(resource: Resource, requires: list):
         resource.requires(ResourcePointer(name=req["name"], resource_type=ResourceType(req["resource_type"])))
 
 
-def _resources_for_config(config: dict, vars: dict):
+def _cached_entry(cache: Optional[ConfigCache], label: Any, entry: Any, build: Callable[[], list], *inputs) -> list:
+    """
+    Build the resources for a single config entry, or load them from the cache. Builders may modify the
+    entry, so the cache key is computed before building. Anything besides the entry that the builder
+    reads, like the value of a for_each var, must be passed as inputs so that it is part of the key.
+    """
+    if cache is None:
+        return build()
+    return cache.get(content_digest("resources", label, entry, *inputs), build)
+
+
+def _for_each_input(resource_data: dict, vars: dict):
+    for_each = resource_data["for_each"]
+    if isinstance(for_each, str) and for_each.startswith("var."):
+        var_name = for_each.split(".")[1]
+        if var_name not in vars:
+            raise ValueError(f"Var {var_name} not found")
+        return vars[var_name]
+    else:
+        raise ValueError(f"for_each must be a var reference. Got: {for_each}")
+
+
+def _resources_from_config_entry(resource_type: ResourceType, resource_data, for_each_input=None) -> list:
+    resources = []
+    if isinstance(resource_data, dict):
+        if "for_each" in resource_data:
+            resource_cls = Resource.resolve_resource_cls(resource_type, resource_data)
+            resource_instance = resource_data.copy()
+            resource_instance.pop("for_each")
+
+            for instance in expand_for_each(resource_instance, for_each_input):
+                resource = resource_cls(**instance)
+                resources.append(resource)
+        else:
+            requires = resource_data.pop("requires", [])
+            resource_cls = Resource.resolve_resource_cls(resource_type, resource_data)
+            resource = resource_cls(**resource_data)
+            process_requires(resource, requires)
+            resources.append(resource)
+    elif isinstance(resource_data, str):
+        resource_cls = Resource.resolve_resource_cls(resource_type, {})
+        resource = resource_cls.from_sql(resource_data)
+        resources.append(resource)
+    else:
+        raise Exception(f"Unknown resource data type: {resource_data}")
+    return resources
+
+
+def _resources_for_config(config: dict, vars: dict, cache: Optional[ConfigCache] = None):
     # Special cases
     database_config = config.pop("databases", [])
     role_grants = config.pop("role_grants", [])
@@ -153,45 +239,17 @@ def _resources_for_config(config: dict, vars: dict):
 
     for resource_type, block in config_blocks:
         for resource_data in block:
-
-            if isinstance(resource_data, dict):
-                if "for_each" in resource_data:
-                    resource_cls = Resource.resolve_resource_cls(resource_type, resource_data)
-                    resource_instance = resource_data.copy()
-                    for_each = resource_instance.pop("for_each")
-
-                    if isinstance(for_each, str) and for_each.startswith("var."):
-                        var_name = for_each.split(".")[1]
-                        if var_name not in vars:
-                            raise ValueError(f"Var {var_name} not found")
-                        for_each_input = vars[var_name]
-                    else:
-                        raise ValueError(f"for_each must be a var reference. Got: {for_each}")
-
-                    for each_value in for_each_input:
-                        for key, value in resource_data.items():
-                            if isinstance(value, str) and string_contains_var(value):
-                                resource_instance[key] = process_for_each(value, each_value)
-
-                        resource = resource_cls(**resource_instance)
-                        resources.append(resource)
-                else:
-                    requires = resource_data.pop("requires", [])
-                    resource_cls = Resource.resolve_resource_cls(resource_type, resource_data)
-                    resource = resource_cls(**resource_data)
-                    process_requires(resource, requires)
-                    resources.append(resource)
-            elif isinstance(resource_data, str):
-                resource_cls = Resource.resolve_resource_cls(resource_type, {})
-                resource = resource_cls.from_sql(resource_data)
-                resources.append(resource)
-            else:
-                raise Exception(f"Unknown resource data type: {resource_data}")
-
-    resources.extend(_resources_from_database_config(database_config))
-    resources.extend(_resources_from_role_grants_config(role_grants))
-    resources.extend(_resources_from_database_role_grants_config(database_role_grants))
-    resources.extend(_resources_from_users_config(users))
+            # for_each entries depend on the value of their var, so it is part of their cache key
+            for_each_input = None
+            if isinstance(resource_data, dict) and "for_each" in resource_data:
+                for_each_input = _for_each_input(resource_data, vars)
+            build = partial(_resources_from_config_entry, resource_type, resource_data, for_each_input)
+            resources.extend(_cached_entry(cache, resource_type, resource_data, build, for_each_input))
+
+    resources.extend(_resources_from_database_config(database_config, cache))
+    resources.extend(_resources_from_role_grants_config(role_grants, cache))
+    resources.extend(_resources_from_database_role_grants_config(database_role_grants, cache))
+    resources.extend(_resources_from_users_config(users, cache))
 
     # This code helps resolve grant references to the fully qualified name of the resource.
     # This probably belongs in blueprint as a finalization step.
@@ -209,7 +267,11 @@ def _resources_for_config(config: dict, vars: dict):
     return resources
 
 
-def collect_blueprint_config(yaml_config: dict, cli_config: Optional[dict[str, Any]] = None) -> BlueprintConfig:
+def collect_blueprint_config(
+    yaml_config: dict,
+    cli_config: Optional[dict[str, Any]] = None,
+    cache: Optional[ConfigCache] = None,
+) -> BlueprintConfig:
     yaml_config_ = yaml_config.copy()
     cli_config_ = cli_config.copy() if cli_config else {}
     blueprint_args: dict[str, Any] = {}
@@ -257,7 +319,7 @@ def collect_blueprint_config(yaml_config: dict, cli_config: Optional[dict[str, A
         blueprint_args["vars_spec"] = vars_spec
         blueprint_args["vars"] = set_vars_defaults(vars_spec, blueprint_args["vars"])
 
-    resources = _resources_for_config(yaml_config_, blueprint_args["vars"])
+    resources = _resources_for_config(yaml_config_, blueprint_args["vars"], cache)
 
     if len(resources) == 0:
         raise ValueError("No resources found in config")
@@ -296,36 +358,81 @@ def crawl(path: str):
 def read_config(config_path) -> dict:
     with open(config_path, "r") as f:
         try:
-            config = yaml.safe_load(f)
+            config = yaml.load(f, Loader=YAML_LOADER)
         except yaml.YAMLError as e:
             raise ValueError(f"Error parsing YAML file: {config_path}") from e
     return config
 
 
 def merge_configs(config1: dict, config2: dict) -> dict:
-    merged = config1.copy()
-    for key, value in config2.items():
-        if key in merged:
-            if isinstance(merged[key], list):
-                merged[key] = merged[key] + value
-            elif merged[key] is None:
-                merged[key] = value
+    return merge_all_configs([config1, config2])
+
+
+def merge_all_configs(configs: Iterable[dict]) -> dict:
+    """
+    Merge configs in order. List values are concatenated, other values can only be set once.
+
+    Lists are copied the first time a key is seen and extended in place after that, so merging
+    many configs takes time proportional to their total size. The inputs are not modified.
+    """
+    merged: dict = {}
+    for config in configs:
+        for key, value in config.items():
+            if key in merged:
+                if isinstance(merged[key], list):
+                    if isinstance(value, list):
+                        merged[key].extend(value)
+                    else:
+                        merged[key] = merged[key] + value
+                elif merged[key] is None:
+                    merged[key] = list(value) if isinstance(value, list) else value
+                else:
+                    raise ValueError(f"Found a conflict for key `{key}` with {value} and {merged[key]}")
             else:
-                raise ValueError(f"Found a conflict for key `{key}` with {value} and {merged[key]}")
-        else:
-            merged[key] = value
+                merged[key] = list(value) if isinstance(value, list) else value
     return merged
 
 
-def collect_configs_from_path(path: str) -> list[tuple[str, dict]]:
-    configs = []
-
+def _read_configs(config_paths: list[str], workers: Optional[int] = None) -> list[dict]:
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(config_paths) < PARALLEL_READ_MIN_FILES:
+        return [read_config(config_path) for config_path in config_paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(config_paths) // (workers * 4))
+        return list(executor.map(read_config, config_paths, chunksize=chunksize))
+
+
+def _config_file_digest(config_path: str) -> str:
+    with open(config_path, "rb") as f:
+        return content_digest("config_file", f.read())
+
+
+def read_configs(
+    config_paths: list[str], workers: Optional[int] = None, cache: Optional[ConfigCache] = None
+) -> list[dict]:
+    """
+    Read many config files, in order. Large batches are parsed across a process pool. With a cache,
+    only files whose contents aren't in the cache are parsed.
+    """
+    if cache is None:
+        return _read_configs(config_paths, workers)
+    digests = [_config_file_digest(config_path) for config_path in config_paths]
+    missing = [config_path for config_path, digest in zip(config_paths, digests) if digest not in cache]
+    parsed = dict(zip(missing, _read_configs(missing, workers)))
+    return [
+        cache.get(digest, partial(parsed.__getitem__, config_path))
+        for config_path, digest in zip(config_paths, digests)
+    ]
+
+
+def collect_configs_from_path(
+    path: str, workers: Optional[int] = None, cache: Optional[ConfigCache] = None
+) -> list[tuple[str, dict]]:
     if not os.path.exists(path):
         raise ValueError(f"Invalid path: `{path}`. Must be a file or directory.")
 
-    for file in crawl(path):
-        config = read_config(file)
-        configs.append((file, config))
+    files = list(crawl(path))
+    configs = list(zip(files, read_configs(files, workers, cache)))
 
     if len(configs) == 0:
         raise ValueError(f"No valid YAML files were read from the given path: {path}")
@@ -0,0 +1,106 @@
+from array import array
+from typing import Hashable, Iterable, TypeVar
+
+from .exceptions import NotADAGException
+
+T = TypeVar("T", bound=Hashable)
+
+
+def _csr(node_count: int, sources: array, targets: array) -> tuple[array, array]:
+    """
+    Pack a list of edges into compressed sparse row form. The neighbors of node i are
+    adjacency[offsets[i] : offsets[i + 1]].
+    """
+    offsets = array("q", bytes(8 * (node_count + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(node_count):
+        offsets[i + 1] += offsets[i]
+
+    adjacency = array("q", bytes(8 * len(targets)))
+    cursor = offsets[:-1]
+    for source, target in zip(sources, targets):
+        adjacency[cursor[source]] = target
+        cursor[source] += 1
+    return offsets, adjacency
+
+
+def _find_cycle(nodes: list, sources: array, targets: array, unsorted: set[int]) -> list:
+    # Every node left over by Kahn's algorithm still depends on at least one other left over node, so
+    # following those dependencies from any of them must eventually revisit a node.
+    offsets, adjacency = _csr(len(nodes), sources, targets)
+    node = min(unsorted)
+    path: list[int] = []
+    position: dict[int, int] = {}
+    while node not in position:
+        position[node] = len(path)
+        path.append(node)
+        for ref in adjacency[offsets[node] : offsets[node + 1]]:
+            if ref in unsorted:
+                node = ref
+                break
+    cycle = path[position[node] :] + [node]
+    return [nodes[i] for i in cycle]
+
+
+def topological_levels(
+    resource_set: Iterable[T], references: Iterable[tuple[T, T]]
+) -> tuple[dict[T, int], dict[T, int]]:
+    """
+    Sort a dependency graph so that every node comes after the nodes it references.
+
+    Each reference is a (node, ref) pair meaning that node depends on ref. Returns the position of every
+    node in the sort order, and its dependency level: 0 for nodes without references, otherwise one more
+    than the highest level among its references. Nodes that share a level don't depend on each other.
+
+    Raises NotADAGException with the path of a cycle if the graph has one.
+    """
+
+    # Kahn's algorithm over integer node IDs and flat edge arrays
+    nodes: list[T] = list(resource_set)
+    node_ids: dict[T, int] = {node: i for i, node in enumerate(nodes)}
+    node_count = len(nodes)
+
+    sources = array("q")
+    targets = array("q")
+    for node, ref in references:
+        sources.append(node_ids[node])
+        targets.append(node_ids[ref])
+
+    # For each node, the number of references that haven't been sorted yet
+    remaining = array("q", bytes(8 * node_count))
+    for source in sources:
+        remaining[source] += 1
+
+    # For each node, the nodes that depend on it
+    offsets, dependents = _csr(node_count, targets, sources)
+
+    levels = array("q", bytes(8 * node_count))
+    order = [i for i in range(node_count) if remaining[i] == 0]
+    head = 0
+    while head < len(order):
+        node_id = order[head]
+        head += 1
+        next_level = levels[node_id] + 1
+        for dependent in dependents[offsets[node_id] : offsets[node_id + 1]]:
+            if levels[dependent] < next_level:
+                levels[dependent] = next_level
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                order.append(dependent)
+
+    if len(order) != node_count:
+        sorted_ids = set(order)
+        unsorted = {i for i in range(node_count) if i not in sorted_ids}
+        cycle = _find_cycle(nodes, sources, targets, unsorted)
+        raise NotADAGException(f"Graph is not a DAG, found cycle: {' -> '.join(map(str, cycle))}", cycle=cycle)
+
+    return (
+        {nodes[node_id]: index for index, node_id in enumerate(order)},
+        {nodes[node_id]: levels[node_id] for node_id in order},
+    )
+
+
+def topological_sort(resource_set: Iterable[T], references: Iterable[tuple[T, T]]) -> dict[T, int]:
+    order, _ = topological_levels(resource_set, references)
+    return order
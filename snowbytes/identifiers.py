@@ -1,3 +1,4 @@
+import re
 from typing import Optional, Union
 
 import pyparsing as pp
@@ -7,6 +8,10 @@ from .parse_primitives import FullyQualifiedIdentifier
 from .resource_name import ResourceName
 from .var import VarString
 
+# Up to four dot-separated unquoted identifiers, which is what most names look like. These split the same
+# way FullyQualifiedIdentifier would parse them, without running the grammar.
+_SIMPLE_IDENTIFIER = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_$]*(?:\.[A-Za-z0-9_][A-Za-z0-9_$]*){0,3}")
+
 
 class FQN:
     def __init__(
@@ -230,10 +235,13 @@ def parse_identifier(identifier: str, is_db_scoped=False) -> dict:
         args_str = ":".join(smart_split(args_str, ":")[:-1]) if ":" in args_str else args_str  # Strip return type
         arg_types = [arg.strip() for arg in smart_split(args_str.strip("()"), ",")]
 
-    try:
-        name_parts = list(FullyQualifiedIdentifier.parse_string(scoped_name, parse_all=True))
-    except pp.ParseException:
-        raise pp.ParseException(f"Failed to parse identifier: {identifier}")
+    if _SIMPLE_IDENTIFIER.fullmatch(scoped_name):
+        name_parts = scoped_name.split(".")
+    else:
+        try:
+            name_parts = list(FullyQualifiedIdentifier.parse_string(scoped_name, parse_all=True))
+        except pp.ParseException:
+            raise pp.ParseException(f"Failed to parse identifier: {identifier}")
     if len(name_parts) == 1:
         return {
             "name": name_parts[0],
@@ -1,23 +1,35 @@
-from typing import Any
+from typing import Any, Optional
 
 from snowbytes.blueprint import Blueprint
 from snowbytes.blueprint import plan_from_dict
 from snowbytes.blueprint_config import BlueprintConfig
+from snowbytes.config_cache import ConfigCache
 
 from snowbytes.gitops import collect_blueprint_config
 from snowbytes.operations.connector import connect
+from snowbytes.plan_cache import PlanCache
 
 
-def blueprint_plan(yaml_config: dict, cli_config: dict[str, Any]):
-    blueprint_config = collect_blueprint_config(yaml_config, cli_config)
+def blueprint_plan(
+    yaml_config: dict,
+    cli_config: dict[str, Any],
+    cache: Optional[ConfigCache] = None,
+    workers: int = 1,
+    use_plan_cache: bool = True,
+):
+    blueprint_config = collect_blueprint_config(yaml_config, cli_config, cache)
     blueprint = Blueprint.from_config(blueprint_config)
+    # Plans are stored alongside the config cache, so they are only cached when it is
+    plan_cache = PlanCache(cache) if cache and use_plan_cache else None
     session = connect()
-    plan_obj = blueprint.plan(session)
+    if workers > 1:
+        return blueprint.plan_sharded(session, workers=workers, connection_factory=connect, plan_cache=plan_cache)
+    plan_obj = blueprint.plan(session, plan_cache=plan_cache)
     return plan_obj
 
 
-def blueprint_apply(yaml_config: dict, cli_config: dict):
-    blueprint_config = collect_blueprint_config(yaml_config, cli_config)
+def blueprint_apply(yaml_config: dict, cli_config: dict, cache: Optional[ConfigCache] = None):
+    blueprint_config = collect_blueprint_config(yaml_config, cli_config, cache)
     blueprint = Blueprint.from_config(blueprint_config)
     session = connect()
     blueprint.apply(session)
@@ -1,69 +1,325 @@
+import json
 import logging
-from typing import Optional
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import chain, islice
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, TextIO
 
 import snowflake.connector.errors
+import yaml  # type: ignore[import-untyped]
 from inflection import pluralize
 
 from snowbytes.client import UNSUPPORTED_FEATURE
-from snowbytes.data_provider import fetch_resource, list_resource
+from snowbytes.data_provider import fetch_resource, has_hydrated_list, list_hydrated_resource, list_resource
 from snowbytes.enums import ResourceType
-from snowbytes.identifiers import URN, resource_label_for_type
+from snowbytes.identifiers import FQN, URN, resource_label_for_type
 from snowbytes.operations.connector import connect
 from snowbytes.resources.grant import grant_yaml
 
 logger = logging.getLogger("snowbytes")
 
 
+# Use the libyaml-backed emitter when PyYAML was built with it
+YAML_DUMPER = getattr(yaml, "CDumper", yaml.Dumper)
+
+# How many objects each worker may fetch ahead of the one being written
+FETCH_AHEAD_PER_WORKER = 4
+
+
 def export_resources(
-    session=None, include: Optional[list[ResourceType]] = None, exclude: Optional[list[ResourceType]] = None
+    session=None,
+    include: Optional[list[ResourceType]] = None,
+    exclude: Optional[list[ResourceType]] = None,
+    workers: int = 1,
+    connection_factory: Callable[[], Any] = connect,
 ) -> dict[str, list]:
+    return {
+        pluralize(resource_label_for_type(resource_type)): list(items)
+        for resource_type, items in iter_export_resources(session, include, exclude, workers, connection_factory)
+    }
+
+
+def iter_export_resources(
+    session=None,
+    include: Optional[list[ResourceType]] = None,
+    exclude: Optional[list[ResourceType]] = None,
+    workers: int = 1,
+    connection_factory: Callable[[], Any] = connect,
+) -> Iterator[tuple[ResourceType, Iterator[dict]]]:
+    """
+    Yield a block for each exported resource type, made of the resource type and an iterator over its
+    resource configs. Resources are only fetched as each block is consumed, so the export can be written
+    out without holding the whole account in memory.
+
+    With more than one worker, resource types are listed concurrently and objects are fetched ahead of
+    the consumer on a pool of up to `workers` connections, opened with connection_factory as needed.
+    Blocks and their resources are yielded in the same order either way.
+    """
     if session is None:
-        session = connect()
-    config = {}
-    for resource_type in ResourceType:
-        if include and resource_type not in include:
-            continue
-        if exclude and resource_type in exclude:
-            continue
+        session = connection_factory()
+    resource_types = [
+        resource_type
+        for resource_type in ResourceType
+        if not (include and resource_type not in include) and not (exclude and resource_type in exclude)
+    ]
+    if workers > 1:
+        yield from _iter_export_resources_parallel(session, resource_types, workers, connection_factory)
+        return
+
+    for resource_type in resource_types:
         try:
-            config.update(export_resource(session, resource_type))
-        # No list method for resource
-        except AttributeError:
-            logger.warning(f"Skipping {resource_type} because it has no list method")
-            continue
-        # Resource not supported
-        except snowflake.connector.errors.ProgrammingError as err:
-            if err.errno == UNSUPPORTED_FEATURE:
-                logger.warning(f"Skipping {resource_type} because it is not supported")
+            items = _export_resource_items(session, resource_type)
+        except Exception as err:
+            if _is_unsupported(resource_type, err):
                 continue
-            else:
+            raise
+        if items is not None:
+            yield resource_type, items
+
+
+class _ConnectionPool:
+    """
+    Hands out at most `size` connections, starting with an existing session and opening the rest on demand.
+    """
+
+    def __init__(self, session, size: int, connection_factory: Callable[[], Any]):
+        self._idle: queue.SimpleQueue = queue.SimpleQueue()
+        self._idle.put(session)
+        self._opened: list = []
+        self._size = size
+        self._connection_factory = connection_factory
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._opened) + 1 < self._size:
+                connection = self._connection_factory()
+                self._opened.append(connection)
+                return connection
+        return self._idle.get()
+
+    def run(self, fn: Callable, *args):
+        connection = self._acquire()
+        try:
+            return fn(connection, *args)
+        finally:
+            self._idle.put(connection)
+
+    def close(self):
+        for connection in self._opened:
+            connection.close()
+
+
+def _iter_export_resources_parallel(
+    session, resource_types: list[ResourceType], workers: int, connection_factory: Callable[[], Any]
+) -> Iterator[tuple[ResourceType, Iterator[dict]]]:
+    pool = _ConnectionPool(session, workers, connection_factory)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="snowbytes-export")
+    try:
+        listings = [
+            (resource_type, executor.submit(pool.run, _list_resources, resource_type))
+            for resource_type in resource_types
+        ]
+        for resource_type, listing in listings:
+            try:
+                resources = listing.result()
+            except Exception as err:
+                if _is_unsupported(resource_type, err):
+                    continue
                 raise
-    return config
+            if not resources:
+                continue
+            if has_hydrated_list(resource_label_for_type(resource_type)):
+                items = _start_block(resource_type, _iter_resource_configs(session, resource_type, resources))
+            else:
+                items = _start_block(
+                    resource_type,
+                    _iter_fetched_resource_configs(
+                        executor, pool, resource_type, resources, workers * FETCH_AHEAD_PER_WORKER
+                    ),
+                )
+            if items is not None:
+                yield resource_type, items
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        pool.close()
+
+
+def _iter_fetched_resource_configs(
+    executor: ThreadPoolExecutor,
+    pool: _ConnectionPool,
+    resource_type: ResourceType,
+    resources: list[tuple[FQN, Optional[dict]]],
+    window: int,
+) -> Iterator[dict]:
+    remaining = iter(resources)
+    pending: deque[Future] = deque()
+    try:
+        while True:
+            for fqn, resource in islice(remaining, window - len(pending)):
+                pending.append(executor.submit(pool.run, _resource_config, resource_type, fqn, resource))
+            if not pending:
+                return
+            resource = pending.popleft().result()
+            if resource is not None:
+                yield resource
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _is_unsupported(resource_type: ResourceType, err: Exception) -> bool:
+    # No list method for resource
+    if isinstance(err, AttributeError):
+        logger.warning(f"Skipping {resource_type} because it has no list method")
+        return True
+    # Resource not supported
+    if isinstance(err, snowflake.connector.errors.ProgrammingError) and err.errno == UNSUPPORTED_FEATURE:
+        logger.warning(f"Skipping {resource_type} because it is not supported")
+        return True
+    return False
 
 
 def export_resource(session, resource_type: ResourceType) -> dict[str, list]:
-    resource_label = resource_label_for_type(resource_type)
-    resource_names = list_resource(session, resource_label)
-    if len(resource_names) == 0:
+    items = _export_resource_items(session, resource_type)
+    if items is None:
         return {}
-    resources = []
-    for fqn in resource_names:
-        urn = URN(resource_type, fqn, account_locator="")
+    return {pluralize(resource_label_for_type(resource_type)): list(items)}
+
+
+def _list_resources(session, resource_type: ResourceType) -> Sequence[tuple[FQN, Optional[dict]]]:
+    """
+    List resources of a type, paired with their data when the listing already includes it, or None when
+    each resource still has to be fetched.
+    """
+    resource_label = resource_label_for_type(resource_type)
+    if has_hydrated_list(resource_label):
+        return list_hydrated_resource(session, resource_label)
+    return [(fqn, None) for fqn in list_resource(session, resource_label)]
+
+
+def _export_resource_items(session, resource_type: ResourceType) -> Optional[Iterator[dict]]:
+    resources = _list_resources(session, resource_type)
+    if len(resources) == 0:
+        return None
+    return _start_block(resource_type, _iter_resource_configs(session, resource_type, resources))
+
+
+def _start_block(resource_type: ResourceType, configs: Iterator[dict]) -> Optional[Iterator[dict]]:
+    """
+    Fetch the first resource config of a block before the block is handed out, so that a resource type the
+    account doesn't support is skipped as a whole, with None, like it was before exports were streamed.
+    """
+    try:
+        first_config = next(configs, None)
+    except _UnsupportedResourceType:
+        return None
+    return _continue_block(resource_type, first_config, configs)
+
+
+def _continue_block(resource_type: ResourceType, first_config: Optional[dict], configs: Iterator[dict]):
+    if first_config is not None:
+        yield first_config
+    try:
+        yield from configs
+    except _UnsupportedResourceType as err:
+        # Part of the block has been written by now, so it can't be skipped anymore
+        raise Exception(f"Export of {resource_type} is incomplete, fetching failed partway") from err.__cause__
+
+
+class _UnsupportedResourceType(Exception):
+    pass
+
+
+def _resource_config(session, resource_type: ResourceType, fqn: FQN, resource: Optional[dict] = None) -> Optional[dict]:
+    urn = URN(resource_type, fqn, account_locator="")
+    if resource is None:
         try:
             resource = fetch_resource(session, urn)
         except Exception as e:
             logger.warning(f"Failed to fetch resource {urn}: {e}")
+            if _is_unsupported(resource_type, e):
+                raise _UnsupportedResourceType(resource_type) from e
             # continue
             raise e
-        if resource is None:
-            logger.warning(f"Found resource {urn} in metadata but failed to fetch")
-            continue
-        try:
-            resources.append(_format_resource_config(urn, resource, resource_type))
-        except Exception as e:
-            logger.warning(f"Failed to format resource {urn}: {e}")
+    if resource is None:
+        logger.warning(f"Found resource {urn} in metadata but failed to fetch")
+        return None
+    try:
+        return _format_resource_config(urn, resource, resource_type)
+    except Exception as e:
+        logger.warning(f"Failed to format resource {urn}: {e}")
+        return None
+
+
+def _iter_resource_configs(
+    session, resource_type: ResourceType, resources: Sequence[tuple[FQN, Optional[dict]]]
+) -> Iterator[dict]:
+    for fqn, resource in resources:
+        resource_config = _resource_config(session, resource_type, fqn, resource)
+        if resource_config is not None:
+            yield resource_config
+
+
+def write_export(blocks: Iterable[tuple[ResourceType, Iterable[dict]]], stream: TextIO, format: str = "yml"):
+    """
+    Write exported blocks to a stream one resource at a time. The yml and json formats match dumping the
+    dict returned by export_resources. The ndjson format writes one JSON object per line, with the
+    resource_type of each resource added to its config.
+    """
+    if format == "yml":
+        _write_yaml(blocks, stream)
+    elif format == "json":
+        _write_json(blocks, stream)
+    elif format == "ndjson":
+        _write_ndjson(blocks, stream)
+    else:
+        raise ValueError(f"Unsupported format: {format}")
+
+
+def _write_yaml(blocks, stream: TextIO):
+    empty = True
+    for resource_type, items in blocks:
+        empty = False
+        label = pluralize(resource_label_for_type(resource_type))
+        items = iter(items)
+        first_item = next(items, None)
+        if first_item is None:
+            stream.write(f"{label}: []\n")
             continue
-    return {pluralize(resource_label): resources}
+        stream.write(f"{label}:\n")
+        for item in chain([first_item], items):
+            # A top-level sequence is written without indentation, just like a sequence under a mapping key
+            yaml.dump([item], stream, Dumper=YAML_DUMPER, sort_keys=False)
+    if empty:
+        stream.write("{}\n")
+
+
+def _write_json(blocks, stream: TextIO):
+    stream.write("{")
+    block_idx = -1
+    for block_idx, (resource_type, items) in enumerate(blocks):
+        label = pluralize(resource_label_for_type(resource_type))
+        stream.write(f"{',' if block_idx else ''}\n  {json.dumps(label)}: [")
+        item_idx = -1
+        for item_idx, item in enumerate(items):
+            item_json = json.dumps(item, indent=2, default=str).replace("\n", "\n    ")
+            stream.write(f"{',' if item_idx else ''}\n    {item_json}")
+        stream.write("\n  ]" if item_idx >= 0 else "]")
+    stream.write("\n}" if block_idx >= 0 else "}")
+
+
+def _write_ndjson(blocks, stream: TextIO):
+    for resource_type, items in blocks:
+        for item in items:
+            stream.write(json.dumps({"resource_type": str(resource_type), **item}, default=str))
+            stream.write("\n")
 
 
 def _format_resource_config(urn: URN, resource: dict, resource_type: ResourceType) -> dict:
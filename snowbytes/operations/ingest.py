@@ -0,0 +1,131 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+from inflection import pluralize
+
+from snowbytes.blueprint import Blueprint
+from snowbytes.identifiers import resource_label_for_type
+from snowbytes.parse import iter_statements, resolve_resource_class
+from snowbytes.resources.resource import Resource
+from snowbytes.scope import DatabaseScope, SchemaScope
+
+logger = logging.getLogger("snowbytes")
+
+# Statements are sent to worker processes in batches, so that each task is worth the cost of pickling it
+INGEST_BATCH_SIZE = 256
+
+
+@dataclass
+class IngestFailure:
+    path: str
+    index: int
+    sql: str
+    error: str
+
+
+@dataclass
+class IngestResult:
+    resources: list[Resource] = field(default_factory=list)
+    failures: list[IngestFailure] = field(default_factory=list)
+
+    def to_blueprint(self, **kwargs) -> Blueprint:
+        return Blueprint(resources=self.resources, **kwargs)
+
+    def to_config(self) -> dict[str, list]:
+        config: dict[str, list] = {}
+        for resource in self.resources:
+            label = pluralize(resource_label_for_type(resource.resource_type))
+            config.setdefault(label, []).append(_format_resource_config(resource))
+        return config
+
+
+def resource_from_statement(sql: str) -> Resource:
+    """
+    Parse a single CREATE statement into a resource, resolving the resource class from the statement.
+    """
+    resource_type = resolve_resource_class(sql)
+    resource_classes = Resource.__types__[resource_type]
+    if len(resource_classes) == 1:
+        return resource_classes[0]._from_sql(sql)
+
+    # Polymorphic resource types can only be told apart by their props, so try each class and keep the
+    # first one that parses and that the resolver agrees with
+    error: Optional[Exception] = None
+    for resource_cls in resource_classes:
+        try:
+            resource = resource_cls._from_sql(sql)
+        except Exception as err:
+            error = err
+            continue
+        if Resource.resolve_resource_cls(resource_type, resource.to_dict()) is resource_cls:
+            return resource
+    raise ValueError(f"Could not resolve {resource_type} class for SQL: {sql}") from error
+
+
+def _parse_batch(batch: list[tuple[str, int, str]]) -> IngestResult:
+    result = IngestResult()
+    for path, index, sql in batch:
+        try:
+            result.resources.append(resource_from_statement(sql))
+        except Exception as err:
+            result.failures.append(IngestFailure(path, index, sql, f"{type(err).__name__}: {err}"))
+    return result
+
+
+def _iter_file_statements(paths: Iterable[str]) -> Iterator[tuple[str, int, str]]:
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            sql_text = f.read()
+        for index, sql in enumerate(iter_statements(sql_text)):
+            yield path, index, sql
+
+
+def _iter_batches(statements: Iterator[tuple[str, int, str]]) -> Iterator[list[tuple[str, int, str]]]:
+    while batch := list(islice(statements, INGEST_BATCH_SIZE)):
+        yield batch
+
+
+def ingest_sql_files(paths: Iterable[str], workers: Optional[int] = None) -> IngestResult:
+    """
+    Turn SQL files of CREATE statements, like the output of GET_DDL, into resources. Statements are
+    split lazily and parsed in batches across a process pool. Statements that can't be parsed are
+    reported in the result's failures instead of raising.
+    """
+    workers = workers or os.cpu_count() or 1
+    batches = _iter_batches(_iter_file_statements(paths))
+    first_batch = next(batches, [])
+    result = _parse_batch(first_batch)
+
+    # A single batch isn't worth starting worker processes for
+    if workers > 1 and len(first_batch) == INGEST_BATCH_SIZE:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch_result in executor.map(_parse_batch, batches):
+                result.resources.extend(batch_result.resources)
+                result.failures.extend(batch_result.failures)
+    else:
+        for batch in batches:
+            batch_result = _parse_batch(batch)
+            result.resources.extend(batch_result.resources)
+            result.failures.extend(batch_result.failures)
+
+    for failure in result.failures:
+        logger.warning(f"Failed to parse statement {failure.index} in {failure.path}: {failure.error}")
+    return result
+
+
+def _format_resource_config(resource: Resource) -> dict:
+    data = resource.to_dict()
+    # Put name and container fields at the top of the dict
+    first_fields = {"name": data.pop("name")} if "name" in data else {}
+    container = resource.container
+    if isinstance(resource.scope, SchemaScope) and container is not None:
+        if container.container is not None:
+            first_fields["database"] = str(container.container.name)
+        first_fields["schema"] = str(container.name)
+    elif isinstance(resource.scope, DatabaseScope) and container is not None:
+        first_fields["database"] = str(container.name)
+    return {**first_fields, **{k: data[k] for k in sorted(data)}}
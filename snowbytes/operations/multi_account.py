@@ -0,0 +1,213 @@
+import copy
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Optional
+
+import yaml  # type: ignore[import-untyped]
+
+from snowbytes import data_provider
+from snowbytes.blueprint import (
+    Blueprint,
+    CreateResource,
+    DropResource,
+    Plan,
+    TransferOwnership,
+    UpdateResource,
+    dump_plan,
+)
+from snowbytes.gitops import collect_blueprint_config, merge_vars
+from snowbytes.operations.connector import connect
+
+logger = logging.getLogger("snowbytes")
+
+# Planning an account is mostly waiting on Snowflake, so run a few at once by default
+DEFAULT_ACCOUNT_WORKERS = 4
+
+SUMMARY_FILE = "summary.json"
+
+_PROFILE_NAME = re.compile(r"[A-Za-z0-9_.-]+")
+
+
+@dataclass
+class AccountProfile:
+    """
+    A named set of connect() arguments for one account, and the vars to plan that account with on top of
+    the shared ones.
+    """
+
+    name: str
+    connection: dict[str, Any] = field(default_factory=dict)
+    vars: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class AccountResult:
+    profile: str
+    account: Optional[str] = None
+    plan_file: Optional[str] = None
+    changes: dict[str, int] = field(default_factory=dict)
+    applied: Optional[int] = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def load_profiles(path: str) -> list[AccountProfile]:
+    """
+    Read account profiles from a YAML file:
+
+        profiles:
+          - name: us_prod
+            account: ab12345.us-east-1
+            user: SNOWBYTES
+            role: SNOWBYTES_ADMIN
+            vars:
+              env: prod
+
+    Every key besides name and vars is passed to connect(), which fills in anything left out from the
+    SNOWFLAKE_* environment variables.
+    """
+    with open(path) as f:
+        config = yaml.safe_load(f) or {}
+    if not isinstance(config, dict) or not isinstance(config.get("profiles"), list):
+        raise ValueError(f"Expected a list of profiles under 'profiles' in {path}")
+
+    profiles: list[AccountProfile] = []
+    names: set[str] = set()
+    for entry in config["profiles"]:
+        if not isinstance(entry, dict):
+            raise ValueError(f"Expected a profile, got {entry!r}")
+        connection = dict(entry)
+        name = connection.pop("name", None)
+        profile_vars = connection.pop("vars", None) or {}
+        if not isinstance(name, str) or not _PROFILE_NAME.fullmatch(name):
+            # Names are used as plan file names
+            raise ValueError(f"Profile name must be letters, numbers, '_', '.' or '-', got {name!r}")
+        if name in names:
+            raise ValueError(f"Duplicate profile name: {name}")
+        if not isinstance(profile_vars, dict):
+            raise ValueError(f"Profile {name} vars must be a dictionary")
+        names.add(name)
+        profiles.append(AccountProfile(name=name, connection=connection, vars=profile_vars))
+    return profiles
+
+
+def count_changes(plan: Plan) -> dict[str, int]:
+    return {
+        "create": len([change for change in plan if isinstance(change, CreateResource)]),
+        "update": len([change for change in plan if isinstance(change, UpdateResource)]),
+        "transfer": len([change for change in plan if isinstance(change, TransferOwnership)]),
+        "drop": len([change for change in plan if isinstance(change, DropResource)]),
+    }
+
+
+def run_account(
+    profile: AccountProfile,
+    yaml_config: dict,
+    cli_config: dict[str, Any],
+    out_dir: Optional[str] = None,
+    apply: bool = False,
+    connection_factory: Callable[..., Any] = connect,
+) -> AccountResult:
+    """
+    Plan one account, write its plan to out_dir, and apply it if asked to. Errors are recorded on the result
+    instead of raised, so that one account failing doesn't stop the others.
+    """
+    start = time.perf_counter()
+    result = AccountResult(profile=profile.name)
+    session = None
+    try:
+        # Worker processes plan one account after another, and the session and query caches don't know
+        # which account their entries came from
+        data_provider.reset_session_caches()
+
+        account_config = dict(cli_config)
+        if profile.vars:
+            account_config["vars"] = merge_vars(account_config.get("vars", {}), profile.vars)
+        blueprint_config = collect_blueprint_config(copy.deepcopy(yaml_config), account_config)
+        blueprint = Blueprint.from_config(blueprint_config)
+
+        session = connection_factory(**profile.connection)
+        plan = blueprint.plan(session)
+        result.account = data_provider.fetch_session(session)["account"]
+        result.changes = count_changes(plan)
+        if out_dir:
+            result.plan_file = os.path.join(out_dir, f"{profile.name}.json")
+            with open(result.plan_file, "w") as f:
+                f.write(dump_plan(plan, format="json"))
+        if apply:
+            result.applied = len(blueprint.apply(session, plan))
+    except Exception as err:
+        logger.error(f"[{profile.name}] {type(err).__name__}: {err}")
+        result.error = f"{type(err).__name__}: {err}"
+    finally:
+        if session is not None:
+            session.close()
+        result.seconds = round(time.perf_counter() - start, 3)
+    return result
+
+
+def run_accounts(
+    yaml_config: dict,
+    cli_config: dict[str, Any],
+    profiles: list[AccountProfile],
+    out_dir: Optional[str] = None,
+    apply: bool = False,
+    workers: int = DEFAULT_ACCOUNT_WORKERS,
+    connection_factory: Callable[..., Any] = connect,
+) -> list[AccountResult]:
+    """
+    Plan, and optionally apply, the same config on every account in profiles. Accounts run in a pool of
+    worker processes, one account per task, so module-level caches and connections are never shared between
+    two accounts running at once. Results are returned in profile order, and a summary of them is written to
+    out_dir along with a plan file per account.
+    """
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    workers = min(workers, len(profiles))
+    args = (yaml_config, cli_config, out_dir, apply, connection_factory)
+    if workers <= 1:
+        results = [run_account(profile, *args) for profile in profiles]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_account, profile, *args) for profile in profiles]
+            results = [future.result() for future in futures]
+
+    if out_dir:
+        with open(os.path.join(out_dir, SUMMARY_FILE), "w") as f:
+            json.dump({"accounts": [asdict(result) for result in results]}, f, indent=2)
+    return results
+
+
+def format_summary(results: list[AccountResult]) -> str:
+    columns = ["PROFILE", "ACCOUNT", "STATUS", "CREATE", "UPDATE", "TRANSFER", "DROP", "APPLIED", "SECONDS"]
+    rows = []
+    for result in results:
+        rows.append(
+            [
+                result.profile,
+                result.account or "-",
+                "ok" if result.ok else "failed",
+                *[str(result.changes.get(kind, "-")) for kind in ["create", "update", "transfer", "drop"]],
+                "-" if result.applied is None else str(result.applied),
+                f"{result.seconds:.1f}",
+            ]
+        )
+    widths = [max(len(row[idx]) for row in [columns] + rows) for idx in range(len(columns))]
+    lines = ["  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in [columns] + rows]
+
+    failed = [result for result in results if not result.ok]
+    lines.append("")
+    lines.append(f"{len(results) - len(failed)} of {len(results)} accounts succeeded")
+    for result in failed:
+        lines.append(f"  {result.profile}: {result.error}")
+    return "\n".join(lines)
@@ -1,4 +1,6 @@
-from typing import TYPE_CHECKING
+from functools import cache, cached_property, lru_cache
+from typing import TYPE_CHECKING, Iterator
+from weakref import WeakKeyDictionary
 
 import re
 
@@ -64,35 +66,55 @@ NOTIFICATION_INTEGRATION = Keywords("NOTIFICATION INTEGRATION")
 snowflake_sql_comment = pp.Regex(r"--.*").set_name("Snowflake SQL comment")
 
 
-def _split_statements(sql_text):
-    # Define SQL strings
-    single_quote = pp.QuotedString("'", multiline=True, unquote_results=False)
-    double_quote = pp.QuotedString('"', multiline=True, unquote_results=False)
-    double_dollar = pp.QuotedString("$$", multiline=True, unquote_results=False, end_quote_char="$$")
-    triple_dollar = pp.QuotedString("$$$", multiline=True, unquote_results=False, end_quote_char="$$$")
-
-    # Combine all SQL strings into a single parser
-    any_sql_string = pp.MatchFirst([single_quote, double_quote, double_dollar, triple_dollar])
+# Tokens that matter when splitting SQL into statements. Strings and comments that are never closed run to
+# the end of the text, so every character is scanned once.
+_STATEMENT_TOKEN = re.compile(
+    r"""
+    (?P<space>\s+)
+    | (?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?P<string>
+        \$\$\$.*?(?:\$\$\$|\Z)
+        | \$\$.*?(?:\$\$|\Z)
+        | '(?:[^'\\]|\\.|'')*(?:'|\Z)
+        | "(?:[^"]|"")*(?:"|\Z)
+    )
+    | (?P<semicolon>;)
+    | (?P<text>[^\s;'"$/-]+|.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
 
-    # Define other characters
-    other_chars = pp.Word(pp.printables, excludeChars=";") | pp.White()
-    semicolon = pp.Literal(";").suppress()
 
-    # SQL Statement is any sequence of SQL strings and other characters, ended with semicolon
-    parser = pp.OneOrMore(any_sql_string | other_chars).set_parse_action(" ".join) + semicolon
-    parser = parser.ignore(pp.c_style_comment | snowflake_sql_comment)
+def iter_statements(sql_text: str) -> Iterator[str]:
+    """
+    Split SQL text into statements in a single pass, yielding each statement as soon as it ends.
 
-    results = []
-    end = 0
-    for result, start, end in parser.scan_string(sql_text):
-        results.append(result[0])
+    Statements end at semicolons outside of strings, quoted identifiers, $$ blocks and comments. Comments
+    are dropped, runs of whitespace outside of strings become a single space, and empty statements are
+    skipped. The last statement doesn't need a semicolon.
+    """
+    parts: list[str] = []
+    pending_space = False
+    for match in _STATEMENT_TOKEN.finditer(sql_text):
+        kind = match.lastgroup
+        if kind == "space" or kind == "comment":
+            pending_space = bool(parts)
+        elif kind == "semicolon":
+            if parts:
+                yield "".join(parts)
+            parts = []
+            pending_space = False
+        else:
+            if pending_space:
+                parts.append(" ")
+                pending_space = False
+            parts.append(match.group())
+    if parts:
+        yield "".join(parts)
 
-    # Allow last statement to not have a semicolon
-    remainder = sql_text[end:]
-    if remainder.strip():
-        results.append(remainder)
 
-    return results
+def _split_statements(sql_text):
+    return list(iter_statements(sql_text))
 
 
 def _make_scoped_identifier(identifier_list, scope):
@@ -109,8 +131,9 @@ def _make_scoped_identifier(identifier_list, scope):
         raise Exception(f"Unsupported identifier list: {identifier_list}")
 
 
-def _parse_create_header(sql, resource_type, scope):
-    header = pp.And(
+@cache
+def _create_header_parser(resource_type):
+    return pp.And(
         [
             CREATE,
             pp.Opt(OR_REPLACE)("or_replace"),
@@ -121,7 +144,11 @@ def _parse_create_header(sql, resource_type, scope):
             FullyQualifiedIdentifier("resource_identifier"),
             REST_OF_STRING("remainder"),
         ]
-    )
+    ).streamline()
+
+
+def _parse_create_header(sql, resource_type, scope):
+    header = _create_header_parser(resource_type)
     try:
         results = header.parse_string(sql, parse_all=True).as_dict()
         remainder = (results["_skipped"][0] + " " + results.get("remainder", "")).strip(" ;")
@@ -131,6 +158,11 @@ def _parse_create_header(sql, resource_type, scope):
         raise pp.ParseException("Failed to parse header") from err
 
 
+@cache
+def _alter_account_parser():
+    return Keywords("ALTER ACCOUNT SET") + Identifier("name") + EQUALS + pp.MatchFirst([Numeric, ANY])("value")
+
+
 def parse_alter_account_parameter(sql: str):
     """
     ALTER ACCOUNT SET { [ accountParams ] | [ objectParams ] | [ sessionParams ] }
@@ -154,10 +186,8 @@ def parse_alter_account_parameter(sql: str):
         SSO_LOGIN_PAGE = TRUE | FALSE
     """
 
-    alter_account = Keywords("ALTER ACCOUNT SET") + Identifier("name") + EQUALS + pp.MatchFirst([Numeric, ANY])("value")
-
     try:
-        results = alter_account.parse_string(sql, parse_all=True)
+        results = _alter_account_parser().parse_string(sql, parse_all=True)
         results = results.as_dict()
         value = results["value"]
         if value.lower() == "true" or value.lower() == "false":
@@ -177,17 +207,32 @@ def parse_alter_account_parameter(sql: str):
 def parse_grant(sql: str):
 
     # Check for role grant
-    if _contains(Keywords("GRANT ROLE"), sql):
+    if _contains(_keywords("GRANT ROLE"), sql):
         return _parse_role_grant(sql)
 
     # Check for ownership grant
-    elif _contains(Keywords("GRANT OWNERSHIP"), sql):
+    elif _contains(_keywords("GRANT OWNERSHIP"), sql):
         raise NotImplementedError("Ownership grant not supported")
         # return {"resource_key": "ownership_grant"}
     else:
         return _parse_priv_grant(sql)
 
 
+@cache
+def _priv_grant_parser():
+    grant = (
+        GRANT
+        + pp.SkipTo(ON)("privs")
+        + ON
+        + pp.SkipTo(TO)("on_stmt")
+        + TO
+        + pp.Opt(Keyword("ROLE").suppress())
+        + Identifier("to")
+        + pp.Opt(Keywords("WITH GRANT OPTION").suppress())
+    )
+    return grant.ignore(pp.c_style_comment | snowflake_sql_comment)
+
+
 def _parse_priv_grant(sql: str):
     """
     GRANT {
@@ -200,20 +245,8 @@ def _parse_priv_grant(sql: str):
     }
     TO [ ROLE ] <role_name> [ WITH GRANT OPTION ]
     """
-    grant = (
-        GRANT
-        + pp.SkipTo(ON)("privs")
-        + ON
-        + pp.SkipTo(TO)("on_stmt")
-        + TO
-        + pp.Opt(Keyword("ROLE").suppress())
-        + Identifier("to")
-        + pp.Opt(Keywords("WITH GRANT OPTION").suppress())
-    )
-    grant = grant.ignore(pp.c_style_comment | snowflake_sql_comment)
-
     try:
-        results = grant.parse_string(sql, parse_all=True)
+        results = _priv_grant_parser().parse_string(sql, parse_all=True)
         results = results.as_dict()
 
         privs = [priv.strip(" ") for priv in results["privs"].split(",")]
@@ -237,11 +270,8 @@ def _parse_priv_grant(sql: str):
         raise pp.ParseException("Failed to parse grant") from err
 
 
-def _parse_role_grant(sql: str):
-    """
-    GRANT ROLE <name> TO { ROLE <parent_role_name> | USER <user_name> }
-    """
-
+@cache
+def _role_grant_parser():
     grant = (
         GRANT
         + Keyword("ROLE").suppress()
@@ -250,10 +280,15 @@ def _parse_role_grant(sql: str):
         + pp.MatchFirst([Keyword("ROLE"), Keyword("USER")])("to_type")
         + Identifier("to")
     )
-    grant = grant.ignore(pp.c_style_comment | snowflake_sql_comment)
+    return grant.ignore(pp.c_style_comment | snowflake_sql_comment)
 
+
+def _parse_role_grant(sql: str):
+    """
+    GRANT ROLE <name> TO { ROLE <parent_role_name> | USER <user_name> }
+    """
     try:
-        results = grant.parse_string(sql, parse_all=True)
+        results = _role_grant_parser().parse_string(sql, parse_all=True)
         results = results.as_dict()
         return {
             "role": results["role"],
@@ -279,68 +314,81 @@ def _contains(parser, text):
     return parse_results is not None
 
 
+@cache
+def _keywords(keywords: str) -> pp.ParserElement:
+    return Keywords(keywords)
+
+
+@cache
+def _literals(keywords: str) -> pp.ParserElement:
+    return Literals(keywords)
+
+
 def _resolve_database(sql):
-    if _contains(Keywords("FROM SHARE"), sql):
+    if _contains(_keywords("FROM SHARE"), sql):
         return "shared_database"
     else:
         return "database"
 
 
 def _resolve_file_format(sql):
-    if _contains(Literals("TYPE = CSV"), sql):
+    if _contains(_literals("TYPE = CSV"), sql):
         return "csv_file_format"
-    elif _contains(Literals("TYPE = JSON"), sql):
+    elif _contains(_literals("TYPE = JSON"), sql):
         return "json_file_format"
-    elif _contains(Literals("TYPE = PARQUET"), sql):
+    elif _contains(_literals("TYPE = PARQUET"), sql):
         return "parquet_file_format"
-    elif _contains(Literals("TYPE = XML"), sql):
+    elif _contains(_literals("TYPE = XML"), sql):
         return "xml_file_format"
-    elif _contains(Literals("TYPE = AVRO"), sql):
+    elif _contains(_literals("TYPE = AVRO"), sql):
         return "avro_file_format"
-    elif _contains(Literals("TYPE = ORC"), sql):
+    elif _contains(_literals("TYPE = ORC"), sql):
         return "orc_file_format"
 
 
 def _resolve_stage(sql):
-    if _contains(Literals("URL ="), sql):
+    if _contains(_literals("URL ="), sql):
         return "external_stage"
     else:
         return "internal_stage"
 
 
 def _resolve_stream(sql):
-    if _contains(Literals("ON TABLE"), sql):
+    if _contains(_literals("ON TABLE"), sql):
         return "table_stream"
-    elif _contains(Literals("ON EXTERNAL TABLE"), sql):
+    elif _contains(_literals("ON EXTERNAL TABLE"), sql):
         return "external_table_stream"
-    elif _contains(Literals("ON VIEW"), sql):
+    elif _contains(_literals("ON VIEW"), sql):
         return "view_stream"
-    elif _contains(Literals("ON STAGE"), sql):
+    elif _contains(_literals("ON STAGE"), sql):
         return "stage_stream"
 
 
 def _resolve_storage_integration(sql):
-    if _contains(Literals("STORAGE_PROVIDER = 'S3'"), sql):
+    if _contains(_literals("STORAGE_PROVIDER = 'S3'"), sql):
         return "s3_storage_integration"
-    elif _contains(Literals("STORAGE_PROVIDER = 'GCS'"), sql):
+    elif _contains(_literals("STORAGE_PROVIDER = 'GCS'"), sql):
         return "gcs_storage_integration"
-    elif _contains(Literals("STORAGE_PROVIDER = 'AZURE'"), sql):
+    elif _contains(_literals("STORAGE_PROVIDER = 'AZURE'"), sql):
         return "azure_storage_integration"
 
 
 def _resolve_notification_integration(sql):
     return "email_notification_integration"
-    # if _contains(Literals("TYPE = EMAIL"), sql):
+    # if _contains(_literals("TYPE = EMAIL"), sql):
     #     return "email_notification_integration"
-    # elif _contains(Literals("TYPE = QUEUE"), sql):
+    # elif _contains(_literals("TYPE = QUEUE"), sql):
     #     return "aws_outbound_notification_integration"
 
 
-def resolve_resource_class(sql):
-    create_header = CREATE + pp.Opt(OR_REPLACE) + pp.Opt(TEMPORARY) + pp.Opt(TRANSIENT) + pp.Opt(SECURE)
-    sql = _consume_tokens(create_header, sql)
+@cache
+def _resource_class_header():
+    return CREATE + pp.Opt(OR_REPLACE) + pp.Opt(TEMPORARY) + pp.Opt(TRANSIENT) + pp.Opt(SECURE)
+
 
-    lexicon = Lexicon(
+@cache
+def _resource_class_lexicon():
+    return Lexicon(
         {
             "ALERT": ResourceType.ALERT,
             "DATABASE": ResourceType.DATABASE,
@@ -365,6 +413,11 @@ def resolve_resource_class(sql):
         }
     )
 
+
+def resolve_resource_class(sql):
+    sql = _consume_tokens(_resource_class_header(), sql)
+    lexicon = _resource_class_lexicon()
+
     try:
         resource_type = convert_match(lexicon, sql)
         return resource_type
@@ -387,10 +440,14 @@ class Lexicon:
             self._actions.append(action)
             idx += 1
 
-    @property
+    @cached_property
     def parser(self):
         return pp.MatchFirst(self._words)
 
+    @cached_property
+    def anchored_parser(self):
+        return pp.StringStart() + self.parser
+
     def get_action(self, parse_result):
         result_names = list(parse_result.as_dict().keys())
         idx = int(result_names[0])
@@ -398,8 +455,7 @@ class Lexicon:
 
 
 def convert_match(lexicon: Lexicon, text):
-    parser = pp.StringStart() + lexicon.parser
-    parse_result, _, end = _first_match(parser, text)
+    parse_result, _, end = _first_match(lexicon.anchored_parser, text)
     if parse_result is None:
         raise pp.ParseException(f"Could not match {text}")
     action_or_str = lexicon.get_action(parse_result)
@@ -454,17 +510,28 @@ def _marker(name):
     return pp.Empty().set_parse_action(lambda s, loc, toks, marker=name: marker)
 
 
+# One compiled parser per Props instance, built the first time the props are parsed
+_PROPS_PARSERS: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def _props_parser(props) -> pp.ParserElement:
+    parser = _PROPS_PARSERS.get(props)
+    if parser is None:
+        lexicon = []
+        for prop_kwarg, prop in props.props.items():
+            lexicon.append(prop.parser.copy() + _marker(prop_kwarg))
+        parser = pp.MatchFirst(lexicon).ignore(pp.c_style_comment).streamline()
+        _PROPS_PARSERS[props] = parser
+    return parser
+
+
 def _parse_props(props, sql):
     if sql.strip() == "":
         return {}
 
     found_props = {}
 
-    lexicon = []
-    for prop_kwarg, prop in props.props.items():
-        lexicon.append(prop.parser.copy() + _marker(prop_kwarg))
-
-    parser = pp.MatchFirst(lexicon).ignore(pp.c_style_comment)
+    parser = _props_parser(props)
     if props.start_token:
         sql = _consume_tokens(props.start_token, sql)
 
@@ -514,7 +581,8 @@ def _format_props(props):
     return "\n".join(buf)
 
 
-def _parse_column(sql):
+@cache
+def _column_parser():
     collate = Keyword("COLLATE").suppress() + ANY("collate")
     comment = Keyword("COMMENT").suppress() + ANY("comment")
     not_null = Keywords("NOT NULL").set_parse_action(lambda _: True)("not_null")
@@ -524,7 +592,7 @@ def _parse_column(sql):
 
     data_type = (Identifier("type_name") + pp.Optional(_in_parens(pp.Word(pp.nums + ",")))("type_params"))("data_type")
 
-    column = (
+    return (
         Identifier("name")
         + data_type
         + pp.Opt(collate)
@@ -533,8 +601,11 @@ def _parse_column(sql):
         + pp.Opt(constraint)
         + REST_OF_STRING("remainder")
     )
+
+
+def _parse_column(sql):
     try:
-        results = column.parse_string(sql, parse_all=True)
+        results = _column_parser().parse_string(sql, parse_all=True)
         results = results.as_dict()
         # Recombine data type
         type_name = results.pop("type_name")
@@ -549,8 +620,13 @@ def _parse_column(sql):
         raise pp.ParseException("Failed to parse column") from err
 
 
+@cache
+def _table_schema_parser():
+    return pp.original_text_for(pp.nested_expr())
+
+
 def _parse_table_schema(sql):
-    columns_blob, start, end = _first_match(pp.original_text_for(pp.nested_expr()), sql)
+    columns_blob, start, end = _first_match(_table_schema_parser(), sql)
     columns_blob = columns_blob[0][1:-1]  # .strip("()")
     columns = []
     while columns_blob:
@@ -580,6 +656,17 @@ def _parse_stage_path(stage_path_str):
     return stage_path
 
 
+# Number of parsed view and dynamic table definitions to keep, keyed by their DDL text. Definitions rarely change
+# between the fetches of one plan. The cache is bounded tightly because long-lived processes, like the plan server,
+# would otherwise hold on to every definition they have seen; data_provider.reset_session_caches clears it.
+DDL_TEXT_CACHE_SIZE = 1024
+
+_REFRESH_MODE = re.compile(r"refresh_mode\s*=\s*'(AUTO|FULL|INCREMENTAL)'")
+_INITIALIZE = re.compile(r"initialize\s*=\s*'(ON_CREATE|ON_SCHEDULE)'")
+_AS_QUERY = re.compile(r"\s+AS\s+(.*)$", re.IGNORECASE)
+
+
+@lru_cache(maxsize=DDL_TEXT_CACHE_SIZE)
 def _parse_dynamic_table_text(text: str):
     """
     To the annoyance of some, the only way to get the canonical values of refresh_mode, initialize, and as_
@@ -605,17 +692,17 @@ def _parse_dynamic_table_text(text: str):
     text = text.replace("\n", " ")
 
     # Parse refresh_mode
-    match_refresh_mode = re.search(r"refresh_mode\s*=\s*'(AUTO|FULL|INCREMENTAL)'", text)
+    match_refresh_mode = _REFRESH_MODE.search(text)
     refresh_mode = match_refresh_mode.group(1) if match_refresh_mode else None
 
     # Parse initialize
-    match_initialize = re.search(r"initialize\s*=\s*'(ON_CREATE|ON_SCHEDULE)'", text)
+    match_initialize = _INITIALIZE.search(text)
     initialize = match_initialize.group(1) if match_initialize else None
 
     # Parse as
     # 2024-06-19: discovered this failing today because the "AS" was lowercase. Unclear
     # if this was due to a Snowflake behavior change or some other factor.
-    match_as = re.search(r"\s+AS\s+(.*)$", text, re.IGNORECASE)
+    match_as = _AS_QUERY.search(text)
     as_ = match_as.group(1) if match_as else None
 
     return (
@@ -625,6 +712,7 @@ def _parse_dynamic_table_text(text: str):
     )
 
 
+@lru_cache(maxsize=DDL_TEXT_CACHE_SIZE)
 def parse_view_ddl(text: str):
     """
     Parse the DDL for a view.
@@ -644,7 +732,7 @@ def parse_view_ddl(text: str):
     text = text.replace("\n", " ")
 
     # Parse as
-    match_as = re.search(r"\s+AS\s+(.*)$", text, re.IGNORECASE)
+    match_as = _AS_QUERY.search(text)
     return match_as.group(1) if match_as else None
 
 
@@ -661,6 +749,17 @@ def parse_function_name(header: str):
     return prefix
 
 
+@cache
+def _copy_into_parser():
+    return (
+        Keyword("COPY").suppress()
+        + Keyword("INTO").suppress()
+        + FullyQualifiedIdentifier("destination")
+        + Keyword("FROM").suppress()
+        + (Literal("@") + FullyQualifiedIdentifier("stage"))
+    )
+
+
 def _parse_copy_into(sql: str):
     """
     /* Standard data load */
@@ -684,16 +783,8 @@ def _parse_copy_into(sql: str):
     [ copyOptions ]
     """
 
-    copy_into_parser = (
-        Keyword("COPY").suppress()
-        + Keyword("INTO").suppress()
-        + FullyQualifiedIdentifier("destination")
-        + Keyword("FROM").suppress()
-        + (Literal("@") + FullyQualifiedIdentifier("stage"))
-    )
-
     try:
-        results = copy_into_parser.parse_string(sql, parse_all=True)
+        results = _copy_into_parser().parse_string(sql, parse_all=True)
         return results.as_dict()
     except pp.ParseException as err:
         raise Exception(f"Failed to parse COPY INTO statement: {err}")
@@ -0,0 +1,211 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+from snowflake.connector import SnowflakeConnection
+
+from . import data_provider
+from .blueprint import Manifest, ManifestResource, Plan, hash_resource_data
+from .blueprint_config import BlueprintConfig
+from .client import execute
+from .config_cache import ConfigCache, content_digest
+from .data_provider import SessionContext
+from .enums import ResourceType, RunMode
+from .identifiers import URN, resource_type_for_label
+from .resource_name import ResourceName
+
+logger = logging.getLogger("snowbytes")
+
+
+@dataclass(frozen=True)
+class _Listing:
+    sql: str
+    # Columns that change without the object being altered, like which role is the session's current one.
+    # Every other column is part of the fingerprint.
+    volatile: frozenset[str] = field(default_factory=frozenset)
+
+
+# Account-wide SHOW listings that carry every field the type's fetcher returns, so their rows change whenever an
+# object of the type is created, dropped, altered or changes hands. Types whose fetchers also read parameters,
+# DESC output or columns, like databases, schemas, users, views and warehouses, have no listing: an ALTER ... SET
+# of a parameter doesn't show up in SHOW, and a plan of them is never cached.
+ACCOUNT_LISTINGS: dict[ResourceType, _Listing] = {
+    ResourceType.ROLE: _Listing("SHOW ROLES", frozenset({"is_current", "is_default", "is_inherited"})),
+    ResourceType.TAG: _Listing("SHOW TAGS IN ACCOUNT"),
+}
+
+# Grants have no account-wide listing. They are fingerprinted with the per-grantee SHOW statements that
+# fetching them runs anyway, so on a cache miss fetch_remote_state reads the same rows from the query cache.
+GRANT_TYPES = {ResourceType.GRANT, ResourceType.FUTURE_GRANT, ResourceType.ROLE_GRANT}
+
+
+def manifest_digest(manifest: Manifest) -> str:
+    """
+    Digest of the finalized manifest: every URN with the normalized data of its resource, and every ref.
+    Manifest order is part of the digest, since the plan breaks ties in that order.
+    """
+    entries: list[tuple] = []
+    for urn, item in manifest.items():
+        if isinstance(item, ManifestResource):
+            entries.append(
+                (str(urn), item.resource_cls.__name__, hash_resource_data(item.data), item.implicit, item.lifecycle)
+            )
+        else:
+            entries.append((str(urn), None))
+    refs = [(str(urn), str(ref)) for urn, ref in manifest.refs]
+    return content_digest("manifest", entries, refs)
+
+
+def _fingerprint_rows(rows: list[dict[str, Any]], volatile: frozenset[str] = frozenset()) -> list[str]:
+    # SHOW output order isn't guaranteed, so rows are compared as a sorted list
+    return sorted(
+        json.dumps({key: value for key, value in row.items() if key not in volatile}, sort_keys=True, default=str)
+        for row in rows
+    )
+
+
+# Grantees are kept as the strings fetch_grant and fetch_future_grant put in their SQL, so that both send
+# the same statements
+Grantee = tuple[ResourceType, str]
+
+
+def _show_grants_to(session: SnowflakeConnection, grantee: Grantee) -> list[dict]:
+    role_type, name = grantee
+    return data_provider._show_grants_to_role(session, ResourceName(name), role_type=role_type, cacheable=True)
+
+
+def _show_future_grants_to(session: SnowflakeConnection, grantee: Grantee) -> list[dict]:
+    role_type, name = grantee
+    return execute(session, f"SHOW FUTURE GRANTS TO {role_type} {name}", cacheable=True)
+
+
+def _show_grants_of(session: SnowflakeConnection, grantee: Grantee) -> list[dict]:
+    _, name = grantee
+    return data_provider._show_grants_of_role(session, ResourceName(name), cacheable=True)
+
+
+def _grantee(urn: URN) -> Grantee:
+    if urn.resource_type == ResourceType.ROLE_GRANT:
+        return ResourceType.ROLE, str(urn.fqn.name)
+    to_type, to = urn.fqn.params["to"].split("/", 1)
+    return resource_type_for_label(to_type), to
+
+
+def _part_key(resource_type: ResourceType, grantee: Optional[Grantee] = None) -> str:
+    if grantee is None:
+        return str(resource_type)
+    return f"{resource_type}:{grantee[0]}/{grantee[1]}"
+
+
+def fingerprint_key(urn: URN) -> Optional[str]:
+    """
+    The fingerprint part that changes when the resource at urn does, or None if no part covers it
+    """
+    if urn.resource_type in ACCOUNT_LISTINGS:
+        return _part_key(urn.resource_type)
+    if urn.resource_type in GRANT_TYPES:
+        return _part_key(urn.resource_type, _grantee(urn))
+    return None
+
+
+def fingerprint_parts(
+    session: SnowflakeConnection,
+    resource_types: Iterable[ResourceType],
+    urns: Iterable[URN] = (),
+    all_roles: bool = False,
+) -> dict[str, str]:
+    """
+    Digest the listings that fingerprint resource_types, keyed like fingerprint_key. Account-wide listings
+    cover every resource of their type. Grants are covered per grantee, for the grantees of the grants in urns,
+    or for every role if all_roles is set. Resource types without a listing are ignored.
+    """
+    resource_types = set(resource_types)
+    parts: dict[str, str] = {}
+    for resource_type in sorted(resource_types & set(ACCOUNT_LISTINGS), key=str):
+        listing = ACCOUNT_LISTINGS[resource_type]
+        rows = execute(session, listing.sql, cacheable=True)
+        parts[_part_key(resource_type)] = content_digest(_fingerprint_rows(rows, listing.volatile))
+
+    grant_types = resource_types & GRANT_TYPES
+    if not grant_types:
+        return parts
+    grantees: dict[ResourceType, set[Grantee]] = {resource_type: set() for resource_type in grant_types}
+    for urn in urns:
+        if urn.resource_type in grant_types:
+            grantees[urn.resource_type].add(_grantee(urn))
+    if all_roles:
+        for role in data_provider._list_role_names(session):
+            for items in grantees.values():
+                items.add((ResourceType.ROLE, str(role)))
+
+    shows = {
+        ResourceType.GRANT: _show_grants_to,
+        ResourceType.FUTURE_GRANT: _show_future_grants_to,
+        ResourceType.ROLE_GRANT: _show_grants_of,
+    }
+    for resource_type in sorted(grant_types, key=str):
+        ordered = sorted(grantees[resource_type], key=str)
+        for grantee, rows in data_provider._fan_out_show(session, ordered, shows[resource_type]):
+            parts[_part_key(resource_type, grantee)] = content_digest(_fingerprint_rows(rows))
+    return parts
+
+
+def remote_fingerprint(session: SnowflakeConnection, manifest: Manifest, config: BlueprintConfig) -> Optional[str]:
+    """
+    A cheap fingerprint of the part of the account a plan of manifest depends on, or None when the manifest
+    has resource types that can't be fingerprinted without fetching them.
+    """
+    resource_types = {urn.resource_type for urn in manifest.urns}
+    resource_types.update(ref.resource_type for _, ref in manifest.refs)
+    if config.run_mode == RunMode.SYNC and config.allowlist:
+        resource_types.update(config.allowlist)
+    # The account always exists, and is the only account a session can see
+    resource_types.discard(ResourceType.ACCOUNT)
+
+    unsupported = resource_types - set(ACCOUNT_LISTINGS) - GRANT_TYPES
+    if unsupported:
+        logger.info(
+            f"Plan cache skipped, only configs of roles, tags and grants are cached. "
+            f"Found: {', '.join(sorted(str(t) for t in unsupported))}"
+        )
+        return None
+
+    # List what fetch_remote_state will be able to see
+    data_provider.use_secondary_roles(session, all=True)
+
+    # Sync drops grants the manifest doesn't have, so every role's grants matter
+    parts = fingerprint_parts(session, resource_types, manifest.urns, all_roles=config.run_mode == RunMode.SYNC)
+    return content_digest("remote", sorted(parts.items()))
+
+
+class PlanCache:
+    """
+    Plans stored in a ConfigCache, keyed by the manifest digest, the session, the planning config and a
+    fingerprint of the account. When neither the config nor the account has changed since a plan was stored,
+    Blueprint.plan returns it without fetching the remote state.
+    """
+
+    def __init__(self, store: ConfigCache):
+        self._store = store
+
+    def key(
+        self,
+        session: SnowflakeConnection,
+        session_ctx: SessionContext,
+        manifest: Manifest,
+        config: BlueprintConfig,
+    ) -> Optional[str]:
+        fingerprint = remote_fingerprint(session, manifest, config)
+        if fingerprint is None:
+            return None
+        planning_config = (config.run_mode, config.allowlist, config.scope, config.database, config.schema)
+        return content_digest("plan", manifest_digest(manifest), dict(session_ctx), planning_config, fingerprint)
+
+    def get(self, key: str) -> Optional[Plan]:
+        if key not in self._store:
+            return None
+        return self._store.get(key, list)
+
+    def set(self, key: str, plan: Plan):
+        self._store.set(key, plan)
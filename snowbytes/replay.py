@@ -0,0 +1,243 @@
+import datetime
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal
+from typing import Any, Callable, Optional, Union
+
+from snowflake.connector.errors import ProgrammingError
+
+from .exceptions import UnrecordedStatementException
+
+TRACE_VERSION = 1
+
+
+@dataclass
+class Capture:
+    """
+    One statement sent through a connection: the role it ran as, the rows it returned or the error it
+    raised, and the role the session had afterwards.
+    """
+
+    role: Optional[str]
+    sql: str
+    rows: list = field(default_factory=list)
+    errno: Optional[int] = None
+    msg: Optional[str] = None
+    role_after: Optional[str] = None
+    duration: float = 0.0
+
+
+@dataclass
+class SessionTrace:
+    user: Optional[str] = None
+    role: Optional[str] = None
+    captures: list[Capture] = field(default_factory=list)
+
+    def save(self, path: str):
+        trace = {
+            "version": TRACE_VERSION,
+            "user": self.user,
+            "role": self.role,
+            "captures": [asdict(capture) for capture in self.captures],
+        }
+        with open(path, "w") as f:
+            json.dump(trace, f, default=_encode_value)
+
+    @classmethod
+    def load(cls, path: str) -> "SessionTrace":
+        with open(path) as f:
+            trace = json.load(f, object_hook=_decode_value)
+        if trace.get("version") != TRACE_VERSION:
+            raise ValueError(f"Unsupported session trace version in {path}: {trace.get('version')}")
+        captures = [Capture(**capture) for capture in trace["captures"]]
+        return cls(user=trace["user"], role=trace["role"], captures=captures)
+
+
+def _encode_value(value: Any) -> dict:
+    # SHOW and DESCRIBE rows hold timestamps and numbers that JSON can't represent natively
+    if isinstance(value, datetime.datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    if isinstance(value, bytes):
+        return {"__bytes__": value.hex()}
+    raise TypeError(f"Can't record value of type {type(value).__name__}: {value!r}")
+
+
+def _decode_value(obj: dict) -> Any:
+    if len(obj) == 1:
+        if "__datetime__" in obj:
+            return datetime.datetime.fromisoformat(obj["__datetime__"])
+        if "__date__" in obj:
+            return datetime.date.fromisoformat(obj["__date__"])
+        if "__decimal__" in obj:
+            return Decimal(obj["__decimal__"])
+        if "__bytes__" in obj:
+            return bytes.fromhex(obj["__bytes__"])
+    return obj
+
+
+class SessionRecorder:
+    """
+    Captures every statement sent through the connections it wraps, so the session can be replayed
+    offline with SessionReplay. Only DictCursor rows can be replayed, which is what client.execute uses.
+
+        recorder = SessionRecorder()
+        session = recorder.connect()
+        blueprint.plan(session)
+        recorder.trace.save("plan_trace.json")
+    """
+
+    def __init__(self):
+        self.trace = SessionTrace()
+        self._lock = threading.Lock()
+
+    def connect(self, **kwargs) -> "RecordingConnection":
+        from .operations.connector import connect
+
+        return self.wrap(connect(**kwargs))
+
+    def wrap(self, connection) -> "RecordingConnection":
+        if self.trace.user is None:
+            self.trace.user = connection.user
+            self.trace.role = connection.role
+        return RecordingConnection(connection, self)
+
+    def _add(self, capture: Capture):
+        with self._lock:
+            self.trace.captures.append(capture)
+
+
+class RecordingConnection:
+    def __init__(self, connection, recorder: SessionRecorder):
+        self._connection = connection
+        self._recorder = recorder
+
+    def __getattr__(self, name: str):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs) -> "RecordingCursor":
+        return RecordingCursor(self, self._connection.cursor(*args, **kwargs))
+
+
+class RecordingCursor:
+    def __init__(self, connection: RecordingConnection, cursor):
+        self.connection = connection
+        self._cursor = cursor
+        self._rows: deque = deque()
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+    def execute(self, sql: str, *args, **kwargs) -> "RecordingCursor":
+        session = self.connection._connection
+        capture = Capture(role=session.role, sql=sql)
+        start = time.perf_counter()
+        try:
+            self._cursor.execute(sql, *args, **kwargs)
+            capture.rows = self._cursor.fetchall()
+        except ProgrammingError as err:
+            capture.errno = err.errno
+            capture.msg = err.msg
+            raise
+        finally:
+            capture.duration = time.perf_counter() - start
+            capture.role_after = session.role
+            self.connection._recorder._add(capture)
+        self._rows = deque(capture.rows)
+        return self
+
+    def fetchall(self) -> list:
+        rows = list(self._rows)
+        self._rows.clear()
+        return rows
+
+    def fetchone(self):
+        return self._rows.popleft() if self._rows else None
+
+
+Latency = Union[float, Callable[[Capture], float]]
+
+
+class SessionReplay:
+    """
+    Serves a recorded SessionTrace to connections that client.execute can use in place of a Snowflake
+    connection. Each statement is answered with the captures recorded for the same role and SQL text,
+    in recorded order, and the last capture is repeated once they run out. Connections opened from the
+    same replay share this state, like sessions on the same account.
+
+    latency adds a delay to every statement: a number of seconds, or a function of the capture, eg.
+    `lambda capture: capture.duration` to replay the recorded timings.
+    """
+
+    def __init__(self, trace: SessionTrace, latency: Optional[Latency] = None):
+        self.trace = trace
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._responses: dict[tuple[Optional[str], str], deque[Capture]] = {}
+        for capture in trace.captures:
+            self._responses.setdefault((capture.role, capture.sql), deque()).append(capture)
+
+    @classmethod
+    def load(cls, path: str, latency: Optional[Latency] = None) -> "SessionReplay":
+        return cls(SessionTrace.load(path), latency=latency)
+
+    def connect(self, **kwargs) -> "ReplayConnection":
+        # Accepts and ignores connect()'s arguments, so replay can be dropped in as a connection factory
+        return ReplayConnection(self)
+
+    def _respond(self, role: Optional[str], sql: str) -> Capture:
+        with self._lock:
+            responses = self._responses.get((role, sql))
+            if not responses:
+                raise UnrecordedStatementException(f"No recorded response for [{role}] > {sql}")
+            capture = responses.popleft() if len(responses) > 1 else responses[0]
+        if self.latency is not None:
+            delay = self.latency(capture) if callable(self.latency) else self.latency
+            time.sleep(delay)
+        return capture
+
+
+class ReplayConnection:
+    def __init__(self, replay: SessionReplay):
+        self._replay = replay
+        self.user = replay.trace.user
+        self.role = replay.trace.role
+        self.closed = False
+
+    def cursor(self, *args, **kwargs) -> "ReplayCursor":
+        return ReplayCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+class ReplayCursor:
+    def __init__(self, connection: ReplayConnection):
+        self.connection = connection
+        self._rows: deque = deque()
+
+    def execute(self, sql: str, *args, **kwargs) -> "ReplayCursor":
+        capture = self.connection._replay._respond(self.connection.role, sql)
+        self.connection.role = capture.role_after
+        if capture.errno is not None:
+            raise ProgrammingError(msg=capture.msg, errno=capture.errno)
+        # Copy rows, since callers are free to modify them
+        self._rows = deque(dict(row) if isinstance(row, dict) else row for row in capture.rows)
+        return self
+
+    def fetchall(self) -> list:
+        rows = list(self._rows)
+        self._rows.clear()
+        return rows
+
+    def fetchone(self):
+        return self._rows.popleft() if self._rows else None
+
+    def close(self):
+        pass
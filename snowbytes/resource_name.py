@@ -58,7 +58,8 @@ class ResourceName:
         return f"Resource:{name}"
 
     def __hash__(self):
-        return hash(str(self))
+        # Must agree with __eq__, which treats "ABC" and ABC as the same name
+        return hash(self._name if self._quoted else self._name.upper())
 
     def __str__(self):
         return f'"{self._name}"' if self._quoted else self._name.upper()
@@ -86,4 +87,11 @@ class ResourceName:
         return self._name.startswith(prefix)
 
 
-yaml.add_representer(ResourceName, lambda dumper, data: dumper.represent_str(str(data)))
+def _represent_resource_name(dumper, data):
+    return dumper.represent_str(str(data))
+
+
+yaml.add_representer(ResourceName, _represent_resource_name)
+# Exports are written with the libyaml emitter when it's available, which has its own representers
+if hasattr(yaml, "CDumper"):
+    yaml.add_representer(ResourceName, _represent_resource_name, Dumper=yaml.CDumper)
@@ -1,70 +1,155 @@
-from .account import Account
-from .account_parameter import AccountParameter
-from .aggregation_policy import AggregationPolicy
-from .alert import Alert
-from .api_integration import APIIntegration
-from .authentication_policy import AuthenticationPolicy
-from .catalog_integration import GlueCatalogIntegration, ObjectStoreCatalogIntegration
-from .column import Column
-from .compute_pool import ComputePool
-from .database import Database
-from .dynamic_table import DynamicTable
-from .event_table import EventTable
-from .external_access_integration import ExternalAccessIntegration
-from .external_function import ExternalFunction
-from .external_volume import ExternalVolume
-from .failover_group import FailoverGroup
-from .file_format import CSVFileFormat, JSONFileFormat, ParquetFileFormat
-from .function import JavascriptUDF, PythonUDF
-from .grant import FutureGrant, Grant, GrantOnAll, RoleGrant, DatabaseRoleGrant
-from .hybrid_table import HybridTable
-from .iceberg_table import SnowflakeIcebergTable
-from .image_repository import ImageRepository
-from .masking_policy import MaskingPolicy
-from .materialized_view import MaterializedView
-from .network_policy import NetworkPolicy
-from .network_rule import NetworkRule
-from .notebook import Notebook
-from .notification_integration import (
-    AWSOutboundNotificationIntegration,
-    AzureInboundNotificationIntegration,
-    AzureOutboundNotificationIntegration,
-    EmailNotificationIntegration,
-    GCPInboundNotificationIntegration,
-    GCPOutboundNotificationIntegration,
-)
-from .packages_policy import PackagesPolicy
-from .password_policy import PasswordPolicy
-from .pipe import Pipe
-from .procedure import PythonStoredProcedure
-from .replication_group import ReplicationGroup
-from .resource import Resource
-from .resource_monitor import ResourceMonitor
-from .role import DatabaseRole, Role
-from .schema import Schema
-from .secret import GenericSecret, OAuthSecret, PasswordSecret
-from .security_integration import (
-    APIAuthenticationSecurityIntegration,
-    SnowflakePartnerOAuthSecurityIntegration,
-    SnowservicesOAuthSecurityIntegration,
-)
-from .sequence import Sequence
-from .service import Service
-from .share import Share
-from .stage import ExternalStage, InternalStage
-from .storage_integration import (
-    AzureStorageIntegration,
-    GCSStorageIntegration,
-    S3StorageIntegration,
-)
-from .stream import StageStream, TableStream, ViewStream  # ExternalTableStream
-from .table import Table  # , CreateTableAsSelect
-from .tag import Tag, TagReference
-from .task import Task
-from .scanner_package import ScannerPackage
-from .user import User
-from .view import View
-from .warehouse import Warehouse
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .account import Account
+    from .account_parameter import AccountParameter
+    from .aggregation_policy import AggregationPolicy
+    from .alert import Alert
+    from .api_integration import APIIntegration
+    from .authentication_policy import AuthenticationPolicy
+    from .catalog_integration import GlueCatalogIntegration, ObjectStoreCatalogIntegration
+    from .column import Column
+    from .compute_pool import ComputePool
+    from .database import Database
+    from .dynamic_table import DynamicTable
+    from .event_table import EventTable
+    from .external_access_integration import ExternalAccessIntegration
+    from .external_function import ExternalFunction
+    from .external_volume import ExternalVolume
+    from .failover_group import FailoverGroup
+    from .file_format import CSVFileFormat, JSONFileFormat, ParquetFileFormat
+    from .function import JavascriptUDF, PythonUDF
+    from .grant import FutureGrant, Grant, GrantOnAll, RoleGrant, DatabaseRoleGrant
+    from .hybrid_table import HybridTable
+    from .iceberg_table import SnowflakeIcebergTable
+    from .image_repository import ImageRepository
+    from .masking_policy import MaskingPolicy
+    from .materialized_view import MaterializedView
+    from .network_policy import NetworkPolicy
+    from .network_rule import NetworkRule
+    from .notebook import Notebook
+    from .notification_integration import (
+        AWSOutboundNotificationIntegration,
+        AzureInboundNotificationIntegration,
+        AzureOutboundNotificationIntegration,
+        EmailNotificationIntegration,
+        GCPInboundNotificationIntegration,
+        GCPOutboundNotificationIntegration,
+    )
+    from .packages_policy import PackagesPolicy
+    from .password_policy import PasswordPolicy
+    from .pipe import Pipe
+    from .procedure import PythonStoredProcedure
+    from .replication_group import ReplicationGroup
+    from .resource import Resource
+    from .resource_monitor import ResourceMonitor
+    from .role import DatabaseRole, Role
+    from .schema import Schema
+    from .secret import GenericSecret, OAuthSecret, PasswordSecret
+    from .security_integration import (
+        APIAuthenticationSecurityIntegration,
+        SnowflakePartnerOAuthSecurityIntegration,
+        SnowservicesOAuthSecurityIntegration,
+    )
+    from .sequence import Sequence
+    from .service import Service
+    from .share import Share
+    from .stage import ExternalStage, InternalStage
+    from .storage_integration import (
+        AzureStorageIntegration,
+        GCSStorageIntegration,
+        S3StorageIntegration,
+    )
+    from .stream import StageStream, TableStream, ViewStream  # ExternalTableStream
+    from .table import Table  # , CreateTableAsSelect
+    from .tag import Tag, TagReference
+    from .task import Task
+    from .scanner_package import ScannerPackage
+    from .user import User
+    from .view import View
+    from .warehouse import Warehouse
+
+# The module that defines each resource class. Resource modules are imported the first time one of their
+# classes is used, so that importing snowbytes doesn't have to build every resource class and grammar.
+_RESOURCE_MODULES = {
+    "Account": "account",
+    "AccountParameter": "account_parameter",
+    "AggregationPolicy": "aggregation_policy",
+    "Alert": "alert",
+    "APIIntegration": "api_integration",
+    "AuthenticationPolicy": "authentication_policy",
+    "GlueCatalogIntegration": "catalog_integration",
+    "ObjectStoreCatalogIntegration": "catalog_integration",
+    "Column": "column",
+    "ComputePool": "compute_pool",
+    "Database": "database",
+    "DynamicTable": "dynamic_table",
+    "EventTable": "event_table",
+    "ExternalAccessIntegration": "external_access_integration",
+    "ExternalFunction": "external_function",
+    "ExternalVolume": "external_volume",
+    "FailoverGroup": "failover_group",
+    "CSVFileFormat": "file_format",
+    "JSONFileFormat": "file_format",
+    "ParquetFileFormat": "file_format",
+    "JavascriptUDF": "function",
+    "PythonUDF": "function",
+    "FutureGrant": "grant",
+    "Grant": "grant",
+    "GrantOnAll": "grant",
+    "RoleGrant": "grant",
+    "DatabaseRoleGrant": "grant",
+    "HybridTable": "hybrid_table",
+    "SnowflakeIcebergTable": "iceberg_table",
+    "ImageRepository": "image_repository",
+    "MaskingPolicy": "masking_policy",
+    "MaterializedView": "materialized_view",
+    "NetworkPolicy": "network_policy",
+    "NetworkRule": "network_rule",
+    "Notebook": "notebook",
+    "AWSOutboundNotificationIntegration": "notification_integration",
+    "AzureInboundNotificationIntegration": "notification_integration",
+    "AzureOutboundNotificationIntegration": "notification_integration",
+    "EmailNotificationIntegration": "notification_integration",
+    "GCPInboundNotificationIntegration": "notification_integration",
+    "GCPOutboundNotificationIntegration": "notification_integration",
+    "PackagesPolicy": "packages_policy",
+    "PasswordPolicy": "password_policy",
+    "Pipe": "pipe",
+    "PythonStoredProcedure": "procedure",
+    "ReplicationGroup": "replication_group",
+    "Resource": "resource",
+    "ResourceMonitor": "resource_monitor",
+    "DatabaseRole": "role",
+    "Role": "role",
+    "Schema": "schema",
+    "GenericSecret": "secret",
+    "OAuthSecret": "secret",
+    "PasswordSecret": "secret",
+    "APIAuthenticationSecurityIntegration": "security_integration",
+    "SnowflakePartnerOAuthSecurityIntegration": "security_integration",
+    "SnowservicesOAuthSecurityIntegration": "security_integration",
+    "Sequence": "sequence",
+    "Service": "service",
+    "Share": "share",
+    "ExternalStage": "stage",
+    "InternalStage": "stage",
+    "AzureStorageIntegration": "storage_integration",
+    "GCSStorageIntegration": "storage_integration",
+    "S3StorageIntegration": "storage_integration",
+    "StageStream": "stream",
+    "TableStream": "stream",
+    "ViewStream": "stream",
+    "Table": "table",
+    "Tag": "tag",
+    "TagReference": "tag",
+    "Task": "task",
+    "ScannerPackage": "scanner_package",
+    "User": "user",
+    "View": "view",
+    "Warehouse": "warehouse",
+}
 
 __all__ = [
     "Account",
@@ -145,3 +230,20 @@ __all__ = [
     "ViewStream",
     "Warehouse",
 ]
+
+
+def __getattr__(name: str):
+    if name not in _RESOURCE_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_RESOURCE_MODULES[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+def load_resource_modules():
+    for module_name in dict.fromkeys(_RESOURCE_MODULES.values()):
+        import_module(f".{module_name}", __name__)
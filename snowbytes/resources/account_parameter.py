@@ -58,6 +58,6 @@ class AccountParameter(NamedResource, Resource):
         )
 
     @classmethod
-    def from_sql(cls, sql):
+    def _from_sql(cls, sql):
         props = parse_alter_account_parameter(sql)
         return cls(**props)
@@ -79,7 +79,7 @@ class Column(Resource):
         )
 
     @classmethod
-    def from_sql(cls, sql):
+    def _from_sql(cls, sql):
         parse_results = _parse_column(sql)
         remainder = parse_results.pop("remainder", "")
         props = _parse_props(cls.props, remainder)
@@ -200,7 +200,7 @@ class Grant(Resource):
         return f"{self.__class__.__name__}(priv={priv}, on={on}, to={to})"
 
     @classmethod
-    def from_sql(cls, sql):
+    def _from_sql(cls, sql):
         parsed = parse_grant(sql)
         return cls(**parsed)
 
@@ -397,7 +397,7 @@ class FutureGrant(Resource):
             self.requires(granted_in_ref)
 
     @classmethod
-    def from_sql(cls, sql):
+    def _from_sql(cls, sql):
         parsed = parse_grant(sql)
         return cls(**parsed)
 
@@ -595,7 +595,7 @@ class GrantOnAll(Resource):
         )
 
     @classmethod
-    def from_sql(cls, sql):
+    def _from_sql(cls, sql):
         parsed = parse_grant(sql)
         return cls(**parsed)
 
@@ -724,7 +724,7 @@ class RoleGrant(Resource):
         )
 
     @classmethod
-    def from_sql(cls, sql):
+    def _from_sql(cls, sql):
         props = parse_grant(sql)
         return RoleGrant(**props)
 
@@ -98,7 +98,7 @@ class HybridTable(NamedResource, TaggableResource, Resource):
         self.set_tags(tags)
 
     @classmethod
-    def from_sql(cls, sql):
+    def _from_sql(cls, sql):
         raise NotImplementedError
 
         # identifier, remainder = _parse_create_header(sql, cls.resource_type, cls.scope)
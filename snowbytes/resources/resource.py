@@ -4,9 +4,10 @@ import sys
 import types
 from dataclasses import dataclass, field, fields
 from enum import Enum
+from importlib import import_module
 from inspect import isclass
 from itertools import chain
-from typing import Any, Optional, Type, TypedDict, Union, get_args, get_origin
+from typing import Any, Iterable, Optional, Type, TypedDict, Union, get_args, get_origin
 
 import pyparsing as pp
 
@@ -244,28 +245,68 @@ class ResourceSpec:
         raise ValueError(f"Field {field_name} not found in {cls.__name__}")
 
 
-RESOURCE_SCOPES = {
-    ResourceType.ACCOUNT: OrganizationScope(),
-}
+_RESOURCES_LOADED = False
+
+
+def load_resources():
+    """
+    Import every resource module. Resource classes register themselves with the _Resource metaclass
+    when their module is imported, and modules are only imported when one of their classes is first
+    used, so anything that needs the complete registry calls this first.
+    """
+    global _RESOURCES_LOADED
+    if _RESOURCES_LOADED:
+        return
+    # Set before importing so that lookups made while the modules load don't start loading again
+    _RESOURCES_LOADED = True
+    import_module(__package__).load_resource_modules()
+
+
+class _ResourceScopes(dict):
+    def __missing__(self, resource_type: ResourceType):
+        load_resources()
+        return dict.__getitem__(self, resource_type)
+
+
+RESOURCE_SCOPES = _ResourceScopes(
+    {
+        ResourceType.ACCOUNT: OrganizationScope(),
+    }
+)
+
+_RESOURCE_TYPES: dict[ResourceType, list[Type["Resource"]]] = {}
+_RESOURCE_CLASSES: dict[str, Type["Resource"]] = {}
 
 
 class _Resource(type):
-    __types__: dict[ResourceType, list[Type["Resource"]]] = {}
-    __classes__: dict[str, Type["Resource"]] = {}
     __resolvers__ = {}
 
     def __new__(cls, name, bases, attrs):
         cls_ = super().__new__(cls, name, bases, attrs)
         if cls_.__name__ in ["Resource", "_Resource", "ResourcePointer"]:
             return cls_
-        cls.__classes__[name] = cls_
-        if cls_.resource_type not in cls.__types__:
-            cls.__types__[cls_.resource_type] = []
-        cls.__types__[cls_.resource_type].append(cls_)
+        _RESOURCE_CLASSES[name] = cls_
+        if cls_.resource_type not in _RESOURCE_TYPES:
+            _RESOURCE_TYPES[cls_.resource_type] = []
+        _RESOURCE_TYPES[cls_.resource_type].append(cls_)
         if cls_.resource_type not in RESOURCE_SCOPES:
             RESOURCE_SCOPES[cls_.resource_type] = cls_.scope
         return cls_
 
+    @property
+    def __types__(cls) -> dict[ResourceType, list[Type["Resource"]]]:
+        load_resources()
+        return _RESOURCE_TYPES
+
+    @property
+    def __classes__(cls) -> dict[str, Type["Resource"]]:
+        load_resources()
+        return _RESOURCE_CLASSES
+
+    def __subclasses__(cls):
+        load_resources()
+        return type.__subclasses__(cls)
+
 
 class Resource(metaclass=_Resource):
     edition = {AccountEdition.STANDARD, AccountEdition.ENTERPRISE, AccountEdition.BUSINESS_CRITICAL}
@@ -324,7 +365,13 @@ class Resource(metaclass=_Resource):
 
     @classmethod
     def from_sql(cls, sql):
-        logger.warning("Resource.from_sql will be deprecated in a future release")
+        # Only the generic parser is deprecated, resources with their own parser override _from_sql
+        if cls._from_sql.__func__ is Resource._from_sql.__func__:
+            logger.warning("Resource.from_sql will be deprecated in a future release")
+        return cls._from_sql(sql)
+
+    @classmethod
+    def _from_sql(cls, sql):
         resource_cls = cls
         if resource_cls == Resource:
             # FIXME: we need to change the way we handle polymorphic resources
@@ -505,10 +552,25 @@ class Resource(metaclass=_Resource):
 
 class ResourceContainer:
     def __init__(self):
-        self._items: dict[ResourceType, list[Resource]] = {}
+        # Items are stored per resource type in insertion order, keyed by object identity. They are also
+        # indexed by resource type and name so that lookups don't have to scan every item of a type.
+        self._items: dict[ResourceType, dict[int, Resource]] = {}
+        self._items_by_name: dict[tuple[ResourceType, Optional[ResourceName]], dict[int, Resource]] = {}
 
     def __contains__(self, item: Resource):
-        return item in self._items.get(item.resource_type, [])
+        if self._items.get(item.resource_type, {}).get(id(item)) is item:
+            return True
+        return any(candidate == item for candidate in self._candidates(item.resource_type, _container_key(item)))
+
+    def _candidates(self, resource_type: ResourceType, key: Optional[ResourceName]) -> Iterable[Resource]:
+        if key is None:
+            return self._items.get(resource_type, {}).values()
+        # Items whose name couldn't be indexed when they were added (eg names with unresolved vars) are
+        # always candidates
+        return chain(
+            self._items_by_name.get((resource_type, key), {}).values(),
+            self._items_by_name.get((resource_type, None), {}).values(),
+        )
 
     def add(self, *items: Resource):
         if isinstance(items[0], list):
@@ -520,18 +582,17 @@ class ResourceContainer:
                 raise ResourceHasContainerException(f"{item} already belongs to a container")
             item._container = self
             item.requires(self)
-            if item.resource_type not in self._items:
-                self._items[item.resource_type] = []
-            self._items[item.resource_type].append(item)
+            self._items.setdefault(item.resource_type, {})[id(item)] = item
+            self._items_by_name.setdefault((item.resource_type, _container_key(item)), {})[id(item)] = item
 
     def items(self, resource_type: Optional[ResourceType] = None) -> list[Resource]:
         if resource_type:
-            return self._items.get(resource_type, [])
+            return list(self._items.get(resource_type, {}).values())
         else:
-            return list(chain.from_iterable(self._items.values()))
+            return list(chain.from_iterable(items.values() for items in self._items.values()))
 
     def find(self, resource_type: ResourceType, name: Union[ResourceName, str]) -> Resource:
-        for resource in self.items(resource_type):
+        for resource in self._candidates(resource_type, ResourceName(name)):
             if isinstance(resource, ResourcePointer) and resource.name == name:
                 return resource
             elif (
@@ -543,12 +604,44 @@ class ResourceContainer:
         raise KeyError(f"Resource {resource_type} {name} not found")
 
     def remove(self, resource: Resource):
-        if resource.resource_type in self._items:
-            for index, item in enumerate(self._items[resource.resource_type]):
-                if item is resource:
-                    self._items[resource.resource_type].pop(index)
-                    resource._container = None
-            resource.refs = [r for r in resource.refs if r != self]
+        items = self._items.get(resource.resource_type, {})
+        if items.get(id(resource)) is resource:
+            del items[id(resource)]
+            # The name may have been resolved since the item was added, so check both possible index entries
+            for key in (_container_key(resource), None):
+                self._items_by_name.get((resource.resource_type, key), {}).pop(id(resource), None)
+            resource._container = None
+        resource.refs = [r for r in resource.refs if r != self]
+
+    def __getstate__(self):
+        # Object identities don't survive pickling, so items are stored as plain lists and re-keyed on load
+        state = self.__dict__.copy()
+        state["_items"] = {key: list(items.values()) for key, items in self._items.items()}
+        state["_items_by_name"] = {key: list(items.values()) for key, items in self._items_by_name.items()}
+        return state
+
+    def __setstate__(self, state):
+        state["_items"] = {key: {id(item): item for item in items} for key, items in state["_items"].items()}
+        state["_items_by_name"] = {
+            key: {id(item): item for item in items} for key, items in state["_items_by_name"].items()
+        }
+        self.__dict__.update(state)
+
+
+def _container_key(resource: Resource) -> Optional[ResourceName]:
+    """
+    The name a container indexes a resource by, or None if the resource has no usable name.
+    """
+    if isinstance(resource, NamedResource):
+        # Named resources set their name before registering with a container, while _data is still unset
+        name = resource._name
+    elif resource._data is not None:
+        name = getattr(resource._data, "name", None)
+    else:
+        name = None
+    if isinstance(name, (str, ResourceName)):
+        return ResourceName(name)
+    return None
 
 
 class NamedResource:
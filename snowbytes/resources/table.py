@@ -160,7 +160,7 @@ class Table(NamedResource, TaggableResource, Resource):
         #     self._table_stage.schema = self.schema
 
     @classmethod
-    def from_sql(cls, sql):
+    def _from_sql(cls, sql):
         """
         CREATE [ OR REPLACE ]
         [ { [ { LOCAL | GLOBAL } ] TEMP | TEMPORARY | VOLATILE | TRANSIENT } ]
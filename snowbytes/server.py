@@ -0,0 +1,272 @@
+import copy
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+
+from snowflake.connector.errors import DatabaseError, InterfaceError, OperationalError
+
+from . import data_provider
+from .blueprint import Blueprint, Plan, dump_plan
+from .gitops import collect_blueprint_config
+from .identifiers import URN
+from .plan_cache import fingerprint_key, fingerprint_parts
+
+logger = logging.getLogger("snowbytes")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Errors after which the connection can't be used anymore: the connection was closed, or Snowflake dropped the
+# session or let it expire
+SESSION_GONE_ERRNOS = {250002, 390111, 390112, 390114}
+
+
+def _is_connection_error(err: Exception) -> bool:
+    if isinstance(err, (OperationalError, InterfaceError)):
+        return True
+    return isinstance(err, DatabaseError) and err.errno in SESSION_GONE_ERRNOS
+
+
+class PlanServer:
+    """
+    Plans submitted configs against one account, and keeps what planning needs warm between plans: the
+    connection, the session context, cached SHOW results and the state of every resource fetched so far.
+
+    refresh() updates cached state incrementally, on demand or every refresh_interval seconds. The account is
+    fingerprinted the way the plan cache does it, and only resources whose listing changed are dropped, to be
+    fetched again by the next plan that needs them. Resources that no listing covers are dropped on every
+    refresh.
+
+        with PlanServer(refresh_interval=60) as server:
+            plan = server.plan({"roles": [{"name": "ANALYST"}]})
+
+    Plans and refreshes share one connection and the module-level query caches, so they run one at a time.
+    When the connection is lost, a new one is opened with connection_factory and cached state is dropped.
+    """
+
+    def __init__(
+        self,
+        connection_factory: Optional[Callable[[], Any]] = None,
+        refresh_interval: Optional[float] = None,
+    ):
+        if connection_factory is None:
+            from .operations.connector import connect
+
+            connection_factory = connect
+        self._lock = threading.RLock()
+        self._state: dict[URN, Optional[dict]] = {}
+        self._fingerprints: dict[str, str] = {}
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self.plans = 0
+        self.hits = 0
+        self.misses = 0
+        self.reconnects = 0
+
+        self._connection_factory = connection_factory
+        self.session = connection_factory()
+        self._connect_session()
+        self.last_refresh = time.time()
+
+        if refresh_interval:
+            self._refresher = threading.Thread(
+                target=self._refresh_periodically, args=(refresh_interval,), name="snowbytes-refresh", daemon=True
+            )
+            self._refresher.start()
+
+    def __enter__(self) -> "PlanServer":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _connect_session(self):
+        data_provider.reset_session_caches()
+        self.session_ctx = data_provider.fetch_session(self.session)
+        data_provider.use_secondary_roles(self.session, all=True)
+
+    def _reconnect(self):
+        logger.warning("Connection to Snowflake lost, reconnecting")
+        session = self._connection_factory()
+        try:
+            self.session.close()
+        except Exception:
+            pass
+        self.session = session
+        # Nothing fetched on the old connection is known to be current anymore
+        self._state.clear()
+        self._fingerprints.clear()
+        self._connect_session()
+        self.reconnects += 1
+        self.last_refresh = time.time()
+
+    def plan(self, config: dict, vars: Optional[dict] = None) -> Plan:
+        """
+        Plan a resource config, in the same format as a config file, against the account
+        """
+        cli_config = {"vars": vars} if vars else {}
+        with self._lock:
+            try:
+                plan = self._plan(config, cli_config)
+            except Exception as err:
+                if not _is_connection_error(err):
+                    raise
+                self._reconnect()
+                plan = self._plan(config, cli_config)
+            self.plans += 1
+        return plan
+
+    def _plan(self, config: dict, cli_config: dict) -> Plan:
+        blueprint = Blueprint.from_config(collect_blueprint_config(copy.deepcopy(config), cli_config))
+        manifest = blueprint.generate_manifest(self.session_ctx)
+        remote_state = blueprint.fetch_remote_state(self.session, manifest, fetch=self._fetch_resource)
+        plan = blueprint._plan(remote_state, manifest)
+        blueprint._raise_for_nonconforming_plan(self.session_ctx, plan)
+        return plan
+
+    def _fetch_resource(self, session, urn: URN) -> Optional[dict]:
+        if urn in self._state:
+            self.hits += 1
+            return copy.deepcopy(self._state[urn])
+        self.misses += 1
+        key = fingerprint_key(urn)
+        if key is not None and key not in self._fingerprints:
+            # Fingerprint before fetching, so that a change made in between is caught by the next refresh
+            self._fingerprints.update(fingerprint_parts(session, [urn.resource_type], [urn]))
+        data = data_provider.fetch_resource(session, urn)
+        self._state[urn] = copy.deepcopy(data)
+        return data
+
+    def refresh(self) -> int:
+        """
+        Drop the cached state of resources that changed since they were fetched, and return how many were
+        dropped. SHOW results cached while fetching are always dropped.
+        """
+        with self._lock:
+            try:
+                return self._refresh()
+            except Exception as err:
+                if not _is_connection_error(err):
+                    raise
+                dropped = len(self._state)
+                self._reconnect()
+                return dropped
+
+    def _refresh(self) -> int:
+        start = time.perf_counter()
+        session_ctx = self.session_ctx
+        self._connect_session()
+        if self.session_ctx != session_ctx:
+            # Grants to the session's role or a different edition change what every fetch returns
+            stale = list(self._state)
+            fingerprints: dict[str, str] = {}
+        else:
+            resource_types = {urn.resource_type for urn in self._state}
+            fingerprints = fingerprint_parts(self.session, resource_types, self._state)
+            stale = []
+            for urn in self._state:
+                key = fingerprint_key(urn)
+                if key is None or fingerprints.get(key) != self._fingerprints.get(key):
+                    stale.append(urn)
+        for urn in stale:
+            del self._state[urn]
+        self._fingerprints = fingerprints
+        self.last_refresh = time.time()
+        logger.info(
+            f"Refreshed in {time.perf_counter() - start:.2f}s, "
+            f"dropped {len(stale)} of {len(stale) + len(self._state)} cached resources"
+        )
+        return len(stale)
+
+    def _refresh_periodically(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Scheduled refresh failed")
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "account": self.session_ctx["account"],
+                "user": self.session_ctx.get("user"),
+                "role": str(self.session_ctx["role"]),
+                "cached_resources": len(self._state),
+                "plans": self.plans,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reconnects": self.reconnects,
+                "last_refresh": datetime.fromtimestamp(self.last_refresh, timezone.utc).isoformat(),
+            }
+
+    def close(self):
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join()
+        with self._lock:
+            self.session.close()
+
+
+class _PlanRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /status                                   Account, cache and request counts
+    POST /plan {"config": {...}, "vars": {...}}   The plan, as `snowbytes plan --json` writes it
+    POST /refresh                                 Refresh cached state now
+    """
+
+    server: "PlanHTTPServer"
+
+    def do_GET(self):
+        if self.path == "/status":
+            self._reply(200, self.server.plan_server.status())
+        else:
+            self._reply(404, {"error": f"Not found: {self.path}"})
+
+    def do_POST(self):
+        if self.path == "/plan":
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not isinstance(body, dict) or not isinstance(body.get("config"), dict):
+                    raise ValueError("Expected a JSON object with a config")
+            except ValueError as err:
+                self._reply(400, {"error": str(err)})
+                return
+            try:
+                plan = self.server.plan_server.plan(body["config"], body.get("vars"))
+            except Exception as err:
+                self._reply(422, {"error": f"{type(err).__name__}: {err}"})
+                return
+            self._reply(200, json.loads(dump_plan(plan, format="json")))
+        elif self.path == "/refresh":
+            try:
+                dropped = self.server.plan_server.refresh()
+            except Exception as err:
+                logger.exception("Refresh failed")
+                self._reply(500, {"error": f"{type(err).__name__}: {err}"})
+                return
+            self._reply(200, {"dropped": dropped})
+        else:
+            self._reply(404, {"error": f"Not found: {self.path}"})
+
+    def _reply(self, status: int, body: Any):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class PlanHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, plan_server: PlanServer, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.plan_server = plan_server
+        super().__init__((host, port), _PlanRequestHandler)
@@ -1,20 +1,41 @@
-from typing import Any
+from functools import lru_cache
+from typing import Any, Iterable, Iterator
 
 import jinja2.exceptions
-from jinja2 import Environment, StrictUndefined
+from jinja2 import Environment, StrictUndefined, Template
 
 from .exceptions import MissingVarException
 
 GLOBAL_JINJA_ENV = Environment(undefined=StrictUndefined)
 
+# Number of compiled templates to keep, keyed by their source string
+TEMPLATE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(source: str) -> Template:
+    return GLOBAL_JINJA_ENV.from_string(source)
+
+
+def _is_plain_string(string: str) -> bool:
+    # Strings without any Jinja delimiters render to themselves, apart from Jinja's newline handling
+    return "{{" not in string and "{%" not in string and "{#" not in string and "\r" not in string
+
+
+def _render_plain_string(string: str) -> str:
+    # Jinja drops a single trailing newline
+    return string[:-1] if string.endswith("\n") else string
+
 
 class VarString:
     def __init__(self, string: str):
         self.string = string
 
     def to_string(self, vars: dict):
+        if _is_plain_string(self.string):
+            return _render_plain_string(self.string)
         try:
-            return GLOBAL_JINJA_ENV.from_string(self.string).render(var=vars)
+            return compile_template(self.string).render(var=vars)
         except jinja2.exceptions.UndefinedError:
             raise MissingVarException(f"Missing var: {self.string}")
 
@@ -42,5 +63,25 @@ def string_contains_var(string: str) -> bool:
 
 
 def process_for_each(resource_value: str, each_value: str) -> str:
+    if _is_plain_string(resource_value):
+        return _render_plain_string(resource_value)
+    vars = VarStub()
+    return compile_template(resource_value).render(var=vars, each={"value": each_value})
+
+
+def expand_for_each(resource_data: dict, each_values: Iterable) -> Iterator[dict]:
+    """
+    Render a copy of resource_data for every value of a for_each. Each templated field is compiled
+    once and rendered for every value, instead of compiling a template per field per value.
+    """
+    templates = {
+        key: compile_template(value)
+        for key, value in resource_data.items()
+        if isinstance(value, str) and string_contains_var(value)
+    }
     vars = VarStub()
-    return GLOBAL_JINJA_ENV.from_string(resource_value).render(var=vars, each={"value": each_value})
+    for each_value in each_values:
+        instance = resource_data.copy()
+        for key, template in templates.items():
+            instance[key] = template.render(var=vars, each={"value": each_value})
+        yield instance
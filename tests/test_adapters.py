@@ -2,8 +2,10 @@ import pytest
 
 from snowbytes.adapters import permifrost
 from snowbytes.enums import ResourceType
-from snowbytes.privs import DatabasePriv, WarehousePriv
-from snowbytes.resources import Grant, RoleGrant
+from snowbytes.identifiers import FQN
+from snowbytes.privs import DatabasePriv, SchemaPriv, TablePriv, WarehousePriv
+from snowbytes.resource_name import ResourceName
+from snowbytes.resources import FutureGrant, Grant, GrantOnAll, RoleGrant
 from snowbytes.resources.resource import ResourcePointer
 
 
@@ -19,3 +21,112 @@ def test_permifrost(cursor):
     assert ResourcePointer(name="raw", resource_type=ResourceType.DATABASE) in resources
     assert RoleGrant(role="sysadmin", to_user="eburke") in resources
     assert RoleGrant(role="eburke", to_user="eburke") in resources
+
+
+def _fqn(identifier):
+    database, *schema, name = [ResourceName(part) for part in identifier.split(".")]
+    return FQN(database=database, schema=schema[0] if schema else None, name=name)
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    calls = []
+
+    def _listing(name, fqns):
+        def _list(session):
+            calls.append(name)
+            return fqns
+
+        return _list
+
+    schemas = [_fqn("RAW.PUBLIC"), _fqn("RAW.STRIPE"), _fqn("RAW.STRIPE_ARCHIVE"), _fqn("ANALYTICS.MARTS")]
+    # Shared databases only show up when their schemas are listed one database at a time
+    shared_schemas = [_fqn("SHARED.PUBLIC"), _fqn("SHARED.SALES")]
+
+    def list_schemas(session, database=None):
+        if database is None:
+            calls.append("schemas")
+            return schemas
+        calls.append(f"schemas in {database}")
+        return [fqn for fqn in shared_schemas if str(fqn.database) == database.upper()]
+
+    monkeypatch.setattr(permifrost, "list_schemas", list_schemas)
+    monkeypatch.setattr(
+        permifrost,
+        "list_tables",
+        _listing(
+            "tables",
+            [
+                _fqn("RAW.STRIPE.CHARGES"),
+                _fqn("RAW.STRIPE.CUSTOMERS"),
+                _fqn("RAW.STRIPE_ARCHIVE.CHARGES_2019"),
+            ],
+        ),
+    )
+    monkeypatch.setattr(permifrost, "list_views", _listing("views", []))
+    return calls
+
+
+def _role_resources(roles):
+    return permifrost._dedupe_resources(permifrost._get_role_resources(permifrost.CatalogSnapshot(None), roles))
+
+
+def test_permifrost_catalog_is_listed_once(catalog):
+    privileges = {
+        "schemas": {"read": ["raw.*", "analytics.*"]},
+        "tables": {"read": ["raw.*.*", "analytics.*.*"]},
+    }
+    _role_resources([{"reader": {"privileges": privileges}}, {"analyst": {"privileges": privileges}}])
+    assert catalog == ["schemas"]
+
+
+def test_permifrost_partial_wildcards(catalog):
+    resources = _role_resources(
+        [
+            {
+                "reader": {
+                    "privileges": {
+                        "schemas": {"read": ["raw.stripe*"]},
+                        "tables": {"read": ["raw.stripe.charges*", "raw.stripe_*.*"]},
+                    }
+                }
+            }
+        ]
+    )
+    assert Grant(priv=SchemaPriv.USAGE, on_schema="RAW.STRIPE", to="reader") in resources
+    assert Grant(priv=SchemaPriv.USAGE, on_schema="RAW.STRIPE_ARCHIVE", to="reader") in resources
+    assert Grant(priv=SchemaPriv.USAGE, on_schema="RAW.PUBLIC", to="reader") not in resources
+    assert Grant(priv=TablePriv.SELECT, on_table="RAW.STRIPE.CHARGES", to="reader") in resources
+    assert Grant(priv=TablePriv.SELECT, on_table="RAW.STRIPE.CUSTOMERS", to="reader") not in resources
+    assert GrantOnAll(priv=TablePriv.SELECT, on_all_tables_in_schema="RAW.STRIPE_ARCHIVE", to="reader") in resources
+    assert FutureGrant(priv=TablePriv.SELECT, on_future_tables_in_schema="RAW.STRIPE_ARCHIVE", to="reader") in resources
+    assert catalog == ["schemas", "tables", "views"]
+
+
+def test_permifrost_dedupes_resources_across_roles(catalog):
+    role_config = {"warehouses": ["loading"], "privileges": {"databases": {"read": ["raw"], "write": ["raw"]}}}
+    resources = _role_resources([{"reader": role_config}, {"writer": dict(role_config)}])
+    keys = [(resource.resource_type, str(resource.fqn)) for resource in resources]
+    assert len(keys) == len(set(keys))
+    assert keys.count((ResourceType.DATABASE, "RAW")) == 1
+    assert keys.count((ResourceType.WAREHOUSE, "LOADING")) == 1
+    assert (
+        len(
+            [
+                r
+                for r in resources
+                if isinstance(r, Grant) and r.on_type == ResourceType.DATABASE and r.priv == DatabasePriv.USAGE
+            ]
+        )
+        == 2
+    )
+
+
+def test_permifrost_wildcards_on_shared_databases(catalog):
+    resources = _role_resources(
+        [{"reader": {"privileges": {"schemas": {"read": ["shared.*", "raw.*"]}, "tables": {"read": ["shared.*.*"]}}}}]
+    )
+    assert Grant(priv=SchemaPriv.USAGE, on_schema="SHARED.SALES", to="reader") in resources
+    assert GrantOnAll(priv=TablePriv.SELECT, on_all_tables_in_schema="SHARED.SALES", to="reader") in resources
+    assert Grant(priv=SchemaPriv.USAGE, on_schema="RAW.STRIPE", to="reader") in resources
+    assert catalog == ["schemas", "schemas in shared"]
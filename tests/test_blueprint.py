@@ -11,6 +11,7 @@ from snowbytes.blueprint import (
     _merge_pointers,
     compile_plan_to_sql,
     dump_plan,
+    hash_resource_data,
 )
 from snowbytes.blueprint_config import BlueprintConfig
 from snowbytes.enums import AccountEdition, BlueprintScope, ResourceType, RunMode
@@ -448,6 +449,7 @@ def test_blueprint_dump_plan_create(session_ctx, remote_state):
             "resource_cls": "Role",
             "urn": "urn::ABCD123:role/ROLE1",
             "after": {"name": "ROLE1", "owner": "USERADMIN", "comment": None},
+            "after_hash": hash_resource_data({"name": "ROLE1", "owner": "USERADMIN", "comment": None}),
         }
     ]
     plan_str = dump_plan(plan, format="text")
@@ -488,6 +490,8 @@ def test_blueprint_dump_plan_update(session_ctx):
             "before": {"name": "ROLE1", "owner": "USERADMIN", "comment": "old"},
             "after": {"name": "ROLE1", "owner": "USERADMIN", "comment": "new"},
             "delta": {"comment": "new"},
+            "before_hash": hash_resource_data({"name": "ROLE1", "owner": "USERADMIN", "comment": "old"}),
+            "after_hash": hash_resource_data({"name": "ROLE1", "owner": "USERADMIN", "comment": "new"}),
         }
     ]
     plan_str = dump_plan(plan, format="text")
@@ -561,6 +565,7 @@ def test_blueprint_dump_plan_drop(session_ctx):
         "action": "DROP",
         "urn": "urn::ABCD123:role/ROLE1",
         "before": {"name": "ROLE1", "owner": "ACCOUNTADMIN", "comment": None},
+        "before_hash": hash_resource_data({"name": "ROLE1", "owner": "ACCOUNTADMIN", "comment": None}),
     }
 
     plan_str = dump_plan(plan, format="text")
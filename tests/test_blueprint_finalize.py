@@ -136,3 +136,42 @@ def test_public_schema_raises_error():
     db = res.Database("SOME_DATABASE")
     with pytest.raises(ValueError):
         res.Schema("PUBLIC", database=db, comment="This is a test")
+
+
+def test_finalize_flattens_resource_tree_once(session_ctx):
+    db = res.Database("SOME_DATABASE")
+    schema = res.Schema("SOME_SCHEMA", tags={"SOME_TAG": "SOME_VALUE"})
+    db.add(schema)
+    blueprint = Blueprint(resources=[db])
+    blueprint._finalize(session_ctx)
+
+    walked = list(_walk(blueprint._root))
+    assert len(blueprint._resources) == len(walked)
+    assert set(map(id, blueprint._resources)) == set(map(id, walked))
+    assert any(resource.resource_type == ResourceType.TAG_REFERENCE for resource in blueprint._resources)
+    assert all(resource._finalized for resource in blueprint._resources)
+
+
+def test_finalize_role_tree_refs(session_ctx):
+    parent = res.Role("PARENT")
+    child = res.Role("CHILD")
+    parent_grant = res.RoleGrant(role=parent, to_role="SYSADMIN")
+    child_grant = res.RoleGrant(role=child, to_role=parent)
+    blueprint = Blueprint(resources=[parent, child, parent_grant, child_grant])
+    blueprint._finalize(session_ctx)
+
+    assert parent_grant in child_grant.refs
+    assert child_grant not in parent_grant.refs
+
+
+def test_finalize_resolves_tags_by_name(session_ctx):
+    db = res.Database("SOME_DATABASE")
+    schema = res.Schema("SOME_SCHEMA")
+    db.add(schema)
+    tag = res.Tag("SOME_TAG")
+    schema.add(tag)
+    warehouse = res.Warehouse("SOME_WAREHOUSE", tags={"some_tag": "SOME_VALUE", "OTHER_TAG": "OTHER_VALUE"})
+    blueprint = Blueprint(resources=[db, warehouse])
+    blueprint._finalize(session_ctx)
+
+    assert warehouse._tags.tags == {"SOME_DATABASE.SOME_SCHEMA.SOME_TAG": "SOME_VALUE", "OTHER_TAG": "OTHER_VALUE"}
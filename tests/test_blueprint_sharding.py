@@ -0,0 +1,134 @@
+import json
+import multiprocessing
+
+import pytest
+
+from snowbytes import data_provider
+from snowbytes.blueprint import Blueprint, CreateResource, DropResource, ManifestResource, UpdateResource
+from snowbytes.enums import AccountEdition, ResourceType
+from snowbytes.gitops import collect_blueprint_config
+from snowbytes.identifiers import FQN
+from snowbytes.resource_name import ResourceName
+
+SESSION_CTX = {
+    "account": "SOMEACCT",
+    "account_locator": "ABCD123",
+    "account_edition": AccountEdition.ENTERPRISE,
+    "role": "SYSADMIN",
+    "available_roles": ["SYSADMIN", "USERADMIN", "SECURITYADMIN"],
+    "secondary_roles": [],
+}
+
+ROLES = [f"ROLE_{idx}" for idx in range(6)]
+DATABASES = [f"DB_{idx}" for idx in range(4)]
+
+CONFIG = {
+    "roles": [{"name": role, "comment": "role"} for role in ROLES],
+    "role_grants": [{"role": role, "to_role": "SYSADMIN"} for role in ROLES],
+    "databases": [
+        {"name": database, "comment": "database", "schemas": [{"name": "RAW"}, {"name": "STAGING"}]}
+        for database in DATABASES
+    ],
+    "tables": [
+        {
+            "name": f"TBL_{idx}",
+            "database": DATABASES[idx % len(DATABASES)],
+            "schema": "RAW",
+            "comment": "table",
+            "columns": [{"name": "ID", "data_type": "NUMBER(38,0)"}],
+        }
+        for idx in range(12)
+    ],
+    "grants": [
+        {"priv": "USAGE", "on_database": database, "to_role": role} for database in DATABASES for role in ROLES[:2]
+    ]
+    + [
+        {"priv": "SELECT", "on_table": f"{DATABASES[idx % len(DATABASES)]}.RAW.TBL_{idx}", "to_role": ROLES[2]}
+        for idx in range(12)
+    ],
+}
+
+
+def _blueprint(config=CONFIG) -> Blueprint:
+    return Blueprint.from_config(collect_blueprint_config(json.loads(json.dumps(config))))
+
+
+def _remote_state(config=CONFIG) -> dict[str, dict]:
+    """An account that matches the config, except for some missing and changed resources"""
+    manifest = _blueprint(config).generate_manifest(SESSION_CTX)
+    remote_state = {}
+    for idx, (urn, item) in enumerate(manifest.items()):
+        if not isinstance(item, ManifestResource):
+            remote_state[str(urn)] = {"name": str(urn.fqn.name)}
+            if urn.resource_type == ResourceType.ACCOUNT:
+                remote_state[str(urn)]["locator"] = SESSION_CTX["account_locator"]
+        elif item.implicit or idx % 7 != 0:
+            data = dict(item.data)
+            if not item.implicit and idx % 5 == 0 and "comment" in data:
+                data["comment"] = "changed"
+            remote_state[str(urn)] = data
+    for _, ref in manifest.refs:
+        remote_state.setdefault(str(ref), {"name": str(ref.fqn.name)})
+    return remote_state
+
+
+@pytest.fixture
+def account(monkeypatch):
+    remote_state = _remote_state()
+
+    def fetch_resource(session, urn):
+        data = remote_state.get(str(urn))
+        return json.loads(json.dumps(data)) if data is not None else None
+
+    monkeypatch.setattr(data_provider, "fetch_session", lambda session: SESSION_CTX)
+    monkeypatch.setattr(data_provider, "use_secondary_roles", lambda session, all=False: None)
+    monkeypatch.setattr(data_provider, "fetch_resource", fetch_resource)
+    return remote_state
+
+
+class FakeConnection:
+    def close(self):
+        pass
+
+
+def test_sharded_plan_matches_serial_plan(account):
+    serial = _blueprint().plan(None)
+    assert {type(change) for change in serial} == {CreateResource, UpdateResource}
+
+    assert _blueprint().plan_sharded(None, workers=1) == serial
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="Workers inherit the fake account by forking")
+def test_sharded_plan_in_worker_processes(account):
+    serial = _blueprint().plan(None)
+    assert _blueprint().plan_sharded(None, workers=3, connection_factory=FakeConnection) == serial
+
+
+def test_sharded_sync_plan_drops_unlisted_resources(account, monkeypatch):
+    config = {
+        "run_mode": "sync",
+        "allowlist": ["role", "database"],
+        "roles": CONFIG["roles"],
+        "databases": [{"name": name, "comment": "database"} for name in DATABASES[:2]],
+    }
+    account.update(_remote_state(config))
+    account["urn::ABCD123:role/ORPHAN_ROLE"] = {"name": "ORPHAN_ROLE", "comment": None, "owner": "USERADMIN"}
+    listings = {
+        "role": ROLES + ["ORPHAN_ROLE"],
+        "database": DATABASES,
+    }
+    monkeypatch.setattr(
+        data_provider,
+        "list_resource",
+        lambda session, label: [FQN(name=ResourceName(name)) for name in listings[label]],
+    )
+    for name in DATABASES[2:]:
+        account[f"urn::ABCD123:database/{name}"] = {**account[f"urn::ABCD123:database/{DATABASES[0]}"], "name": name}
+
+    serial = _blueprint(config).plan(None)
+    assert {str(change.urn) for change in serial if isinstance(change, DropResource)} == {
+        "urn::ABCD123:role/ORPHAN_ROLE",
+        "urn::ABCD123:database/DB_2",
+        "urn::ABCD123:database/DB_3",
+    }
+    assert _blueprint(config).plan_sharded(None, workers=1) == serial
@@ -0,0 +1,55 @@
+import random
+import threading
+import time
+
+import pytest
+from snowflake.connector.errors import ProgrammingError
+
+from snowbytes import data_provider
+from snowbytes.client import DOES_NOT_EXIST_ERR, OBJECT_DOES_NOT_EXIST_ERR
+
+
+@pytest.fixture
+def show_results(monkeypatch):
+    roles = [f"ROLE_{idx}" for idx in range(40)]
+    results = {"SHOW ROLES": [{"name": role} for role in roles + ["ACCOUNTADMIN"]]}
+    for role in roles:
+        results[f"SHOW GRANTS OF ROLE {role}"] = [{"role": role, "granted_to": "USER", "grantee_name": f"{role}_USER"}]
+    threads = set()
+
+    def execute(session, sql, cacheable=False, empty_response_codes=None):
+        threads.add(threading.current_thread().name)
+        # Finish statements out of order
+        time.sleep(random.random() / 100)
+        if sql not in results:
+            raise ProgrammingError(errno=DOES_NOT_EXIST_ERR)
+        return results[sql]
+
+    monkeypatch.setattr(data_provider, "execute", execute)
+    return results, threads
+
+
+def test_list_role_grants_fans_out_in_order(show_results):
+    results, threads = show_results
+    del results["SHOW GRANTS OF ROLE ROLE_3"]
+
+    role_grants = data_provider.list_role_grants(session=None)
+    expected = [f"ROLE_{idx}" for idx in range(40) if idx != 3]
+    assert [str(fqn.name) for fqn in role_grants] == expected
+    assert [fqn.params["user"] for fqn in role_grants] == [f"{role}_USER" for role in expected]
+    assert len(threads) > 1
+
+
+def test_fan_out_show_raises_unexpected_errors(monkeypatch):
+    def show(session, item):
+        if item == 2:
+            raise ProgrammingError(errno=OBJECT_DOES_NOT_EXIST_ERR)
+        if item == 3:
+            raise ProgrammingError(errno=DOES_NOT_EXIST_ERR)
+        return [{"item": item}]
+
+    with pytest.raises(ProgrammingError):
+        data_provider._fan_out_show(None, list(range(10)), show)
+
+    monkeypatch.setattr(data_provider, "SHOW_FAN_OUT_WORKERS", 1)
+    assert data_provider._fan_out_show(None, [1, 3], show) == [(1, [{"item": 1}])]
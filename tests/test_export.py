@@ -0,0 +1,201 @@
+import io
+import json
+import random
+import time
+
+import pytest
+import yaml
+from snowflake.connector.errors import ProgrammingError
+
+from snowbytes.client import UNSUPPORTED_FEATURE
+from snowbytes.enums import ResourceType
+from snowbytes.identifiers import FQN
+from snowbytes.operations import export
+from snowbytes.operations.export import export_resources, iter_export_resources, write_export
+from snowbytes.resource_name import ResourceName
+
+ACCOUNT = {
+    "warehouse": [
+        {"name": "LOADING", "warehouse_size": "XSMALL", "comment": "multi\nline"},
+        {"name": "REPORTING", "warehouse_size": "LARGE", "comment": None},
+    ],
+    "role": [{"name": "ANALYST", "comment": "role"}],
+    "user": [],
+}
+
+
+@pytest.fixture
+def account(monkeypatch):
+    fetched = []
+
+    def list_resource(session, resource_label):
+        if resource_label not in ACCOUNT:
+            raise AttributeError(resource_label)
+        return [FQN(name=ResourceName(item["name"])) for item in ACCOUNT[resource_label]]
+
+    def fetch_resource(session, urn):
+        fetched.append(str(urn.fqn))
+        items = ACCOUNT[str(urn.resource_type).lower()]
+        return next(item for item in items if item["name"] == str(urn.fqn))
+
+    monkeypatch.setattr(export, "list_resource", list_resource)
+    monkeypatch.setattr(export, "fetch_resource", fetch_resource)
+    return fetched
+
+
+def test_iter_export_resources_fetches_lazily(account):
+    blocks = iter_export_resources(session=object(), include=[ResourceType.WAREHOUSE])
+    resource_type, items = next(blocks)
+    assert resource_type == ResourceType.WAREHOUSE
+    # Only the first resource is fetched before the block is handed out
+    assert account == ["LOADING"]
+    assert next(items)["name"] == "LOADING"
+    assert next(items)["name"] == "REPORTING"
+    assert account == ["LOADING", "REPORTING"]
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_export_skips_unsupported_resource_types_as_a_whole(account, monkeypatch, workers):
+    fetch_resource = export.fetch_resource
+    unsupported = {"LOADING"}
+
+    def unsupported_fetch_resource(session, urn):
+        if str(urn.fqn) in unsupported:
+            raise ProgrammingError(errno=UNSUPPORTED_FEATURE)
+        return fetch_resource(session, urn)
+
+    monkeypatch.setattr(export, "fetch_resource", unsupported_fetch_resource)
+    opened = []
+    config = export_resources(session=object(), workers=workers, connection_factory=lambda: FakeSession(opened))
+    assert list(config) == ["roles"]
+
+    # Once part of a block has been written, it can't be skipped anymore
+    unsupported = {"REPORTING"}
+    with pytest.raises(Exception, match="Export of WAREHOUSE is incomplete"):
+        export_resources(session=object(), workers=workers, connection_factory=lambda: FakeSession(opened))
+
+
+@pytest.mark.parametrize("include", [[], [ResourceType.USER], [ResourceType.ROLE, ResourceType.WAREHOUSE]])
+def test_write_export_matches_dumping_the_whole_config(account, include):
+    include = include or [ResourceType.DATABASE]
+    config = export_resources(session=object(), include=include)
+
+    stream = io.StringIO()
+    write_export(iter_export_resources(session=object(), include=include), stream, "yml")
+    assert stream.getvalue() == yaml.dump(config, sort_keys=False)
+
+    stream = io.StringIO()
+    write_export(iter_export_resources(session=object(), include=include), stream, "json")
+    assert stream.getvalue() == json.dumps(config, indent=2)
+
+
+def test_write_export_ndjson(account):
+    stream = io.StringIO()
+    write_export(iter_export_resources(session=object()), stream, "ndjson")
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(line["resource_type"], line["name"]) for line in lines] == [
+        ("ROLE", "ANALYST"),
+        ("WAREHOUSE", "LOADING"),
+        ("WAREHOUSE", "REPORTING"),
+    ]
+
+
+class FakeSession:
+    def __init__(self, opened):
+        opened.append(self)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_parallel_export_matches_serial_export(account, monkeypatch):
+    warehouses = [{"name": f"WH_{idx}", "warehouse_size": "XSMALL"} for idx in range(50)]
+    monkeypatch.setitem(ACCOUNT, "warehouse", warehouses)
+    fetch_resource = export.fetch_resource
+
+    def slow_fetch_resource(session, urn):
+        # Finish fetches out of order
+        time.sleep(random.random() / 100)
+        return fetch_resource(session, urn)
+
+    monkeypatch.setattr(export, "fetch_resource", slow_fetch_resource)
+    serial = export_resources(session=object())
+
+    opened = []
+    parallel = export_resources(session=object(), workers=3, connection_factory=lambda: FakeSession(opened))
+    assert json.dumps(parallel) == json.dumps(serial)
+    assert [warehouse["name"] for warehouse in parallel["warehouses"]] == [f"WH_{idx}" for idx in range(50)]
+    assert len(opened) <= 2
+    assert all(session.closed for session in opened)
+
+
+GRANT_COLUMNS = {"grant_option": "false", "granted_by": "SYSADMIN"}
+SHOW_RESULTS = {
+    "SHOW ROLES": [{"name": "ANALYST"}],
+    "SHOW GRANTS TO ROLE ANALYST": [
+        {"privilege": "USAGE", "granted_on": "DATABASE", "name": "ANALYTICS", "granted_to": "ROLE", **GRANT_COLUMNS},
+        {"privilege": "USAGE", "granted_on": "WAREHOUSE", "name": "LOADING", "granted_to": "ROLE", **GRANT_COLUMNS},
+        {
+            "privilege": "CREATE DATABASE",
+            "granted_on": "ACCOUNT",
+            "name": "ABC123",
+            "granted_to": "ROLE",
+            **GRANT_COLUMNS,
+        },
+    ],
+    "SHOW GRANTS OF ROLE ANALYST": [
+        {"role": "ANALYST", "granted_to": "USER", "grantee_name": "SOMEUSER"},
+        {"role": "ANALYST", "granted_to": "ROLE", "grantee_name": "SYSADMIN"},
+    ],
+}
+
+
+def test_hydrated_listings_match_fetched_resources(monkeypatch):
+    from snowbytes import data_provider
+
+    def execute(session, sql, cacheable=False, empty_response_codes=None):
+        return SHOW_RESULTS[sql]
+
+    monkeypatch.setattr(data_provider, "execute", execute)
+    for resource_label in ["grant", "role_grant"]:
+        assert data_provider.has_hydrated_list(resource_label)
+        hydrated = data_provider.list_hydrated_resource(None, resource_label)
+        assert [fqn for fqn, _ in hydrated] == data_provider.list_resource(None, resource_label)
+        resource_type = data_provider.resource_type_for_label(resource_label)
+        for fqn, data in hydrated:
+            assert data == data_provider.fetch_resource(None, data_provider.URN(resource_type, fqn, ""))
+    assert not data_provider.has_hydrated_list("warehouse")
+
+
+def test_export_skips_fetching_hydrated_resources(account, monkeypatch):
+    def list_hydrated_resource(session, resource_label):
+        assert resource_label == "role_grant"
+        return [
+            (FQN(name=ResourceName("ANALYST"), params={"user": "SOMEUSER"}), {"role": "ANALYST", "to_user": "SOMEUSER"})
+        ]
+
+    monkeypatch.setattr(export, "list_hydrated_resource", list_hydrated_resource)
+    config = export_resources(session=object(), include=[ResourceType.ROLE_GRANT])
+    assert config == {"role_grants": [{"role": "ANALYST", "to_user": "SOMEUSER"}]}
+    assert account == []
+
+
+@pytest.mark.parametrize(
+    "format, expected",
+    [
+        ("yml", "role_grants:\n- role: ANALYST\n  to_user: SOMEUSER\n"),
+        ("json", '{\n  "role_grants": [\n    {\n      "role": "ANALYST",\n      "to_user": "SOMEUSER"\n    }\n  ]\n}'),
+        ("ndjson", '{"resource_type": "ROLE GRANT", "role": "ANALYST", "to_user": "SOMEUSER"}\n'),
+    ],
+)
+def test_write_export_role_grants(account, monkeypatch, format, expected):
+    # Hydrated role grants carry the role as a ResourceName
+    def list_hydrated_resource(session, resource_label):
+        fqn = FQN(name=ResourceName("ANALYST"), params={"user": "SOMEUSER"})
+        return [(fqn, {"role": ResourceName("ANALYST"), "to_user": "SOMEUSER"})]
+
+    monkeypatch.setattr(export, "list_hydrated_resource", list_hydrated_resource)
+    stream = io.StringIO()
+    write_export(iter_export_resources(session=object(), include=[ResourceType.ROLE_GRANT]), stream, format)
+    assert stream.getvalue() == expected
@@ -1,3 +1,5 @@
+import logging
+
 import pytest
 
 from snowbytes import resources as res
@@ -17,3 +19,12 @@ def test_from_sql_fqn_parsing():
             schema_ref = ref
     assert schema_ref
     assert schema_ref.container.name == '"My_databasE"'
+
+
+def test_from_sql_warns_only_for_the_generic_parser(caplog):
+    caplog.set_level(logging.WARNING)
+    res.Grant.from_sql("GRANT USAGE ON DATABASE DB TO ROLE SOMEROLE")
+    res.Table.from_sql("CREATE TABLE DB.PUBLIC.T (ID INT)")
+    assert "will be deprecated" not in caplog.text
+    res.Role.from_sql("CREATE ROLE SOMEROLE")
+    assert "will be deprecated" in caplog.text
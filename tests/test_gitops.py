@@ -1,8 +1,17 @@
+import copy
+
 import pytest
 from inflection import pluralize
 
 from tests.helpers import get_json_fixtures
-from snowbytes.gitops import collect_blueprint_config
+from snowbytes.config_cache import ConfigCache
+from snowbytes.gitops import (
+    PARALLEL_READ_MIN_FILES,
+    collect_blueprint_config,
+    collect_configs_from_path,
+    merge_all_configs,
+    merge_configs,
+)
 from snowbytes.identifiers import resource_label_for_type
 
 JSON_FIXTURES = list(get_json_fixtures())
@@ -119,3 +128,85 @@ def test_for_each():
     assert blueprint_config.resources is not None
     assert len(blueprint_config.resources) == 2
     assert [resource.urn.fqn.name for resource in blueprint_config.resources] == ["role_bar", "role_baz"]
+
+
+def test_merge_all_configs():
+    config1 = {"roles": [{"name": "role1"}], "name": "some_blueprint"}
+    config2 = {"roles": [{"name": "role2"}], "warehouses": [{"name": "wh1"}]}
+    config3 = {"roles": [{"name": "role3"}], "database": None}
+    merged = merge_all_configs([config1, config2, config3])
+    assert merged == {
+        "roles": [{"name": "role1"}, {"name": "role2"}, {"name": "role3"}],
+        "name": "some_blueprint",
+        "warehouses": [{"name": "wh1"}],
+        "database": None,
+    }
+    assert config1["roles"] == [{"name": "role1"}]
+    assert merge_configs(config1, config2) == merge_all_configs([config1, config2])
+
+    with pytest.raises(ValueError, match="Found a conflict for key `name`"):
+        merge_all_configs([config1, {"name": "other_blueprint"}])
+
+
+def test_collect_configs_from_path_in_parallel(tmp_path):
+    for i in range(PARALLEL_READ_MIN_FILES + 1):
+        (tmp_path / f"roles_{i:03}.yml").write_text(f"roles:\n  - name: role_{i}\n")
+    configs = collect_configs_from_path(str(tmp_path), workers=2)
+    assert len(configs) == PARALLEL_READ_MIN_FILES + 1
+    by_file = dict(configs)
+    for i in range(PARALLEL_READ_MIN_FILES + 1):
+        assert by_file[str(tmp_path / f"roles_{i:03}.yml")] == {"roles": [{"name": f"role_{i}"}]}
+
+    (tmp_path / "broken.yml").write_text("roles: [\n")
+    with pytest.raises(ValueError, match="broken.yml"):
+        collect_configs_from_path(str(tmp_path), workers=2)
+
+
+def test_config_cache_reuses_unchanged_files(tmp_path):
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    (config_dir / "roles.yml").write_text("roles:\n  - name: role1\n")
+    (config_dir / "warehouses.yml").write_text("warehouses:\n  - name: wh1\n")
+
+    cache = ConfigCache(str(tmp_path / "cache"))
+    configs = collect_configs_from_path(str(config_dir), cache=cache)
+    assert (cache.hits, cache.misses) == (0, 2)
+    cache.save()
+
+    (config_dir / "roles.yml").write_text("roles:\n  - name: role2\n")
+    cache = ConfigCache(str(tmp_path / "cache"))
+    configs = collect_configs_from_path(str(config_dir), cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert dict(configs)[str(config_dir / "roles.yml")] == {"roles": [{"name": "role2"}]}
+
+
+def test_config_cache_builds_identical_resources(tmp_path, database_config):
+    config = {"roles": [{"name": "role1", "comment": "a role"}], **database_config}
+    uncached = collect_blueprint_config(copy.deepcopy(config))
+
+    for _ in range(2):
+        cache = ConfigCache(str(tmp_path))
+        cached = collect_blueprint_config(copy.deepcopy(config), cache=cache)
+        cache.save()
+        assert [resource.to_dict() for resource in cached.resources] == [
+            resource.to_dict() for resource in uncached.resources
+        ]
+    assert cache.misses == 0
+
+    database, schema = cached.resources[1:]
+    assert schema.container is database
+    assert database.find(resource_type=schema.resource_type, name="test_schema") is schema
+
+
+def test_config_cache_invalidates_for_each_on_var_change(tmp_path):
+    config = {
+        "vars": [{"name": "some_list_var", "default": ["bar", "baz"], "type": "list"}],
+        "roles": [{"for_each": "var.some_list_var", "name": "role_{{ each.value}}"}],
+    }
+    cache = ConfigCache(str(tmp_path))
+    blueprint_config = collect_blueprint_config(copy.deepcopy(config), cache=cache)
+    assert [resource.name for resource in blueprint_config.resources] == ["role_bar", "role_baz"]
+
+    blueprint_config = collect_blueprint_config(copy.deepcopy(config), {"vars": {"some_list_var": ["qux"]}}, cache)
+    assert [resource.name for resource in blueprint_config.resources] == ["role_qux"]
+    assert cache.hits == 0
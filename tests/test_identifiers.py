@@ -3,7 +3,7 @@ import pytest
 import pyparsing as pp
 
 from snowbytes import resources as res
-from snowbytes.identifiers import parse_URN, smart_split
+from snowbytes.identifiers import parse_identifier, parse_URN, smart_split
 from snowbytes.parse import FullyQualifiedIdentifier
 from snowbytes.resource_name import ResourceName
 
@@ -33,6 +33,14 @@ def test_parse_identifier_wrapped():
         assert pp.MatchFirst(FullyQualifiedIdentifier).parse_string(test_case).as_list() == result
 
 
+def test_parse_identifier_fast_path_matches_grammar():
+    for test_case, result in IDENTIFIER_TEST_CASES + [("db . schema", ["db", "schema"]), ("_x$.y$1", ["_x$", "y$1"])]:
+        parts = [part for part in parse_identifier(test_case).values() if isinstance(part, str)]
+        assert parts == FullyQualifiedIdentifier.parse_string(test_case, parse_all=True).as_list()[:3]
+    with pytest.raises(pp.ParseException):
+        parse_identifier("db.$schema")
+
+
 def test_urn():
     urn = parse_URN("urn::ABCD123:storage_integration/GCS_INT")
     assert str(urn) == "urn::ABCD123:storage_integration/GCS_INT"
@@ -77,6 +85,12 @@ def test_resource_name_equality():
     assert rn1 != rn2
 
 
+def test_resource_name_hash_matches_equality():
+    assert hash(ResourceName("test")) == hash(ResourceName("TEST"))
+    assert hash(ResourceName("test")) == hash(ResourceName('"TEST"'))
+    assert len({ResourceName("test"), ResourceName('"TEST"'), ResourceName('"test"')}) == 2
+
+
 def test_resource_name_string_comparison():
     assert "FOO" in [ResourceName("foo"), ResourceName("bar")]
     assert ResourceName("FOO") in ["foo", "bar"]
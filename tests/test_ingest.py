@@ -0,0 +1,79 @@
+import yaml
+from click.testing import CliRunner
+
+from snowbytes import resources as res
+from snowbytes.cli import snowbytes_cli
+from snowbytes.gitops import collect_blueprint_config
+from snowbytes.operations import ingest
+from snowbytes.operations.ingest import ingest_sql_files, resource_from_statement
+
+DDL = """
+create or replace database ANALYTICS;
+create or replace schema ANALYTICS.RAW comment='raw data';
+create or replace TABLE ANALYTICS.RAW.EVENTS (
+    ID NUMBER(38,0) NOT NULL,
+    PAYLOAD VARCHAR(16777216)
+);
+create or replace view ANALYTICS.RAW.RECENT_EVENTS as select * from ANALYTICS.RAW.EVENTS;
+create or replace file format ANALYTICS.RAW.CSV_FORMAT type = JSON;
+alter table ANALYTICS.RAW.EVENTS set change_tracking = true;
+"""
+
+
+def _write_ddl(tmp_path, sql=DDL):
+    path = tmp_path / "analytics.sql"
+    path.write_text(sql)
+    return str(path)
+
+
+def test_resource_from_statement_resolves_polymorphic_classes():
+    assert isinstance(resource_from_statement("CREATE WAREHOUSE wh"), res.Warehouse)
+    assert isinstance(resource_from_statement("CREATE FILE FORMAT db.sch.ff TYPE = JSON"), res.JSONFileFormat)
+    assert isinstance(resource_from_statement("CREATE FILE FORMAT db.sch.ff TYPE = CSV"), res.CSVFileFormat)
+
+
+def test_ingest_sql_files_reports_failures(tmp_path):
+    path = _write_ddl(tmp_path)
+    result = ingest_sql_files([path], workers=1)
+    assert [type(resource) for resource in result.resources] == [
+        res.Database,
+        res.Schema,
+        res.Table,
+        res.View,
+        res.JSONFileFormat,
+    ]
+    assert len(result.failures) == 1
+    failure = result.failures[0]
+    assert failure.path == path
+    assert failure.index == 5
+    assert failure.sql.startswith("alter table")
+
+
+def test_ingest_sql_files_in_parallel(tmp_path, monkeypatch):
+    path = _write_ddl(tmp_path, DDL * 3)
+    serial = ingest_sql_files([path], workers=1)
+    monkeypatch.setattr(ingest, "INGEST_BATCH_SIZE", 4)
+    parallel = ingest_sql_files([path], workers=2)
+    assert parallel.to_config() == serial.to_config()
+    assert [failure.index for failure in parallel.failures] == [5, 11, 17]
+
+
+def test_ingest_config_round_trips(tmp_path):
+    result = ingest_sql_files([_write_ddl(tmp_path)], workers=1)
+    config = result.to_config()
+    assert config["schemas"][0]["database"] == "ANALYTICS"
+    assert config["tables"][0]["schema"] == "RAW"
+
+    blueprint_config = collect_blueprint_config(yaml.safe_load(yaml.dump(config)))
+    assert {str(resource.fqn) for resource in blueprint_config.resources} == {
+        str(resource.fqn) for resource in result.resources
+    }
+
+
+def test_ingest_cli(tmp_path):
+    path = _write_ddl(tmp_path)
+    out = tmp_path / "analytics.yml"
+    result = CliRunner().invoke(snowbytes_cli, ["ingest", path, f"--out={out}", "--workers=1"])
+    assert result.exit_code == 0, result.output
+    assert "failed to parse 1" in result.output
+    assert [table["name"] for table in yaml.safe_load(out.read_text())["tables"]] == ["EVENTS"]
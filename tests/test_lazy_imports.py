@@ -0,0 +1,45 @@
+import subprocess
+import sys
+
+import snowbytes
+from snowbytes import resources
+from snowbytes.enums import ResourceType
+from snowbytes.resources.resource import Resource
+
+
+def _run(code: str) -> str:
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+def test_import_snowbytes_defers_resources_and_connector():
+    loaded = _run("import sys, snowbytes; print(' '.join(sys.modules))").split()
+    assert "snowflake.connector" not in loaded
+    assert "snowbytes.blueprint" not in loaded
+    assert not [name for name in loaded if name.startswith("snowbytes.resources.") and name != "snowbytes.resources"]
+
+
+def test_import_cli_defers_blueprint():
+    loaded = _run("import sys, snowbytes.cli; print(' '.join(sys.modules))").split()
+    assert "snowflake.connector" not in loaded
+    assert "snowbytes.blueprint" not in loaded
+
+
+def test_resource_registry_loads_on_demand():
+    resource_types = _run(
+        "from snowbytes.resources.resource import Resource; print(','.join(sorted(map(str, Resource.__types__))))"
+    )
+    assert resource_types.split(",") == sorted(map(str, Resource.__types__))
+
+    scope = _run(
+        "from snowbytes.enums import ResourceType; from snowbytes.resources.resource import RESOURCE_SCOPES; "
+        "print(type(RESOURCE_SCOPES[ResourceType.WAREHOUSE]).__name__)"
+    )
+    assert scope == "AccountScope"
+
+
+def test_lazy_resource_exports():
+    assert snowbytes.Role is resources.Role
+    assert snowbytes.Blueprint.__module__ == "snowbytes.blueprint"
+    assert resources.Warehouse in Resource.__types__[ResourceType.WAREHOUSE]
+    assert set(resources.__all__) <= set(dir(resources))
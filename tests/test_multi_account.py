@@ -0,0 +1,117 @@
+import json
+import multiprocessing
+from functools import cache
+
+import pytest
+
+from snowbytes import data_provider
+from snowbytes.enums import AccountEdition, ResourceType
+from snowbytes.operations.multi_account import SUMMARY_FILE, format_summary, load_profiles, run_accounts
+
+CONFIG = {
+    "roles": [{"name": "ANALYST", "comment": "{{ var.env }} analysts"}],
+}
+
+# Each account has a different remote state for the same config
+ACCOUNTS = {
+    "PROD": {"urn::PROD123:role/ANALYST": {"name": "ANALYST", "comment": "prod analysts", "owner": "USERADMIN"}},
+    "DEV": {},
+}
+BUILTIN_ROLES = ["SYSADMIN", "USERADMIN", "SECURITYADMIN"]
+
+
+class FakeConnection:
+    def __init__(self, account, **kwargs):
+        if account not in ACCOUNTS:
+            raise ConnectionError(f"Unknown account {account}")
+        self.account = account
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def accounts(monkeypatch):
+    def fetch_session(session):
+        return {
+            "account": session.account,
+            "account_locator": f"{session.account}123",
+            "account_edition": AccountEdition.ENTERPRISE,
+            "role": "SYSADMIN",
+            "available_roles": BUILTIN_ROLES,
+            "secondary_roles": [],
+        }
+
+    def fetch_resource(session, urn):
+        if urn.resource_type == ResourceType.ACCOUNT:
+            return {"name": str(urn.fqn.name), "locator": f"{session.account}123"}
+        if str(urn.fqn.name) in BUILTIN_ROLES:
+            return {"name": str(urn.fqn.name)}
+        data = ACCOUNTS[session.account].get(str(urn))
+        return dict(data) if data is not None else None
+
+    monkeypatch.setattr(data_provider, "fetch_session", cache(fetch_session))
+    monkeypatch.setattr(data_provider, "use_secondary_roles", lambda session, all=False: None)
+    monkeypatch.setattr(data_provider, "fetch_resource", fetch_resource)
+
+
+def _profiles(tmp_path, profiles):
+    path = tmp_path / "profiles.yml"
+    path.write_text(json.dumps({"profiles": profiles}))
+    return load_profiles(str(path))
+
+
+def test_load_profiles_rejects_duplicate_names(tmp_path):
+    with pytest.raises(ValueError, match="Duplicate"):
+        _profiles(tmp_path, [{"name": "prod", "account": "PROD"}, {"name": "prod", "account": "DEV"}])
+    with pytest.raises(ValueError, match="Profile name"):
+        _profiles(tmp_path, [{"name": "../prod", "account": "PROD"}])
+
+
+def test_run_accounts_writes_a_plan_per_account(accounts, tmp_path):
+    profiles = _profiles(
+        tmp_path,
+        [
+            {"name": "prod", "account": "PROD", "vars": {"env": "prod"}},
+            {"name": "dev", "account": "DEV", "vars": {"env": "dev"}},
+            {"name": "missing", "account": "MISSING", "vars": {"env": "prod"}},
+        ],
+    )
+    out_dir = tmp_path / "plans"
+    results = run_accounts(CONFIG, {}, profiles, out_dir=str(out_dir), workers=1, connection_factory=FakeConnection)
+
+    prod, dev, missing = results
+    assert (prod.account, prod.changes["create"], prod.changes["update"]) == ("PROD", 0, 0)
+    assert (dev.account, dev.changes["create"]) == ("DEV", 1)
+    assert "Unknown account MISSING" in missing.error and missing.plan_file is None
+
+    assert json.loads((out_dir / "prod.json").read_text()) == []
+    (create,) = json.loads((out_dir / "dev.json").read_text())
+    assert create["urn"] == "urn::DEV123:role/ANALYST"
+    assert create["after"]["comment"] == "dev analysts"
+
+    summary = json.loads((out_dir / SUMMARY_FILE).read_text())
+    assert [account["profile"] for account in summary["accounts"]] == ["prod", "dev", "missing"]
+    assert "2 of 3 accounts succeeded" in format_summary(results)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="Workers inherit the fake accounts by forking")
+def test_run_accounts_in_worker_processes(accounts, tmp_path):
+    profiles = _profiles(
+        tmp_path,
+        [
+            {"name": f"{name.lower()}_{idx}", "account": name, "vars": {"env": name.lower()}}
+            for idx in range(3)
+            for name in ["PROD", "DEV"]
+        ],
+    )
+
+    def _run(workers):
+        results = run_accounts(
+            CONFIG, {"dry_run": True}, profiles, apply=True, workers=workers, connection_factory=FakeConnection
+        )
+        return [(result.account, result.changes, result.applied, result.error) for result in results]
+
+    serial = _run(workers=1)
+    assert [(account, changes["create"]) for account, changes, _, _ in serial] == [("PROD", 0), ("DEV", 1)] * 3
+    assert _run(workers=3) == serial
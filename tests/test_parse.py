@@ -1,4 +1,22 @@
-from snowbytes.parse import parse_region
+import os
+import random
+
+import pyparsing as pp
+
+from snowbytes import data_provider
+from snowbytes import resources as res
+from snowbytes.parse import (
+    _parse_create_header,
+    _parse_dynamic_table_text,
+    _parse_props,
+    _props_parser,
+    iter_statements,
+    parse_region,
+    parse_view_ddl,
+    snowflake_sql_comment,
+)
+from snowbytes.scope import AccountScope
+from tests.helpers import FIXTURES_DIR
 
 
 def test_parse_region():
@@ -46,3 +64,119 @@ def test_parse_region():
         "cloud": "GCP",
         "cloud_region": "US_CENTRAL1",
     }
+
+
+def test_props_parser_is_compiled_once():
+    props = res.Warehouse.props
+    assert _props_parser(props) is _props_parser(props)
+    sql = "WAREHOUSE_SIZE = XSMALL /* size */ AUTO_SUSPEND = 60 COMMENT = 'hi'"
+    first = _parse_props(props, sql)
+    assert _parse_props(props, sql) == first
+    assert first["auto_suspend"] == 60
+    assert first["comment"] == "hi"
+
+
+def test_create_header_parser_is_reused():
+    sql = "CREATE OR REPLACE WAREHOUSE my_wh WAREHOUSE_SIZE = XSMALL"
+    for _ in range(2):
+        assert _parse_create_header(sql, res.Warehouse.resource_type, AccountScope()) == (
+            {"name": "my_wh"},
+            "WAREHOUSE_SIZE = XSMALL",
+        )
+
+
+def _pyparsing_split_statements(sql_text):
+    # The pyparsing splitter that iter_statements replaced, kept as a reference
+    single_quote = pp.QuotedString("'", multiline=True, unquote_results=False)
+    double_quote = pp.QuotedString('"', multiline=True, unquote_results=False)
+    double_dollar = pp.QuotedString("$$", multiline=True, unquote_results=False, end_quote_char="$$")
+    triple_dollar = pp.QuotedString("$$$", multiline=True, unquote_results=False, end_quote_char="$$$")
+    any_sql_string = pp.MatchFirst([single_quote, double_quote, double_dollar, triple_dollar])
+    other_chars = pp.Word(pp.printables, excludeChars=";") | pp.White()
+    semicolon = pp.Literal(";").suppress()
+    parser = pp.OneOrMore(any_sql_string | other_chars).set_parse_action(" ".join) + semicolon
+    parser = parser.ignore(pp.c_style_comment | snowflake_sql_comment)
+
+    results = []
+    end = 0
+    for result, start, end in parser.scan_string(sql_text):
+        results.append(result[0])
+    remainder = sql_text[end:]
+    if remainder.strip():
+        results.append(remainder)
+    return results
+
+
+def _without_whitespace(statements):
+    # The old splitter put a space between adjacent tokens and collapsed whitespace inside some strings
+    return ["".join(statement.split()) for statement in statements]
+
+
+def test_iter_statements_matches_pyparsing_splitter_on_fixtures():
+    sql_dir = os.path.join(FIXTURES_DIR, "sql")
+    for file_name in sorted(os.listdir(sql_dir)):
+        with open(os.path.join(sql_dir, file_name), encoding="utf-8") as f:
+            sql_text = f.read()
+        assert _without_whitespace(iter_statements(sql_text)) == _without_whitespace(
+            _pyparsing_split_statements(sql_text)
+        ), file_name
+
+
+def test_iter_statements_matches_pyparsing_splitter_on_generated_sql():
+    tokens = [
+        "CREATE",
+        "TABLE",
+        "db.sch.tbl",
+        "(a INT, b VARCHAR)",
+        "'str; with semicolon'",
+        "'multi\nline'",
+        '"Quoted;Ident"',
+        "$$ body;\n more; $$",
+        "-- comment; here\n",
+        "/* block; comment */",
+        "=",
+        "\n\t",
+    ]
+    rng = random.Random(0)
+    for _ in range(200):
+        # Statements start with a keyword and end with a semicolon. The old splitter mishandled statements
+        # that start with a string, and split an unterminated last statement on semicolons inside strings.
+        statements = [
+            " ".join(["CREATE"] + [rng.choice(tokens) for _ in range(rng.randint(0, 8))])
+            for _ in range(rng.randint(1, 5))
+        ]
+        sql_text = " ;\n".join(statements) + rng.choice([";", " ;  "])
+        assert _without_whitespace(iter_statements(sql_text)) == _without_whitespace(
+            _pyparsing_split_statements(sql_text)
+        ), sql_text
+
+
+def test_iter_statements():
+    sql_text = "CREATE ROLE a  -- first\n;\nALTER x SET c='it''s;  fine',d='a\\'b;c';;\n/* ; */ SELECT $$;$$"
+    statements = iter_statements(sql_text)
+    assert next(statements) == "CREATE ROLE a"
+    assert list(statements) == ["ALTER x SET c='it''s;  fine',d='a\\'b;c'", "SELECT $$;$$"]
+    assert list(iter_statements("CREATE X $$$ a $$ b; $$$;")) == ["CREATE X $$$ a $$ b; $$$"]
+    assert list(iter_statements("  \n -- only a comment")) == []
+
+
+def test_view_and_dynamic_table_ddl_parsing_is_memoized():
+    view_ddl = "CREATE VIEW DB.PUBLIC.V (id)\n  CHANGE_TRACKING = TRUE\nas\nSELECT id\nFROM DB.PUBLIC.T"
+    hits = parse_view_ddl.cache_info().hits
+    assert parse_view_ddl(view_ddl) == "SELECT id FROM DB.PUBLIC.T"
+    # An equal string from another SHOW result is a hit
+    assert parse_view_ddl("".join(list(view_ddl))) == "SELECT id FROM DB.PUBLIC.T"
+    assert parse_view_ddl.cache_info().hits == hits + 1
+
+    dynamic_table_ddl = (
+        "CREATE DYNAMIC TABLE product (id INT)\n  lag = '20 minutes'\n  refresh_mode = 'AUTO'\n"
+        "  initialize = 'ON_CREATE'\n  warehouse = CI\n  AS\n    SELECT id FROM upstream"
+    )
+    expected = ("AUTO", "ON_CREATE", "SELECT id FROM upstream")
+    assert _parse_dynamic_table_text(dynamic_table_ddl) == expected
+    assert _parse_dynamic_table_text(dynamic_table_ddl) == expected
+
+    # Long-lived processes drop parsed definitions along with the rest of the session's caches
+    data_provider.reset_session_caches()
+    assert parse_view_ddl.cache_info().currsize == 0
+    assert _parse_dynamic_table_text.cache_info().currsize == 0
@@ -1,7 +1,14 @@
 import pytest
 
 from snowbytes import resources as res
-from snowbytes.blueprint import Blueprint, CreateResource, DropResource, NonConformingPlanException, RunMode, UpdateResource
+from snowbytes.blueprint import (
+    Blueprint,
+    CreateResource,
+    DropResource,
+    NonConformingPlanException,
+    RunMode,
+    UpdateResource,
+)
 from snowbytes.enums import AccountEdition, ResourceType
 from snowbytes.identifiers import parse_URN
 
@@ -92,3 +99,17 @@ def test_plan_no_removes_in_run_mode_create_or_update(session_ctx, remote_state)
     assert change.urn == parse_URN("urn::ABCD123:role/REMOVED_ROLE")
     with pytest.raises(NonConformingPlanException):
         bp._raise_for_nonconforming_plan(session_ctx, plan)
+
+
+def test_plan_unchanged_resource(session_ctx, remote_state):
+    remote_state[parse_URN("urn::ABCD123:role/EXISTING_ROLE")] = {
+        "owner": "USERADMIN",
+        "name": "EXISTING_ROLE",
+        "comment": "some comment",
+    }
+    bp = Blueprint(resources=[res.Role(name="EXISTING_ROLE", comment="some comment")])
+    manifest = bp.generate_manifest(session_ctx)
+    manifest_item = manifest[parse_URN("urn::ABCD123:role/EXISTING_ROLE")]
+    assert manifest_item.data == remote_state[parse_URN("urn::ABCD123:role/EXISTING_ROLE")]
+    plan = bp._plan(remote_state, manifest)
+    assert len(plan) == 0
@@ -0,0 +1,128 @@
+import json
+import logging
+
+import pytest
+
+from snowbytes import data_provider, plan_cache
+from snowbytes.blueprint import Blueprint, UpdateResource
+from snowbytes.config_cache import ConfigCache
+from snowbytes.enums import AccountEdition, ResourceType
+from snowbytes.gitops import collect_blueprint_config
+from snowbytes.plan_cache import PlanCache
+from snowbytes.resources import Warehouse
+
+SESSION_CTX = {
+    "account": "SOMEACCT",
+    "account_locator": "ABCD123",
+    "account_edition": AccountEdition.ENTERPRISE,
+    "role": "SYSADMIN",
+    "available_roles": ["SYSADMIN", "USERADMIN", "SECURITYADMIN"],
+    "secondary_roles": [],
+}
+
+CONFIG = {
+    "roles": [{"name": "ANALYST", "comment": "analysts"}, {"name": "LOADER", "comment": "loaders"}],
+    "grants": [{"priv": "CREATE DATABASE", "on": "ACCOUNT", "to_role": "ANALYST"}],
+}
+
+
+def _blueprint(config=CONFIG) -> Blueprint:
+    return Blueprint.from_config(collect_blueprint_config(json.loads(json.dumps(config))))
+
+
+@pytest.fixture
+def account(monkeypatch):
+    show_results = {
+        "SHOW ROLES": [
+            {"name": "ANALYST", "created_on": "2024-01-01", "owner": "USERADMIN", "comment": "analysts"},
+            {"name": "LOADER", "created_on": "2024-01-01", "owner": "USERADMIN", "comment": "loaders"},
+        ],
+        "SHOW GRANTS TO ROLE ANALYST": [],
+    }
+    remote = {}
+    fetched = []
+
+    def execute(session, sql, cacheable=False, empty_response_codes=None):
+        return [dict(row) for row in show_results[sql]]
+
+    def fetch_resource(session, urn):
+        fetched.append(urn)
+        if urn.resource_type == ResourceType.ACCOUNT:
+            return {"name": str(urn.fqn.name), "locator": SESSION_CTX["account_locator"]}
+        if str(urn.fqn.name) in SESSION_CTX["available_roles"]:
+            return {"name": str(urn.fqn.name)}
+        data = remote.get(str(urn))
+        return dict(data) if data is not None else None
+
+    monkeypatch.setattr(data_provider, "execute", execute)
+    monkeypatch.setattr(plan_cache, "execute", execute)
+    monkeypatch.setattr(data_provider, "fetch_session", lambda session: SESSION_CTX)
+    monkeypatch.setattr(data_provider, "use_secondary_roles", lambda session, all=False: None)
+    monkeypatch.setattr(data_provider, "fetch_resource", fetch_resource)
+    return show_results, remote, fetched
+
+
+def test_plan_cache_reuses_plan_until_config_or_account_changes(account, tmp_path):
+    show_results, _, fetched = account
+
+    store = ConfigCache(str(tmp_path))
+    plan = _blueprint().plan(None, plan_cache=PlanCache(store))
+    assert fetched and len(plan) == 3
+    store.save()
+
+    # A new run loads the plan from disk without fetching anything
+    fetched.clear()
+    assert _blueprint().plan(None, plan_cache=PlanCache(ConfigCache(str(tmp_path)))) == plan
+    assert fetched == []
+
+    # Volatile columns don't count as a change to the account
+    show_results["SHOW ROLES"][0]["is_current"] = "Y"
+    assert _blueprint().plan(None, plan_cache=PlanCache(store)) == plan
+    assert fetched == []
+
+    # Something changed in the account
+    show_results["SHOW GRANTS TO ROLE ANALYST"].append(
+        {"privilege": "CREATE DATABASE", "granted_on": "ACCOUNT", "name": "SOMEACCT", "grantee_name": "ANALYST"}
+    )
+    _blueprint().plan(None, plan_cache=PlanCache(store))
+    assert fetched
+
+    # Something changed in the config
+    fetched.clear()
+    config = {**CONFIG, "roles": [{"name": "ANALYST", "comment": "changed"}, CONFIG["roles"][1]]}
+    _blueprint(config).plan(None, plan_cache=PlanCache(store))
+    assert fetched
+
+
+def test_plan_cache_skips_resource_types_without_a_fingerprint(account, tmp_path, caplog):
+    caplog.set_level(logging.INFO, logger="snowbytes")
+    _, _, fetched = account
+    config = {
+        **CONFIG,
+        "databases": [{"name": "ANALYTICS"}],
+        "network_rules": [{"name": "RULE", "database": "ANALYTICS", "schema": "PUBLIC", "value_list": ["0.0.0.0"]}],
+    }
+    store = ConfigCache(str(tmp_path))
+    for _ in range(2):
+        fetched.clear()
+        _blueprint(config).plan(None, plan_cache=PlanCache(store))
+        assert fetched
+    assert store.hits == 0
+    assert "Plan cache skipped, only configs of roles, tags and grants are cached. Found: DATABASE" in caplog.text
+
+
+def test_plan_cache_misses_when_a_warehouse_parameter_changes(account, tmp_path):
+    # SHOW WAREHOUSES doesn't return parameters, so an ALTER WAREHOUSE ... SET leaves it unchanged
+    _, remote, _ = account
+    config = {"warehouses": [{"name": "LOADING", "statement_timeout_in_seconds": 60}]}
+    remote["urn::ABCD123:warehouse/LOADING"] = Warehouse(
+        name="LOADING", owner="SYSADMIN", statement_timeout_in_seconds=60
+    ).to_dict()
+
+    store = ConfigCache(str(tmp_path))
+    assert _blueprint(config).plan(None, plan_cache=PlanCache(store)) == []
+
+    remote["urn::ABCD123:warehouse/LOADING"]["statement_timeout_in_seconds"] = 3600
+    (change,) = _blueprint(config).plan(None, plan_cache=PlanCache(store))
+    assert isinstance(change, UpdateResource) and change.delta == {"statement_timeout_in_seconds": 60}
+    assert store.hits == 0
@@ -0,0 +1,90 @@
+import datetime
+import time
+
+import pytest
+from snowflake.connector.errors import ProgrammingError
+
+from snowbytes import data_provider
+from snowbytes.client import DOES_NOT_EXIST_ERR, execute, reset_cache
+from snowbytes.exceptions import UnrecordedStatementException
+from snowbytes.replay import SessionRecorder, SessionReplay, SessionTrace
+
+CREATED_ON = datetime.datetime(2024, 2, 28, 20, 5, 32, 166000, tzinfo=datetime.timezone.utc)
+ACCOUNT = {
+    "SHOW ROLES": [{"name": "ANALYST", "created_on": CREATED_ON}, {"name": "LOADER", "created_on": CREATED_ON}],
+    "SHOW GRANTS OF ROLE ANALYST": [{"role": "ANALYST", "granted_to": "USER", "grantee_name": "SOMEUSER"}],
+}
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self._rows = []
+
+    def execute(self, sql):
+        if sql.startswith("USE ROLE"):
+            self.connection.role = sql.split(" ", 2)[-1]
+            self._rows = [{"status": "Statement executed successfully."}]
+        elif sql in ACCOUNT:
+            self._rows = [dict(row) for row in ACCOUNT[sql]]
+        else:
+            raise ProgrammingError(msg=f"Object does not exist: {sql}", errno=DOES_NOT_EXIST_ERR)
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConnection:
+    user = "SOMEUSER"
+
+    def __init__(self):
+        self.role = "SYSADMIN"
+
+    def cursor(self, cursor_class=None):
+        return FakeCursor(self)
+
+
+@pytest.fixture
+def trace(tmp_path):
+    reset_cache()
+    recorder = SessionRecorder()
+    session = recorder.wrap(FakeConnection())
+    execute(session, "USE ROLE SECURITYADMIN")
+    recorded = data_provider.list_role_grants(session)
+    assert [str(fqn.name) for fqn in recorded] == ["ANALYST"]
+
+    path = str(tmp_path / "trace.json")
+    recorder.trace.save(path)
+    reset_cache()
+    return SessionTrace.load(path)
+
+
+def test_replay_serves_recorded_session(trace):
+    assert trace.user == "SOMEUSER"
+    assert trace.role == "SYSADMIN"
+    assert trace.captures[1].rows[0]["created_on"] == CREATED_ON
+    assert trace.captures[-1].errno == DOES_NOT_EXIST_ERR
+
+    session = SessionReplay(trace).connect()
+    assert session.role == "SYSADMIN"
+    execute(session, "USE ROLE SECURITYADMIN")
+    assert session.role == "SECURITYADMIN"
+    assert data_provider.list_role_grants(session) == data_provider.list_role_grants(session)
+    assert [fqn.params for fqn in data_provider.list_role_grants(session)] == [{"user": "SOMEUSER"}]
+
+    with pytest.raises(UnrecordedStatementException):
+        execute(session, "SHOW WAREHOUSES")
+
+
+def test_replay_latency(trace):
+    session = SessionReplay(trace, latency=0.05).connect()
+    start = time.perf_counter()
+    execute(session, "USE ROLE SECURITYADMIN")
+    assert time.perf_counter() - start >= 0.05
+
+    replay = SessionReplay(trace, latency=lambda capture: 0.05 if capture.sql == "SHOW ROLES" else 0)
+    session = replay.connect()
+    execute(session, "USE ROLE SECURITYADMIN")
+    start = time.perf_counter()
+    execute(session, "SHOW ROLES")
+    assert time.perf_counter() - start >= 0.05
@@ -132,3 +132,43 @@ def test_prevent_container_chaining_if_already_set():
     schema = res.Schema(name="SCH", database=db1)
     with pytest.raises(ResourceHasContainerException):
         res.Task(name="TASK", database=db2, schema=schema)
+
+
+def test_find_resource_by_name():
+    database = res.Database("SOME_DATABASE")
+    schema = res.Schema("SOME_SCHEMA")
+    quoted_schema = res.Schema('"quoted_schema"')
+    database.add(schema, quoted_schema)
+    assert database.find(resource_type=ResourceType.SCHEMA, name="some_schema") is schema
+    assert database.find(resource_type=ResourceType.SCHEMA, name='"SOME_SCHEMA"') is schema
+    assert database.find(resource_type=ResourceType.SCHEMA, name='"quoted_schema"') is quoted_schema
+    with pytest.raises(KeyError):
+        database.find(resource_type=ResourceType.SCHEMA, name="quoted_schema")
+    with pytest.raises(KeyError):
+        database.find(resource_type=ResourceType.VIEW, name="some_schema")
+
+
+def test_find_resource_with_resolved_var_name():
+    database = res.Database("SOME_DATABASE")
+    schema = res.Schema("SCHEMA_{{ var.suffix }}")
+    database.add(schema)
+    schema._resolve_vars({"suffix": "DEV"})
+    assert database.find(resource_type=ResourceType.SCHEMA, name="SCHEMA_DEV") is schema
+    database.remove(schema)
+    with pytest.raises(KeyError):
+        database.find(resource_type=ResourceType.SCHEMA, name="SCHEMA_DEV")
+
+
+def test_container_items_keep_insertion_order():
+    schema = res.Schema("SOME_SCHEMA")
+    views = [res.View(f"VIEW_{i}") for i in range(5)]
+    tables = [res.Table(f"TABLE_{i}", columns=[{"name": "ID", "data_type": "INT"}]) for i in range(5)]
+    for view, table in zip(views, tables):
+        schema.add(view, table)
+    schema.remove(views[2])
+    assert schema.items(resource_type=ResourceType.VIEW) == views[:2] + views[3:]
+    assert schema.items() == views[:2] + views[3:] + tables
+    assert views[2] not in schema
+    assert views[2].container is None
+    with pytest.raises(KeyError):
+        schema.find(resource_type=ResourceType.VIEW, name="VIEW_2")
@@ -0,0 +1,176 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from functools import cache
+
+import pytest
+from snowflake.connector.errors import DatabaseError
+
+from snowbytes import data_provider, plan_cache
+from snowbytes.blueprint import UpdateResource
+from snowbytes.enums import AccountEdition, ResourceType
+from snowbytes.server import PlanHTTPServer, PlanServer
+
+SESSION_CTX = {
+    "account": "SOMEACCT",
+    "account_locator": "ABCD123",
+    "account_edition": AccountEdition.ENTERPRISE,
+    "role": "SYSADMIN",
+    "available_roles": ["SYSADMIN", "USERADMIN", "SECURITYADMIN"],
+    "secondary_roles": [],
+}
+
+CONFIG = {
+    "roles": [{"name": "ANALYST", "comment": "analysts"}],
+    "grants": [{"priv": "CREATE DATABASE", "on": "ACCOUNT", "to_role": "ANALYST"}],
+}
+
+
+class FakeConnection:
+    closed = False
+    expired = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def account(monkeypatch):
+    show_results = {
+        "SHOW ROLES": [{"name": "ANALYST", "created_on": "2024-01-01", "owner": "USERADMIN", "comment": "analysts"}],
+        "SHOW GRANTS TO ROLE ANALYST": [],
+    }
+    fetched = []
+
+    def execute(session, sql, cacheable=False, empty_response_codes=None):
+        return [dict(row) for row in show_results[sql]]
+
+    def fetch_resource(session, urn):
+        fetched.append(urn)
+        if urn.resource_type == ResourceType.ACCOUNT:
+            return {"name": str(urn.fqn.name), "locator": SESSION_CTX["account_locator"]}
+        if str(urn.fqn.name) in SESSION_CTX["available_roles"]:
+            return {"name": str(urn.fqn.name)}
+        if urn.resource_type == ResourceType.ROLE and str(urn.fqn.name) == "ANALYST":
+            return {"name": "ANALYST", "comment": show_results["SHOW ROLES"][0]["comment"], "owner": "USERADMIN"}
+        return None
+
+    monkeypatch.setattr(data_provider, "execute", execute)
+    monkeypatch.setattr(plan_cache, "execute", execute)
+    monkeypatch.setattr(data_provider, "fetch_session", cache(lambda session: SESSION_CTX))
+    monkeypatch.setattr(data_provider, "use_secondary_roles", lambda session, all=False: None)
+    monkeypatch.setattr(data_provider, "fetch_resource", fetch_resource)
+    return show_results, fetched
+
+
+def test_plan_server_keeps_state_warm_between_plans(account):
+    show_results, fetched = account
+    with PlanServer(connection_factory=FakeConnection) as server:
+        plan = server.plan(CONFIG)
+        assert [str(change.urn) for change in plan] == [
+            "urn::ABCD123:grant/GRANT?priv=CREATE DATABASE&on=account/ACCOUNT&to=role/ANALYST",
+        ]
+
+        fetched.clear()
+        assert server.plan(CONFIG) == plan
+        assert fetched == []
+
+        # Nothing changed, so only resources without a fingerprint are fetched again
+        server.refresh()
+        server.plan(CONFIG)
+        assert {urn.resource_type for urn in fetched} == {ResourceType.ACCOUNT}
+
+        # The role changed, and only roles are fetched again
+        fetched.clear()
+        show_results["SHOW ROLES"][0]["comment"] = "changed"
+        server.refresh()
+        updates = [change for change in server.plan(CONFIG) if isinstance(change, UpdateResource)]
+        assert [str(change.urn) for change in updates] == ["urn::ABCD123:role/ANALYST"]
+        assert {urn.resource_type for urn in fetched} == {ResourceType.ACCOUNT, ResourceType.ROLE}
+    assert server.session.closed
+
+
+def test_plan_server_reconnects_when_the_session_is_gone(account, monkeypatch):
+    _, fetched = account
+    fetch_resource = data_provider.fetch_resource
+
+    def _check(session):
+        if session.expired:
+            raise DatabaseError("Session no longer exists", errno=390111)
+
+    def fetch_session(session):
+        _check(session)
+        return SESSION_CTX
+
+    def expiring_fetch_resource(session, urn):
+        _check(session)
+        return fetch_resource(session, urn)
+
+    monkeypatch.setattr(data_provider, "fetch_session", cache(fetch_session))
+    monkeypatch.setattr(data_provider, "fetch_resource", expiring_fetch_resource)
+
+    sessions = []
+
+    def connection_factory():
+        sessions.append(FakeConnection())
+        return sessions[-1]
+
+    with PlanServer(connection_factory=connection_factory) as server:
+        plan = server.plan(CONFIG)
+
+        # A refresh on a dead session opens a new one and drops everything fetched on the old one
+        sessions[0].expired = True
+        assert server.refresh() == len(fetched)
+        assert len(sessions) == 2 and sessions[0].closed
+
+        fetched.clear()
+        assert server.plan(CONFIG) == plan
+        assert fetched
+
+        # So does a plan that needs to fetch something
+        sessions[1].expired = True
+        fetched.clear()
+        server.plan({**CONFIG, "roles": [*CONFIG["roles"], {"name": "LOADER"}]})
+        assert len(sessions) == 3
+        assert "urn::ABCD123:role/LOADER" in [str(urn) for urn in fetched]
+        assert server.status()["reconnects"] == 2
+    assert sessions[2].closed
+
+
+def test_plan_http_server(account, monkeypatch):
+    with PlanServer(connection_factory=FakeConnection) as plan_server:
+        http_server = PlanHTTPServer(plan_server, port=0)
+        thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{http_server.server_address[1]}"
+
+        def post(path, body):
+            request = urllib.request.Request(url + path, data=json.dumps(body).encode(), method="POST")
+            with urllib.request.urlopen(request) as response:
+                return json.loads(response.read())
+
+        try:
+            plan = post("/plan", {"config": CONFIG})
+            assert [change["action"] for change in plan] == ["CREATE"]
+            assert post("/refresh", {}) == {"dropped": 1}
+
+            with urllib.request.urlopen(url + "/status") as response:
+                status = json.loads(response.read())
+            assert (status["account"], status["plans"]) == ("SOMEACCT", 1)
+
+            with pytest.raises(urllib.error.HTTPError) as err:
+                post("/plan", {"vars": {}})
+            assert err.value.code == 400
+
+            def refresh():
+                raise ConnectionError("Connection lost")
+
+            monkeypatch.setattr(plan_server, "refresh", refresh)
+            with pytest.raises(urllib.error.HTTPError) as err:
+                post("/refresh", {})
+            assert err.value.code == 500
+            assert json.loads(err.value.read()) == {"error": "ConnectionError: Connection lost"}
+        finally:
+            http_server.shutdown()
+            http_server.server_close()
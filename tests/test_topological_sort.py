@@ -1,4 +1,8 @@
+import pytest
+
 from snowbytes.blueprint import topological_sort
+from snowbytes.exceptions import NotADAGException
+from snowbytes.graph import topological_levels
 
 resource_set = {
     'urn:::role_grant/private_equity_associate?user="c.black@arrakisinvestments.com"',
@@ -96,3 +100,44 @@ refs = [
 def test_topological_sort():
     sorted_resources = topological_sort(resource_set, set(refs))
     assert len(sorted_resources) == len(resource_set)
+
+
+def test_topological_sort_orders_references_first():
+    sorted_resources = topological_sort(resource_set, set(refs))
+    for node, ref in refs:
+        assert sorted_resources[ref] < sorted_resources[node]
+
+
+def test_topological_levels():
+    order, levels = topological_levels(
+        {"account", "role", "user", "role_grant", "warehouse"},
+        {
+            ("role", "account"),
+            ("user", "account"),
+            ("warehouse", "account"),
+            ("role_grant", "role"),
+            ("role_grant", "user"),
+        },
+    )
+    assert levels == {"account": 0, "role": 1, "user": 1, "warehouse": 1, "role_grant": 2}
+    assert sorted(order.values()) == list(range(5))
+    assert order["account"] < order["role"] < order["role_grant"]
+
+
+def test_topological_sort_reports_cycle():
+    with pytest.raises(NotADAGException) as err:
+        topological_sort(
+            {"a", "b", "c", "d"},
+            {("d", "a"), ("a", "b"), ("b", "c"), ("c", "a")},
+        )
+    cycle = err.value.cycle
+    assert cycle[0] == cycle[-1]
+    assert set(cycle) == {"a", "b", "c"}
+    assert len(cycle) == 4
+    assert " -> ".join(cycle) in str(err.value)
+
+
+def test_topological_sort_reports_self_reference():
+    with pytest.raises(NotADAGException) as err:
+        topological_sort({"a", "b"}, {("a", "b"), ("b", "b")})
+    assert err.value.cycle == ["b", "b"]
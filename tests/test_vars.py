@@ -1,6 +1,9 @@
+import pytest
+
 from snowbytes import resources as res
 from snowbytes import var
-from snowbytes.var import VarString
+from snowbytes.exceptions import MissingVarException
+from snowbytes.var import GLOBAL_JINJA_ENV, VarString, compile_template, expand_for_each, process_for_each
 
 
 def test_blueprint_vars_comparison_with_system_names():
@@ -20,3 +23,32 @@ def test_vars_database_role():
     role = res.DatabaseRole(name="role_{{ var.role_name }}", database="db_{{ var.db_name }}")
     assert isinstance(role._data.name, VarString)
     assert isinstance(role._data.database, VarString)
+
+
+@pytest.mark.parametrize(
+    "string",
+    ["plain", "trailing\n", "two trailing\n\n", "\n", "", "windows\r\nlines\r\n", "not a var }}", "{ brace"],
+)
+def test_var_string_without_template_renders_like_jinja(string):
+    assert VarString(string).to_string({}) == GLOBAL_JINJA_ENV.from_string(string).render(var={})
+
+
+def test_var_string_compiles_template_once():
+    compile_template.cache_clear()
+    for name in ["a", "b", "c"]:
+        assert VarString("role_{{ var.name }}").to_string({"name": name}) == f"role_{name}"
+    assert compile_template.cache_info().misses == 1
+
+    with pytest.raises(MissingVarException):
+        VarString("role_{{ var.missing }}").to_string({})
+
+
+def test_expand_for_each():
+    resource_data = {"name": "role_{{ each.value }}", "comment": "for {{ var.team }}", "owner": "SYSADMIN"}
+    instances = list(expand_for_each(resource_data, ["a", "b"]))
+    assert instances == [
+        {"name": "role_a", "comment": "for {{ var.team }}", "owner": "SYSADMIN"},
+        {"name": "role_b", "comment": "for {{ var.team }}", "owner": "SYSADMIN"},
+    ]
+    assert instances[0]["name"] == process_for_each(resource_data["name"], "a")
+    assert resource_data["name"] == "role_{{ each.value }}"
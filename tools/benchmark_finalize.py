@@ -0,0 +1,64 @@
+import time
+
+import click
+
+from snowbytes import resources as res
+from snowbytes.blueprint import Blueprint
+
+SESSION_CTX = {
+    "account": "BENCHMARK",
+    "account_locator": "BENCH123",
+    "account_edition": "ENTERPRISE",
+    "role": "SYSADMIN",
+    "available_roles": ["SYSADMIN", "USERADMIN", "SECURITYADMIN"],
+}
+
+
+def build_resources(resource_count: int, role_grant_count: int, tag_count: int) -> list:
+    resources: list = []
+
+    roles = [res.Role(f"BENCH_ROLE_{i}") for i in range(role_grant_count)]
+    resources.extend(roles)
+    for i, role in enumerate(roles):
+        # Chain roles into a tree so that role grants reference each other
+        parent = roles[i // 2] if i > 0 else "SYSADMIN"
+        resources.append(res.RoleGrant(role=role, to_role=parent))
+
+    db = res.Database("BENCH_DB")
+    schema = res.Schema("BENCH_SCHEMA")
+    db.add(schema)
+    resources.append(db)
+    for i in range(tag_count):
+        schema.add(res.Tag(f"BENCH_TAG_{i}"))
+
+    for i in range(resource_count):
+        # Owned by custom roles that aren't in the session, so role grants are searched for each resource
+        owner = roles[i % role_grant_count] if role_grant_count else "SYSADMIN"
+        tags = {f"BENCH_TAG_{i % tag_count}": "VALUE"} if tag_count else None
+        resources.append(res.Warehouse(f"BENCH_WH_{i}", owner=owner, tags=tags))
+
+    return resources
+
+
+@click.command()
+@click.option("--resources", "resource_count", default=40_000, show_default=True, help="Number of owned resources")
+@click.option("--role-grants", "role_grant_count", default=5_000, show_default=True, help="Number of role grants")
+@click.option("--tags", "tag_count", default=500, show_default=True, help="Number of tags")
+@click.option("--max-seconds", type=float, default=None, help="Exit with an error if finalize takes longer than this")
+def main(resource_count, role_grant_count, tag_count, max_seconds):
+    """Time Blueprint._finalize on a synthetic config"""
+    resources = build_resources(resource_count, role_grant_count, tag_count)
+    blueprint = Blueprint(resources=resources)
+
+    start = time.perf_counter()
+    blueprint._finalize(SESSION_CTX)
+    finalize_runtime = time.perf_counter() - start
+
+    print(f"finalize: {len(blueprint._resources)} resources in {finalize_runtime:.2f}s")
+
+    if max_seconds is not None and finalize_runtime > max_seconds:
+        raise click.ClickException(f"finalize took {finalize_runtime:.2f}s, limit is {max_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
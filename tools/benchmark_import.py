@@ -0,0 +1,64 @@
+import statistics
+import subprocess
+import sys
+
+import click
+
+# Modules that should only be imported once a command actually needs them
+DEFERRED_MODULES = [
+    "snowflake.connector",
+    "snowbytes.blueprint",
+    "snowbytes.resources.grant",
+    "snowbytes.resources.warehouse",
+]
+
+
+def time_import(module: str) -> float:
+    """Import a module in a fresh interpreter and return the cumulative import time in milliseconds"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        # Lines look like "import time:   self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    raise click.ClickException(f"No import time reported for {module}")
+
+
+def loaded_modules(module: str) -> set[str]:
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print('\\n'.join(sys.modules))"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.splitlines())
+
+
+@click.command()
+@click.option("--module", "modules", multiple=True, default=["snowbytes", "snowbytes.cli"], show_default=True)
+@click.option("--runs", default=5, show_default=True, help="Number of fresh interpreters to time each module in")
+@click.option("--max-ms", type=float, default=None, help="Exit with an error if any module takes longer than this")
+def main(modules, runs, max_ms):
+    """Time `import snowbytes` and CLI startup in fresh interpreters"""
+    failures = []
+    for module in modules:
+        timings = [time_import(module) for _ in range(runs)]
+        median = statistics.median(timings)
+        deferred = sorted(name for name in DEFERRED_MODULES if name in loaded_modules(module))
+        print(f"{module}: median {median:.1f}ms, min {min(timings):.1f}ms over {runs} runs")
+        if deferred:
+            failures.append(f"{module} eagerly imports {', '.join(deferred)}")
+        if max_ms is not None and median > max_ms:
+            failures.append(f"{module} took {median:.1f}ms, limit is {max_ms:.1f}ms")
+
+    if failures:
+        raise click.ClickException("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
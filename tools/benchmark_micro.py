@@ -0,0 +1,252 @@
+import json
+import os
+import platform
+import timeit
+from dataclasses import fields
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+import click
+
+from snowbytes import resources as res
+from snowbytes.blueprint import _diff_resource_data
+from snowbytes.data_provider import _filter_result
+from snowbytes.enums import AccountEdition
+from snowbytes.graph import topological_sort
+from snowbytes.identifiers import parse_FQN, parse_URN
+from snowbytes.parse import _parse_props
+from snowbytes.resource_name import ResourceName
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+DEFAULT_THRESHOLD = 0.25
+
+# Each benchmark is a setup function that returns the callable to time
+BENCHMARKS: dict[str, Callable[[], Callable[[], Any]]] = {}
+
+
+def benchmark(name: str):
+    def register(setup: Callable[[], Callable[[], Any]]):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+@benchmark("resource_name.construct")
+def bench_resource_name_construct():
+    return lambda: (ResourceName("ANALYTICS_DB"), ResourceName('"Mixed Case Name"'))
+
+
+@benchmark("resource_name.eq")
+def bench_resource_name_eq():
+    lhs, rhs, quoted = ResourceName("ANALYTICS_DB"), ResourceName("analytics_db"), ResourceName('"analytics_db"')
+    return lambda: (lhs == rhs, lhs == quoted, lhs == "ANALYTICS_DB")
+
+
+@benchmark("resource_name.hash")
+def bench_resource_name_hash():
+    name = ResourceName("ANALYTICS_DB")
+    return lambda: hash(name)
+
+
+@benchmark("parse_FQN")
+def bench_parse_fqn():
+    return lambda: (parse_FQN("ANALYTICS_DB.RAW.EVENTS"), parse_FQN('ANALYTICS_DB."Raw Schema"'))
+
+
+@benchmark("parse_URN")
+def bench_parse_urn():
+    return lambda: parse_URN("urn::ABCD123:table/ANALYTICS_DB.RAW.EVENTS")
+
+
+@benchmark("URN.__hash__")
+def bench_urn_hash():
+    urn = parse_URN("urn::ABCD123:table/ANALYTICS_DB.RAW.EVENTS")
+    return lambda: hash(urn)
+
+
+def _sample_resources() -> dict[str, res.Resource]:
+    return {
+        "grant": res.Grant(priv="SELECT", on_table="ANALYTICS_DB.RAW.EVENTS", to="ANALYST"),
+        "table": res.Table(
+            name="EVENTS",
+            database="ANALYTICS_DB",
+            schema="RAW",
+            columns=[
+                {"name": "ID", "data_type": "NUMBER(38,0)", "not_null": True},
+                {"name": "PAYLOAD", "data_type": "VARCHAR(16777216)"},
+                {"name": "LOADED_AT", "data_type": "TIMESTAMP_NTZ(9)"},
+            ],
+            comment="Raw events",
+        ),
+        "user": res.User(
+            name="SOMEUSER",
+            login_name="SOMEUSER",
+            display_name="Some User",
+            email="someuser@example.com",
+            default_role="ANALYST",
+            comment="Analyst",
+        ),
+    }
+
+
+def _register_spec_benchmarks():
+    for label, resource in _sample_resources().items():
+        spec = resource._data
+        spec_name = type(spec).__name__
+
+        def construct(spec=spec):
+            spec_cls = type(spec)
+            kwargs = {field.name: getattr(spec, field.name) for field in fields(spec)}
+            return lambda: spec_cls(**kwargs)
+
+        def to_dict(spec=spec):
+            return lambda: spec.to_dict(AccountEdition.ENTERPRISE)
+
+        benchmark(f"{spec_name}.__post_init__")(construct)
+        benchmark(f"{spec_name}.to_dict")(to_dict)
+
+
+_register_spec_benchmarks()
+
+
+@benchmark("_filter_result")
+def bench_filter_result():
+    rows = [
+        {"privilege": "USAGE", "granted_on": "DATABASE", "name": f"DB_{idx}", "grantee_name": "ANALYST"}
+        for idx in range(500)
+    ]
+    return lambda: _filter_result(rows, granted_on="DATABASE", name="DB_250")
+
+
+@benchmark("_diff_resource_data")
+def bench_diff_resource_data():
+    lhs = _sample_resources()["table"].to_dict(AccountEdition.ENTERPRISE)
+    rhs = {**lhs, "comment": "Changed"}
+    return lambda: _diff_resource_data(lhs, rhs)
+
+
+@benchmark("topological_sort")
+def bench_topological_sort():
+    # A tree with four children per node, like a role hierarchy
+    nodes = list(range(2_000))
+    references = {(node, (node - 1) // 4) for node in nodes[1:]}
+    return lambda: topological_sort(nodes, references)
+
+
+@benchmark("Props.render")
+def bench_props_render():
+    user = _sample_resources()["user"]
+    data = user.to_dict(AccountEdition.ENTERPRISE)
+    return lambda: user.props.render(data)
+
+
+@benchmark("_parse_props")
+def bench_parse_props():
+    sql = "LOGIN_NAME = 'SOMEUSER' DISPLAY_NAME = 'Some User' EMAIL = 'someuser@example.com' COMMENT = 'Analyst'"
+    props = res.User.props
+    return lambda: _parse_props(props, sql)
+
+
+def run_benchmarks(names: list[str], repeat: int) -> dict[str, dict]:
+    results = {}
+    for name in names:
+        fn = BENCHMARKS[name]()
+        timer = timeit.Timer(fn)
+        number, _ = timer.autorange()
+        best = min(timer.repeat(repeat=repeat, number=number)) / number
+        results[name] = {"us_per_call": round(best * 1_000_000, 3), "number": number}
+        click.echo(f"{name:<40} {best * 1_000_000:>12.3f}us")
+    return results
+
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Print the change of every benchmark against the baseline, and return the ones that regressed"""
+    regressions = []
+    for name, result in current["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            click.echo(f"{name:<40} {'new':>12}")
+            continue
+        before = baseline["benchmarks"][name]["us_per_call"]
+        after = result["us_per_call"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(f"{name} is {change:.0%} slower ({before:.3f}us -> {after:.3f}us)")
+        click.echo(f"{name:<40} {before:>12.3f}us {after:>12.3f}us {change:>+8.0%}{flag}")
+    return regressions
+
+
+def _load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+@click.group()
+def cli():
+    """Microbenchmarks for the identifier, spec and diff hot paths"""
+
+
+@cli.command("list")
+def list_benchmarks():
+    """List the benchmarks"""
+    for name in BENCHMARKS:
+        click.echo(name)
+
+
+@cli.command("run")
+@click.option("-k", "pattern", default=None, help="Only run benchmarks whose name contains this")
+@click.option("--repeat", default=5, show_default=True, help="Number of timing rounds, the fastest one is kept")
+@click.option("--out", type=click.Path(dir_okay=False), default=None, help="Write results as JSON to this file")
+@click.option("--save-baseline", is_flag=True, help=f"Write results to the stored baseline ({BASELINE_PATH})")
+@click.option(
+    "--compare",
+    "compare_path",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Compare results to a baseline file and exit with an error if any benchmark regressed",
+)
+@click.option("--threshold", default=DEFAULT_THRESHOLD, show_default=True, help="Slowdown that counts as a regression")
+def run(pattern, repeat, out, save_baseline, compare_path, threshold):
+    """Run the benchmarks"""
+    names = [name for name in BENCHMARKS if pattern is None or pattern in name]
+    results = {
+        "benchmark": "micro",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": run_benchmarks(names, repeat),
+    }
+    for path in [out, BASELINE_PATH if save_baseline else None]:
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+                f.write("\n")
+    if compare_path:
+        click.echo()
+        regressions = compare_results(_load(compare_path), results, threshold)
+        if regressions:
+            raise click.ClickException("; ".join(regressions))
+
+
+@cli.command("compare")
+@click.argument("current_path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--baseline",
+    "baseline_path",
+    type=click.Path(exists=True, dir_okay=False),
+    default=BASELINE_PATH,
+    show_default=True,
+    help="Baseline results to compare to",
+)
+@click.option("--threshold", default=DEFAULT_THRESHOLD, show_default=True, help="Slowdown that counts as a regression")
+def compare(current_path, baseline_path, threshold):
+    """Compare saved results to a baseline, and exit with an error if any benchmark regressed"""
+    regressions = compare_results(_load(baseline_path), _load(current_path), threshold)
+    if regressions:
+        raise click.ClickException("; ".join(regressions))
+
+
+if __name__ == "__main__":
+    cli()
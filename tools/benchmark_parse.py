@@ -0,0 +1,69 @@
+import logging
+import os
+import time
+
+import click
+import pyparsing as pp
+
+from snowbytes.parse import _parse_dynamic_table_text, _split_statements, parse_view_ddl
+from snowbytes.resources.resource import Resource
+
+SQL_FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "sql")
+
+
+def load_corpus(sql_dir: str) -> list[tuple[type[Resource], str]]:
+    """Read (resource class, statement) pairs, resolving each fixture file name to a resource class"""
+    classes = {name.lower(): resource_cls for name, resource_cls in Resource.__classes__.items()}
+    corpus = []
+    for file_name in sorted(os.listdir(sql_dir)):
+        if not file_name.endswith(".sql"):
+            continue
+        resource_cls = classes.get(file_name[:-4].replace("_", ""))
+        if resource_cls is None:
+            continue
+        with open(os.path.join(sql_dir, file_name), encoding="utf-8") as f:
+            corpus.extend((resource_cls, sql) for sql in _split_statements(f.read()))
+    return corpus
+
+
+def parse_corpus(corpus: list[tuple[type[Resource], str]]) -> int:
+    failures = 0
+    for resource_cls, sql in corpus:
+        try:
+            resource_cls.from_sql(sql)
+            if resource_cls.__name__ == "View":
+                parse_view_ddl(sql)
+            elif resource_cls.__name__ == "DynamicTable":
+                _parse_dynamic_table_text(sql)
+        except Exception:
+            failures += 1
+    return failures
+
+
+@click.command()
+@click.option("--sql-dir", default=SQL_FIXTURES_DIR, show_default=True, help="Directory of .sql fixtures")
+@click.option("--rounds", default=5, show_default=True, help="Number of times to parse the corpus")
+@click.option("--packrat", is_flag=True, help="Enable pyparsing packrat memoization")
+@click.option("--max-seconds", type=float, default=None, help="Exit with an error if a warm round takes longer")
+def main(sql_dir, rounds, packrat, max_seconds):
+    """Time Resource.from_sql over a corpus of SQL fixtures"""
+    # from_sql warns that it will be deprecated, once per statement
+    logging.getLogger("snowbytes").setLevel(logging.ERROR)
+    if packrat:
+        pp.ParserElement.enable_packrat()
+
+    corpus = load_corpus(sql_dir)
+    timings = []
+    for round_ in range(rounds):
+        start = time.perf_counter()
+        failures = parse_corpus(corpus)
+        timings.append(time.perf_counter() - start)
+        label = "cold" if round_ == 0 else "warm"
+        print(f"round {round_ + 1} ({label}): {len(corpus)} statements in {timings[-1]:.3f}s, {failures} failures")
+
+    if max_seconds is not None and len(timings) > 1 and min(timings[1:]) > max_seconds:
+        raise click.ClickException(f"warm rounds took at least {min(timings[1:]):.3f}s, limit is {max_seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+import gc
+import json
+import logging
+import platform
+import re
+import resource
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+import click
+
+from snowbytes import data_provider
+from snowbytes.blueprint import Blueprint, Manifest, ManifestResource, compile_plan_to_sql, diff, dump_plan
+from snowbytes.enums import AccountEdition, ResourceType
+from snowbytes.gitops import collect_blueprint_config
+from snowbytes.identifiers import URN, parse_FQN
+from snowbytes.replay import SessionRecorder, SessionReplay
+
+SESSION_CTX = {
+    "account": "BENCHMARK",
+    "account_locator": "BENCH123",
+    "account_edition": AccountEdition.ENTERPRISE,
+    "role": "SYSADMIN",
+    "available_roles": ["SYSADMIN", "USERADMIN", "SECURITYADMIN", "ACCOUNTADMIN"],
+    "secondary_roles": [],
+}
+
+DEFAULT_SIZES = ["1k", "10k"]
+SCHEMAS_PER_DATABASE = 4
+# One in DRIFT_MISSING configured resources is missing from the remote state and one in DRIFT_CHANGED has a
+# different comment, so plans have creates and updates to render
+DRIFT_MISSING = 10
+DRIFT_CHANGED = 25
+
+
+def parse_size(size: str) -> int:
+    size = size.lower()
+    for suffix, multiplier in [("k", 1_000), ("m", 1_000_000)]:
+        if size.endswith(suffix):
+            return int(float(size[:-1]) * multiplier)
+    return int(size)
+
+
+def generate_config(resource_count: int) -> dict[str, list]:
+    """
+    A synthetic config of roughly resource_count resources, shaped like a large account: a tree of roles,
+    databases of schemas and tagged tables, and grants and future grants on them.
+    """
+    role_count = max(2, resource_count // 20)
+    database_count = max(1, resource_count // 200)
+    tag_count = max(1, resource_count // 500)
+    table_count = max(1, resource_count * 3 // 10)
+    grant_count = max(1, resource_count * 9 // 20)
+
+    roles = [f"BENCH_ROLE_{i}" for i in range(role_count)]
+    databases = [f"BENCH_DB_{i}" for i in range(database_count)]
+    schemas = [(database, f"SCH_{i}") for database in databases for i in range(SCHEMAS_PER_DATABASE)]
+    tables = [(*schemas[i % len(schemas)], f"TBL_{i}") for i in range(table_count)]
+    tags = [f"BENCH_TAG_{i}" for i in range(tag_count)]
+
+    config: dict[str, list] = {
+        "roles": [{"name": role, "comment": f"Benchmark role {i}"} for i, role in enumerate(roles)],
+        # Every role is granted to its parent in a tree with four children per role
+        "role_grants": [
+            {"role": role, "to_role": roles[(i - 1) // 4] if i > 0 else "SYSADMIN"} for i, role in enumerate(roles)
+        ],
+        "databases": [
+            {
+                "name": database,
+                "comment": f"Benchmark database {i}",
+                "schemas": [{"name": schema} for db, schema in schemas if db == database],
+            }
+            for i, database in enumerate(databases)
+        ],
+        "tags": [
+            {"name": tag, "database": databases[0], "schema": "PUBLIC", "allowed_values": ["A", "B"]} for tag in tags
+        ],
+        "tables": [
+            {
+                "name": table,
+                "database": database,
+                "schema": schema,
+                "comment": f"Benchmark table {i}",
+                "columns": [
+                    {"name": "ID", "data_type": "NUMBER(38,0)"},
+                    {"name": "PAYLOAD", "data_type": "VARCHAR(16777216)"},
+                ],
+                **({"tags": {f"{databases[0]}.PUBLIC.{tags[i % tag_count]}": "A"}} if i % 5 == 0 else {}),
+            }
+            for i, (database, schema, table) in enumerate(tables)
+        ],
+        "grants": [],
+        "future_grants": [],
+    }
+
+    # Cycle through (object, role) pairs so that no grant is repeated
+    for i in range(grant_count):
+        kind, k = i % 3, i // 3
+        if kind == 0:
+            database = databases[k % database_count]
+            role = roles[(k // database_count) % role_count]
+            grant = {"priv": "USAGE", "on_database": database, "to_role": role}
+        elif kind == 1:
+            database, schema = schemas[k % len(schemas)]
+            role = roles[(k // len(schemas)) % role_count]
+            grant = {"priv": "USAGE", "on_schema": f"{database}.{schema}", "to_role": role}
+        else:
+            database, schema, table = tables[k % table_count]
+            role = roles[(k // table_count) % role_count]
+            grant = {"priv": "SELECT", "on_table": f"{database}.{schema}.{table}", "to_role": role}
+        config["grants"].append(grant)
+
+    for i, (database, schema) in enumerate(schemas):
+        role = roles[i % role_count]
+        config["future_grants"].append(
+            {"priv": "SELECT", "on_future_tables_in_schema": f"{database}.{schema}", "to": role}
+        )
+
+    return config
+
+
+def generate_remote_state(manifest: Manifest) -> dict[URN, dict]:
+    """
+    fetch_resource results for an account that mostly matches the manifest, with some drift
+    """
+    remote_state: dict[URN, dict] = {}
+    for idx, (urn, item) in enumerate(manifest.items()):
+        if not isinstance(item, ManifestResource):
+            # Pointers to built-in resources, like the account and SYSADMIN
+            remote_state[urn] = {"name": str(urn.fqn.name)}
+            if urn.resource_type == ResourceType.ACCOUNT:
+                remote_state[urn]["locator"] = SESSION_CTX["account_locator"]
+            continue
+        if not item.implicit and idx % DRIFT_MISSING == 0:
+            continue
+        data = dict(item.data)
+        if not item.implicit and idx % DRIFT_CHANGED == 1 and "comment" in data:
+            data["comment"] = "Changed outside of snowbytes"
+        remote_state[urn] = data
+    # Built-in roles and other resources the config refers to without defining must exist
+    for _, ref_urn in manifest.refs:
+        if ref_urn not in manifest and ref_urn not in remote_state:
+            remote_state[ref_urn] = {"name": str(ref_urn.fqn.name)}
+    return remote_state
+
+
+CREATED_ON = datetime(2024, 1, 1, tzinfo=timezone.utc)
+STATEMENT_OK = [{"status": "Statement executed successfully."}]
+TAG_REFERENCES = re.compile(r"tag_references\(\s*'(.+?)', '(\w+)'")
+# Listings of these types go through data_provider._show_resources, which looks up one object at a time with
+# SHOW ... LIKE once an account has more than 1000 of them
+LIKE_LOOKUPS = {ResourceType.ROLE, ResourceType.DATABASE, ResourceType.SCHEMA}
+
+
+class SyntheticConnection:
+    """
+    A connection to a synthetic account holding the remote state fixture. It answers the statements data_provider
+    sends with rows shaped like Snowflake's, so SessionRecorder can record a session for SessionReplay. Statements
+    about objects the account doesn't have return no rows.
+    """
+
+    def __init__(self, remote_state: dict[URN, dict]):
+        self.user = "BENCHMARK"
+        self.role = str(SESSION_CTX["role"])
+        self._responses: dict[str, list[dict]] = defaultdict(list)
+        self._tag_references: dict[tuple[str, str], list[dict]] = {}
+        for urn, data in remote_state.items():
+            self._add(urn, data)
+
+    def cursor(self, *args, **kwargs) -> "SyntheticCursor":
+        return SyntheticCursor(self)
+
+    def close(self):
+        pass
+
+    def _add(self, urn: URN, data: dict):
+        fqn = urn.fqn
+        if urn.resource_type == ResourceType.ROLE:
+            row = {
+                "created_on": CREATED_ON,
+                "name": str(fqn.name),
+                "is_default": "N",
+                "is_current": "N",
+                "is_inherited": "N",
+                # Built-in roles have no owner
+                "owner": data.get("owner", ""),
+                "comment": data.get("comment") or "",
+            }
+            self._show("ROLES", urn, row)
+        elif urn.resource_type == ResourceType.DATABASE:
+            row = {
+                "created_on": CREATED_ON,
+                "name": str(fqn.name),
+                "kind": "STANDARD",
+                "owner": data["owner"],
+                "owner_role_type": "ROLE",
+                "comment": data["comment"] or "",
+                "options": "TRANSIENT" if data["transient"] else "",
+                "retention_time": str(data["data_retention_time_in_days"]),
+            }
+            self._show("DATABASES", urn, row)
+            self._responses[f"SHOW PARAMETERS IN DATABASE {fqn}"] = _parameter_rows(
+                data, ["max_data_extension_time_in_days", "external_volume", "catalog", "default_ddl_collation"]
+            )
+        elif urn.resource_type == ResourceType.SCHEMA:
+            options = ["TRANSIENT"] * data["transient"] + ["MANAGED ACCESS"] * data["managed_access"]
+            row = {
+                "created_on": CREATED_ON,
+                "name": str(fqn.name),
+                "database_name": str(fqn.database),
+                "owner": data["owner"],
+                "owner_role_type": "ROLE",
+                "comment": data["comment"] or "",
+                "options": ", ".join(options),
+                "retention_time": str(data["data_retention_time_in_days"]),
+            }
+            self._show("SCHEMAS", urn, row)
+            self._responses[f"SHOW PARAMETERS IN SCHEMA {fqn}"] = _parameter_rows(
+                data, ["max_data_extension_time_in_days", "default_ddl_collation"]
+            )
+        elif urn.resource_type == ResourceType.TABLE:
+            row = {
+                "created_on": CREATED_ON,
+                "name": str(fqn.name),
+                "database_name": str(fqn.database),
+                "schema_name": str(fqn.schema),
+                "kind": "TRANSIENT" if data["transient"] else "TABLE",
+                "cluster_by": "",
+                "change_tracking": "ON" if data["change_tracking"] else "OFF",
+                "enable_schema_evolution": "Y" if data["enable_schema_evolution"] else "N",
+                "owner": data["owner"],
+                "owner_role_type": "ROLE",
+                "comment": data["comment"] or "",
+            }
+            self._show("TABLES", urn, row)
+            self._responses[f"DESC TABLE {fqn}"] = [
+                {
+                    "name": column["name"],
+                    "type": column["data_type"],
+                    "kind": "COLUMN",
+                    "null?": "N" if column["not_null"] else "Y",
+                    "default": column["default"],
+                    "comment": column["comment"],
+                }
+                for column in data["columns"]
+            ]
+            self._responses[f"SHOW PARAMETERS FOR TABLE {fqn}"] = _parameter_rows(data, ["default_ddl_collation"])
+        elif urn.resource_type == ResourceType.TAG:
+            row = {
+                "created_on": CREATED_ON,
+                "name": str(fqn.name),
+                "database_name": str(fqn.database),
+                "schema_name": str(fqn.schema),
+                "owner": data["owner"],
+                "owner_role_type": "ROLE",
+                "comment": data["comment"] or "",
+                "allowed_values": json.dumps(data["allowed_values"]) if data["allowed_values"] else None,
+            }
+            self._show("TAGS", urn, row)
+        elif urn.resource_type == ResourceType.TAG_REFERENCE:
+            object_fqn = parse_FQN(data["object_name"])
+            self._tag_references[(data["object_name"], data["object_domain"])] = [
+                {
+                    "TAG_DATABASE": tag.split(".")[0],
+                    "TAG_SCHEMA": tag.split(".")[1],
+                    "TAG_NAME": tag.split(".")[2],
+                    "TAG_VALUE": value,
+                    "LEVEL": data["object_domain"],
+                    "OBJECT_DATABASE": str(object_fqn.database),
+                    "OBJECT_SCHEMA": str(object_fqn.schema),
+                    "OBJECT_NAME": str(object_fqn.name),
+                    "DOMAIN": data["object_domain"],
+                    "COLUMN_NAME": None,
+                }
+                for tag, value in data["tags"].items()
+            ]
+        elif urn.resource_type == ResourceType.ROLE_GRANT:
+            self._responses[f"SHOW GRANTS OF ROLE {data['role']}"].append(
+                {
+                    "created_on": CREATED_ON,
+                    "role": data["role"],
+                    "granted_to": "ROLE",
+                    "grantee_name": data["to_role"],
+                    "granted_by": "SECURITYADMIN",
+                }
+            )
+        elif urn.resource_type == ResourceType.GRANT:
+            self._responses[f"SHOW GRANTS TO ROLE {data['to']}"].append(
+                {
+                    "created_on": CREATED_ON,
+                    "privilege": data["priv"],
+                    "granted_on": data["on_type"].replace(" ", "_"),
+                    "name": data["on"],
+                    "granted_to": "ROLE",
+                    "grantee_name": data["to"],
+                    "grant_option": str(data["grant_option"]).lower(),
+                    "granted_by": data["owner"],
+                }
+            )
+        elif urn.resource_type == ResourceType.FUTURE_GRANT:
+            self._responses[f"SHOW FUTURE GRANTS TO ROLE {data['to']}"].append(
+                {
+                    "created_on": CREATED_ON,
+                    "privilege": data["priv"],
+                    "grant_on": data["on_type"].replace(" ", "_"),
+                    "name": f"{data['in_name']}.<{data['on_type'].replace(' ', '_')}>",
+                    "grant_to": "ROLE",
+                    "grantee_name": data["to"],
+                    "grant_option": str(data["grant_option"]).lower(),
+                }
+            )
+
+    def _show(self, type_str: str, urn: URN, row: dict):
+        self._responses[f"SHOW {type_str} IN ACCOUNT"].append(row)
+        if urn.resource_type in LIKE_LOOKUPS:
+            fqn = urn.fqn
+            container = f" IN DATABASE {fqn.database}" if fqn.database else ""
+            self._responses[f"SHOW {type_str} LIKE '{fqn.name}'{container}"].append(row)
+
+    def _respond(self, sql: str) -> list[dict]:
+        if sql.startswith("USE ROLE "):
+            self.role = sql.split(" ", 2)[-1]
+            return STATEMENT_OK
+        if sql.startswith("USE "):
+            return STATEMENT_OK
+        if "CURRENT_ACCOUNT_NAME()" in sql:
+            return [_session_row(self)]
+        tag_references = TAG_REFERENCES.search(sql)
+        if tag_references:
+            return self._tag_references.get(tag_references.groups(), [])
+        return self._responses.get(sql, [])
+
+
+class SyntheticCursor:
+    def __init__(self, connection: SyntheticConnection):
+        self.connection = connection
+        self._rows: list[dict] = []
+
+    def execute(self, sql: str, *args, **kwargs) -> "SyntheticCursor":
+        self._rows = self.connection._respond(sql)
+        return self
+
+    def fetchall(self) -> list[dict]:
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+def _parameter_rows(data: dict, params: list[str]) -> list[dict]:
+    rows = []
+    for param in params:
+        value = data[param]
+        param_type = "NUMBER" if isinstance(value, int) else "STRING"
+        rows.append({"key": param.upper(), "value": "" if value is None else str(value), "type": param_type})
+    return rows
+
+
+def _session_row(connection: SyntheticConnection) -> dict:
+    return {
+        "ACCOUNT": SESSION_CTX["account"],
+        "ACCOUNT_LOCATOR": SESSION_CTX["account_locator"],
+        "USER": connection.user,
+        "ROLE": connection.role,
+        "AVAILABLE_ROLES": json.dumps([str(role) for role in SESSION_CTX["available_roles"]]),
+        "SECONDARY_ROLES": json.dumps(SESSION_CTX["secondary_roles"]),
+        "DATABASE": None,
+        "SCHEMAS": "[]",
+        "WAREHOUSE": None,
+        "VERSION": "8.0.0",
+        "REGION": "AWS_US_WEST_2",
+        "ACCOUNT_DATA": json.dumps({"accountInfo": {"serviceLevelName": str(SESSION_CTX["account_edition"])}}),
+    }
+
+
+def record_session(blueprint: Blueprint, manifest: Manifest, remote_state: dict[URN, dict]) -> SessionReplay:
+    """
+    Fetch the remote state once, untimed, from a synthetic account holding the remote state fixture, and replay
+    the statements that sent. Timing the replay covers parsing and filtering SHOW results and the query cache,
+    but not the synthetic account's own work.
+    """
+    recorder = SessionRecorder()
+    data_provider.reset_session_caches()
+    blueprint.fetch_remote_state(recorder.wrap(SyntheticConnection(remote_state)), manifest)
+    # The timed fetch has to start with cold caches
+    data_provider.reset_session_caches()
+    return SessionReplay(recorder.trace)
+
+
+def _max_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def time_stage(name: str, fn: Callable[[], Any], trace_memory: bool, stages: list[dict]) -> Any:
+    gc.collect()
+    if trace_memory:
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    result = fn()
+    runtime = time.perf_counter() - start
+    stage = {"stage": name, "seconds": round(runtime, 4)}
+    if trace_memory:
+        stage["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+    stages.append(stage)
+    print(f"  {name}: {runtime:.3f}s")
+    return result
+
+
+def run_benchmark(resource_count: int, trace_memory: bool) -> dict:
+    stages: list[dict] = []
+    config = generate_config(resource_count)
+
+    blueprint_config = time_stage(
+        "collect_blueprint_config", lambda: collect_blueprint_config(config), trace_memory, stages
+    )
+    blueprint = Blueprint.from_config(blueprint_config)
+    manifest = time_stage("generate_manifest", lambda: blueprint.generate_manifest(SESSION_CTX), trace_memory, stages)
+
+    remote_fixture = generate_remote_state(manifest)
+    replay = record_session(blueprint, manifest, remote_fixture)
+    remote_state = time_stage(
+        "fetch_remote_state", lambda: blueprint.fetch_remote_state(replay.connect(), manifest), trace_memory, stages
+    )
+    data_provider.reset_session_caches()
+
+    changes = time_stage("diff", lambda: list(diff(remote_state, manifest)), trace_memory, stages)
+    plan = time_stage("_plan", lambda: blueprint._plan(remote_state, manifest), trace_memory, stages)
+    sql_commands = time_stage(
+        "compile_plan_to_sql", lambda: compile_plan_to_sql(SESSION_CTX, plan), trace_memory, stages
+    )
+    time_stage("dump_plan", lambda: dump_plan(plan, format="json"), trace_memory, stages)
+
+    return {
+        "resources": resource_count,
+        "manifest_resources": len(manifest.urns),
+        "remote_resources": len(remote_state),
+        "changes": len(changes),
+        "sql_commands": len(sql_commands),
+        "total_seconds": round(sum(stage["seconds"] for stage in stages), 4),
+        # The high-water mark of the whole process so far, including earlier runs. Use --trace-memory for the
+        # peak of each stage.
+        "process_max_rss_mb": round(_max_rss_mb(), 1),
+        "stages": stages,
+    }
+
+
+@click.command()
+@click.option(
+    "--size",
+    "sizes",
+    multiple=True,
+    default=DEFAULT_SIZES,
+    show_default=True,
+    help="Number of resources in the synthetic account, eg. 1k, 10k, 100k, 500k. Can be repeated.",
+)
+@click.option("--out", type=click.Path(dir_okay=False), default=None, help="Write results as JSON to this file")
+@click.option("--trace-memory", is_flag=True, help="Measure peak memory per stage with tracemalloc. Slows every stage.")
+def main(sizes, out, trace_memory):
+    """Time every stage of planning a synthetic account, from config to SQL"""
+    # The planner warns about every resource it discards or can't fetch
+    logging.getLogger("snowbytes").setLevel(logging.ERROR)
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10_000))
+    if trace_memory:
+        tracemalloc.start()
+
+    runs = []
+    for size in sizes:
+        resource_count = parse_size(size)
+        print(f"{size} ({resource_count} resources)")
+        runs.append(run_benchmark(resource_count, trace_memory))
+
+    results = {
+        "benchmark": "scale",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "trace_memory": trace_memory,
+        "runs": runs,
+    }
+    if out:
+        with open(out, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()